@@ -16,6 +16,8 @@ import requests
 # 재시도 설정
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # 초
+# 서버가 Retry-After로 지정한 대기 시간 상한 (초) - 더 길면 재시도 포기
+MAX_RETRY_AFTER = 30
 
 
 def get_config_path() -> Path:
@@ -34,6 +36,16 @@ def get_computer_name() -> str:
     return socket.gethostname()
 
 
+def get_retry_delay(response, default: float) -> float:
+    """재시도 전 대기 시간 - 429/503 응답이면 Retry-After, 그 외는 default"""
+    if response is None or response.status_code not in (429, 503):
+        return default
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return default
+
+
 def send_event(server_url: str, event_type: str) -> bool:
     """이벤트를 서버로 전송 (재시도 포함)"""
     config = load_config()
@@ -48,6 +60,7 @@ def send_event(server_url: str, event_type: str) -> bool:
     headers = {"X-API-Key": api_key} if api_key else {}
 
     for attempt in range(MAX_RETRIES):
+        response = None
         try:
             response = requests.post(url, json=data, headers=headers, timeout=15)
             if response.status_code == 200:
@@ -57,7 +70,10 @@ def send_event(server_url: str, event_type: str) -> bool:
             log_error(f"이벤트 전송 실패 (시도 {attempt + 1}/{MAX_RETRIES}): {e}")
 
         if attempt < MAX_RETRIES - 1:
-            time.sleep(RETRY_DELAY)
+            delay = get_retry_delay(response, RETRY_DELAY)
+            if delay > MAX_RETRY_AFTER:
+                break
+            time.sleep(delay)
 
     return False
 
@@ -74,6 +90,7 @@ def send_heartbeat(server_url: str) -> bool:
     headers = {"X-API-Key": api_key} if api_key else {}
 
     for attempt in range(MAX_RETRIES):
+        response = None
         try:
             response = requests.post(url, params=params, headers=headers, timeout=10)
             if response.status_code == 200:
@@ -83,7 +100,10 @@ def send_heartbeat(server_url: str) -> bool:
             pass
 
         if attempt < MAX_RETRIES - 1:
-            time.sleep(1)
+            delay = get_retry_delay(response, 1)
+            if delay > MAX_RETRY_AFTER:
+                break
+            time.sleep(delay)
 
     return False
 
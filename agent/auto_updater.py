@@ -1,10 +1,11 @@
 """
 ComputerOff Agent 자동 업데이트
 - 서버 API에서 최신 버전 확인
-- 새 EXE 다운로드
+- 새 EXE 다운로드 (끊기면 .tmp에서 이어받기, 받으면서 SHA-256 계산)
 - 배치 스크립트로 자체 교체
 """
 
+import hashlib
 import json
 import os
 import sys
@@ -20,6 +21,13 @@ import requests
 class UpdateInfo(NamedTuple):
     version: str
     download_url: str
+    sha256: Optional[str] = None
+
+
+# 다운로드 시도 횟수 (한 번의 업데이트 안에서, 매번 받은 곳부터 이어받음) / 재시도 간격 (초)
+DOWNLOAD_ATTEMPTS = 5
+DOWNLOAD_RETRY_DELAY = 5
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
 def compare_versions(current: str, latest: str) -> bool:
@@ -32,9 +40,12 @@ def compare_versions(current: str, latest: str) -> bool:
         return False
 
 
-def check_for_update(server_url: str, current_version: str, variant: str) -> Optional[UpdateInfo]:
+def check_for_update(server_url: str, current_version: str, variant: str,
+                     download_url: Optional[str] = None) -> Optional[UpdateInfo]:
     """서버에서 최신 버전 확인
 
+    download_url을 주면 그 경로로 받는다 (하트비트 응답의 다운로드 슬롯 토큰이 붙은 URL).
+
     Returns:
         UpdateInfo if update available, None otherwise
     """
@@ -55,19 +66,89 @@ def check_for_update(server_url: str, current_version: str, variant: str) -> Opt
         if variant not in variants:
             return None
 
-        download_url = f"/api/agent/download/{variant}"
-        return UpdateInfo(version=latest_version, download_url=download_url)
+        if not download_url:
+            download_url = f"/api/agent/download/{variant}"
+        sha256 = (data.get('sha256') or {}).get(variant)
+        return UpdateInfo(version=latest_version, download_url=download_url, sha256=sha256)
     except Exception:
         return None
 
 
-def download_update(server_url: str, download_url: str, install_dir: Path) -> Optional[Path]:
+def _hash_file(path: Path, digest) -> int:
+    """이어받기 전 이미 받은 부분을 해시에 반영. 크기 반환"""
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return size
+
+
+def _download_once(url: str, tmp_path: Path, etag_path: Path) -> tuple[Optional[int], object]:
+    """한 번 요청해서 tmp_path에 이어 쓰기
+
+    Returns:
+        (전체 크기(모르면 None), SHA-256 해시 객체) - 끝까지 받았을 때
+    Raises:
+        requests.RequestException / OSError: 중간에 끊김 (받은 부분은 tmp_path에 남음)
+        ValueError: 서버 응답 이상 (tmp_path 삭제 후 처음부터 받아야 함)
+    """
+    digest = hashlib.sha256()
+    offset = 0
+    headers = {}
+    if tmp_path.exists() and etag_path.exists():
+        etag = etag_path.read_text(encoding='utf-8').strip()
+        offset = _hash_file(tmp_path, digest)
+        if offset > 0 and etag:
+            # If-Range: 파일이 그 사이 바뀌었으면 서버가 206 대신 전체(200)를 보냄
+            headers = {'Range': f'bytes={offset}-', 'If-Range': etag}
+
+    with requests.get(url, headers=headers, timeout=(10, 120), stream=True) as response:
+        if response.status_code == 206 and headers:
+            content_range = response.headers.get('content-range', '')
+            if not content_range.startswith(f'bytes {offset}-'):
+                raise ValueError(f"Content-Range 불일치: {content_range}")
+            total = content_range.rpartition('/')[2]
+            total = int(total) if total.isdigit() else None
+            mode = 'ab'
+        elif response.status_code == 200:
+            # 처음부터 (이어받기 불가 또는 파일 변경)
+            digest = hashlib.sha256()
+            offset = 0
+            total = int(response.headers.get('content-length', 0)) or None
+            mode = 'wb'
+            etag_path.write_text(response.headers.get('etag', ''), encoding='utf-8')
+        elif response.status_code == 429 or response.status_code >= 500:
+            # 일시적 거절/과부하 - 받은 부분은 유지하고 재시도
+            raise requests.HTTPError(f"HTTP {response.status_code}")
+        else:
+            raise ValueError(f"HTTP {response.status_code}")
+
+        with open(tmp_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    offset += len(chunk)
+
+    if total is not None and offset != total:
+        raise requests.ConnectionError(f"수신 크기 불일치: {offset}/{total}")
+    return total, digest
+
+
+def download_update(server_url: str, download_url: str, install_dir: Path,
+                    expected_sha256: Optional[str] = None) -> Optional[Path]:
     """새 EXE 다운로드
 
+    연결이 끊기면 받은 부분(.tmp)을 남겨 두고 Range 요청으로 이어받는다 (같은 호출 안에서
+    DOWNLOAD_ATTEMPTS회, 다음 업데이트 시도에서도 이어받음). 받으면서 SHA-256을 계산하므로
+    검증에 파일을 다시 읽지 않는다.
+
     Args:
         server_url: 서버 URL
         download_url: 다운로드 경로 (/api/agent/download/x64)
         install_dir: 설치 디렉토리
+        expected_sha256: version.json의 SHA-256 (없으면 크기만 확인)
 
     Returns:
         다운로드된 파일 경로, 실패 시 None
@@ -76,37 +157,41 @@ def download_update(server_url: str, download_url: str, install_dir: Path) -> Op
     update_dir.mkdir(exist_ok=True)
 
     tmp_path = update_dir / "agent_new.exe.tmp"
+    etag_path = update_dir / "agent_new.exe.etag"
     final_path = update_dir / "agent_new.exe"
+    url = f"{server_url.rstrip('/')}{download_url}"
 
-    try:
-        url = f"{server_url.rstrip('/')}{download_url}"
-        response = requests.get(url, timeout=120, stream=True)
-        if response.status_code != 200:
+    def discard():
+        tmp_path.unlink(missing_ok=True)
+        etag_path.unlink(missing_ok=True)
+
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        if attempt:
+            time.sleep(DOWNLOAD_RETRY_DELAY)
+        try:
+            _, digest = _download_once(url, tmp_path, etag_path)
+        except (requests.RequestException, OSError):
+            continue  # 받은 부분부터 다시
+        except ValueError:
+            discard()
             return None
 
-        content_length = int(response.headers.get('content-length', 0))
-
-        downloaded = 0
-        with open(tmp_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-
-        # Verify size
-        if content_length > 0 and downloaded != content_length:
-            tmp_path.unlink(missing_ok=True)
+        # Verify hash
+        if expected_sha256 and digest.hexdigest() != expected_sha256.lower():
+            discard()
             return None
 
-        # Rename tmp to final
-        if final_path.exists():
-            final_path.unlink()
-        tmp_path.rename(final_path)
-
-        return final_path
-    except Exception:
-        tmp_path.unlink(missing_ok=True)
-        return None
+        try:
+            # Rename tmp to final
+            if final_path.exists():
+                final_path.unlink()
+            tmp_path.rename(final_path)
+            etag_path.unlink(missing_ok=True)
+            return final_path
+        except OSError:
+            discard()
+            return None
+    return None
 
 
 def create_update_script(new_exe_path: Path, current_exe_path: Path, install_dir: Path) -> Optional[Path]:
@@ -284,7 +369,7 @@ def release_update_lock(install_dir: Path):
 
 
 def trigger_auto_update(server_url: str, current_version: str, variant: str,
-                         install_dir: Path, log_func=None):
+                         install_dir: Path, log_func=None, download_url: Optional[str] = None):
     """자동 업데이트 전체 프로세스
 
     Args:
@@ -293,6 +378,7 @@ def trigger_auto_update(server_url: str, current_version: str, variant: str,
         variant: 에이전트 variant (x64/x86/win7_x64)
         install_dir: 설치 디렉토리
         log_func: 로그 함수
+        download_url: 하트비트 응답의 download_url (슬롯 토큰 포함, 슬롯 단위 Rate Limit 적용)
     """
     if is_update_locked(install_dir):
         if log_func:
@@ -300,7 +386,7 @@ def trigger_auto_update(server_url: str, current_version: str, variant: str,
         return
 
     # Check for update
-    update_info = check_for_update(server_url, current_version, variant)
+    update_info = check_for_update(server_url, current_version, variant, download_url)
     if not update_info:
         return
 
@@ -312,7 +398,8 @@ def trigger_auto_update(server_url: str, current_version: str, variant: str,
 
     try:
         # Download
-        new_exe = download_update(server_url, update_info.download_url, install_dir)
+        new_exe = download_update(server_url, update_info.download_url, install_dir,
+                                  expected_sha256=update_info.sha256)
         if not new_exe:
             if log_func:
                 log_func("[UPDATE] 다운로드 실패")
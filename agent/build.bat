@@ -168,7 +168,8 @@ echo.
 echo [7/8] Generating version.json...
 
 REM Generate via Python for ISO 8601 timestamp (locale-independent) and proper JSON formatting.
-py -3 -c "import json, datetime; json.dump({'version':'%VERSION%','variants':{'x64':'agent_windows_x64.exe','x86':'agent_windows_x86.exe','win7_x64':'agent_windows_win7_x64.exe'},'installer_filename':'Agent_Setup_v%VERSION%.exe','updated_at':datetime.datetime.now().isoformat(timespec='seconds')}, open(r'..\dist\version.json','w',encoding='utf-8'), indent=2, ensure_ascii=False)"
+REM sha256: per-variant EXE hash - agents verify downloads against it (missing variants are skipped)
+py -3 -c "import json, datetime, hashlib, os; v={'x64':'agent_windows_x64.exe','x86':'agent_windows_x86.exe','win7_x64':'agent_windows_win7_x64.exe'}; h={k: hashlib.sha256(open(os.path.join(r'..\dist',n),'rb').read()).hexdigest() for k, n in v.items() if os.path.exists(os.path.join(r'..\dist',n))}; json.dump({'version':'%VERSION%','variants':v,'sha256':h,'installer_filename':'Agent_Setup_v%VERSION%.exe','updated_at':datetime.datetime.now().isoformat(timespec='seconds')}, open(r'..\dist\version.json','w',encoding='utf-8'), indent=2, ensure_ascii=False)"
 if errorlevel 1 (
     echo       [ERROR] Failed to generate version.json
     if not "%AUTO_MODE%"=="1" pause
@@ -86,6 +86,12 @@ if sys.platform == 'win32':
 MAX_RETRIES = 2
 RETRY_DELAY = 1
 
+# 서버가 Retry-After로 지정한 대기 시간 상한 (초) - 더 길면 이번 전송은 포기하고 다음 주기에 재시도
+MAX_RETRY_AFTER = 30
+
+# 이벤트 로그 동기화/복구 시 한 요청에 묶어 보낼 최대 이벤트 수 (서버 상한 500)
+EVENT_BATCH_SIZE = 100
+
 # 상태 파일 경로
 STATE_FILE = "state.json"
 
@@ -94,6 +100,29 @@ def get_computer_name() -> str:
     return socket.gethostname()
 
 
+def get_retry_delay(response, default: float) -> float:
+    """재시도 전 대기 시간 (초)
+
+    서버가 Rate Limit(429) 또는 과부하(503)로 거절하면 Retry-After 값을 따르고,
+    그 외(네트워크 오류, 다른 상태 코드, 값 없음)는 default
+    """
+    if response is None or response.status_code not in (429, 503):
+        return default
+    try:
+        return max(0.0, float(response.headers.get('Retry-After', '')))
+    except ValueError:
+        return default
+
+
+def wait_before_retry(delay: float, what: str) -> bool:
+    """재시도 대기 - 대기 시간이 MAX_RETRY_AFTER를 넘으면 대기하지 않고 False (재시도 포기)"""
+    if delay > MAX_RETRY_AFTER:
+        log_error(f"[RETRY] {what}: 서버 요청 대기 {delay:.0f}초 - 이번 전송 포기")
+        return False
+    time.sleep(delay)
+    return True
+
+
 def get_local_ip() -> str:
     """로컬 IP 주소 반환
 
@@ -188,6 +217,7 @@ def send_event(
     log_error(f"이벤트 전송 시작: {event_type}, URL={url}, data={data}")
 
     for attempt in range(MAX_RETRIES):
+        response = None
         try:
             response = requests.post(url, json=data, headers=headers, timeout=5)
             log_error(f"서버 응답 (시도 {attempt + 1}): status={response.status_code}, body={response.text[:200]}")
@@ -204,12 +234,105 @@ def send_event(
             log_error(f"이벤트 전송 실패 (시도 {attempt + 1}/{MAX_RETRIES}): {type(e).__name__}: {e}")
 
         if attempt < MAX_RETRIES - 1:
-            time.sleep(RETRY_DELAY)
+            if not wait_before_retry(get_retry_delay(response, RETRY_DELAY), "이벤트 전송"):
+                break
 
     log_error(f"이벤트 전송 최종 실패: {event_type}")
     return False
 
 
+def send_events_batch(server_url: str, events: list) -> list:
+    """이벤트 로그 이벤트를 묶어서 서버로 전송 (/api/events/batch)
+
+    Args:
+        server_url: 서버 URL
+        events: get_all_events_from_log() 형식의 이벤트 목록
+                (event_type, timestamp, event_detail, record_id)
+
+    Returns:
+        입력 순서대로 전송 성공 여부 목록 (중복도 서버에 이미 있으므로 성공)
+        배치 API가 없는 구버전 서버(404/405)면 send_event로 하나씩 전송
+        그 외 실패(혼잡/오류/재시도 소진)면 그 묶음부터 나머지는 실패 - 다음 동기화 때 다시 보냄
+        (서버가 부하를 줄이려는 중에 개별 전송으로 요청 수를 늘리지 않도록)
+    """
+    url = f"{server_url.rstrip('/')}/api/events/batch"
+    computer_name = get_computer_name()
+    results = []
+    batch_supported = True
+
+    for start in range(0, len(events), EVENT_BATCH_SIZE):
+        chunk = events[start:start + EVENT_BATCH_SIZE]
+        if not batch_supported:
+            results.extend(_send_events_one_by_one(server_url, chunk))
+            continue
+        data = {"events": [
+            {
+                "computer_name": computer_name,
+                "event_type": event['event_type'],
+                "timestamp": event['timestamp'].isoformat(),
+                "event_detail": event['event_detail'],
+                "event_source": 'event_log',
+                "event_record_id": event['record_id']
+            }
+            for event in chunk
+        ]}
+
+        chunk_results = None
+        for attempt in range(MAX_RETRIES):
+            response = None
+            try:
+                response = requests.post(url, json=data, timeout=15)
+                if response.status_code in (404, 405):
+                    log_error("배치 API 미지원 서버 - 개별 전송으로 전환")
+                    batch_supported = False
+                    break
+                if response.status_code == 200:
+                    items = response.json().get('results', [])
+                    if len(items) != len(chunk):
+                        log_error(f"배치 응답 항목 수 불일치: {len(items)}/{len(chunk)}")
+                        break
+                    chunk_results = [bool(item) and 'error' not in item for item in items]
+                    for event, item in zip(chunk, items):
+                        if 'error' in item:
+                            log_error(f"배치 항목 거부: record_id={event['record_id']}, {item['error']}")
+                    break
+                log_error(f"배치 전송 실패 (시도 {attempt + 1}/{MAX_RETRIES}): HTTP {response.status_code}")
+            except Exception as e:
+                log_error(f"배치 전송 실패 (시도 {attempt + 1}/{MAX_RETRIES}): {type(e).__name__}: {e}")
+
+            if attempt < MAX_RETRIES - 1:
+                if not wait_before_retry(get_retry_delay(response, RETRY_DELAY), "배치 전송"):
+                    break
+
+        if not batch_supported:
+            results.extend(_send_events_one_by_one(server_url, chunk))
+            continue
+        if chunk_results is None:
+            log_error(f"배치 전송 중단: {len(events) - start}개는 다음 동기화 때 재전송")
+            results.extend([False] * (len(events) - start))
+            break
+
+        log_error(f"배치 전송 완료: {sum(chunk_results)}/{len(chunk)}개")
+        results.extend(chunk_results)
+
+    return results
+
+
+def _send_events_one_by_one(server_url: str, events: list) -> list:
+    """배치 API가 없는 구버전 서버용 개별 전송"""
+    return [
+        send_event(
+            server_url=server_url,
+            event_type=event['event_type'],
+            timestamp=event['timestamp'],
+            event_detail=event['event_detail'],
+            event_source='event_log',
+            event_record_id=event['record_id']
+        )
+        for event in events
+    ]
+
+
 def send_shutdown_event_sync(server_url: str) -> bool:
     """종료 이벤트 빠른 동기 전송 (WM_ENDSESSION용)
 
@@ -746,18 +869,9 @@ def recover_missed_events(server_url: str) -> int:
     last_record_id = state.get('last_sent_event_record_id')
     log_error(f"마지막 전송 record_id: {last_record_id}")
 
-    for event in events:
-        # 서버로 전송 (event_record_id로 중복 방지)
-        log_error(f"미전송 이벤트 복구 시도: {event['event_type']}({event['event_detail']}) at {event['timestamp']} (record_id={event['record_id']})")
-
-        if send_event(
-            server_url=server_url,
-            event_type=event['event_type'],
-            timestamp=event['timestamp'],
-            event_detail=event['event_detail'],
-            event_source='event_log',
-            event_record_id=event['record_id']
-        ):
+    # 서버로 일괄 전송 (event_record_id로 중복 방지)
+    for event, success in zip(events, send_events_batch(server_url, events)):
+        if success:
             sent_count += 1
             # 상태 업데이트 (shutdown만)
             if event['event_type'] == 'shutdown':
@@ -969,14 +1083,26 @@ def ack_resync_to_server(server_url: str) -> bool:
         return False
 
 
+def _parse_server_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """서버 응답의 ISO timestamp 파싱 (실패 시 None)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00').replace('+00:00', ''))
+    except ValueError:
+        log_error(f"서버 timestamp 파싱 실패: {value}")
+        return None
+
+
 def sync_event_logs(
     server_url: str,
     since_override: Optional[datetime] = None,
-    max_events: int = 20
+    max_events: int = 20,
+    sync_state: Optional[dict] = None
 ) -> int:
     """이벤트 로그를 서버와 동기화
 
-    1. 서버에서 마지막 전송된 이벤트 조회 (since_override 있으면 건너뜀)
+    1. 마지막 전송된 이벤트 확인 (하트비트 응답의 sync_state 우선, since_override 있으면 건너뜀)
     2. 이벤트 로그에서 그 이후의 새 이벤트 수집
     3. 새 이벤트만 서버로 전송
 
@@ -984,6 +1110,10 @@ def sync_event_logs(
         server_url: 서버 URL
         since_override: 지정 시 서버 조회 없이 이 시각부터 수집 (대시보드 재집계 요청용)
         max_events: 한 번에 긁어올 최대 이벤트 수 (재집계는 500까지)
+        sync_state: 하트비트 응답의 동기화 상태 (last_boot, last_shutdown)
+                    없으면 구버전 서버로 보고 /api/events/last 조회
+                    (last_event_record_id는 연속 값이 아니라 최댓값이므로 걸러내는 데 쓰지 않음 -
+                     중간에 빠진 이벤트도 다시 보내고, 이미 있는 것은 서버가 record_id로 중복 처리)
 
     Returns: 전송된 이벤트 수
     """
@@ -993,9 +1123,14 @@ def sync_event_logs(
         since_timestamp = since_override
         log_error(f"[RESYNC] since_override={since_override}, max_events={max_events}")
     else:
-        # 서버에서 마지막 전송된 boot/shutdown 이벤트 시간 조회
-        last_boot = get_last_event_from_server(server_url, 'boot')
-        last_shutdown = get_last_event_from_server(server_url, 'shutdown')
+        if sync_state is not None:
+            # 하트비트 응답에 포함된 서버 상태 사용 (추가 요청 없음)
+            last_boot = _parse_server_timestamp(sync_state.get('last_boot'))
+            last_shutdown = _parse_server_timestamp(sync_state.get('last_shutdown'))
+        else:
+            # 구버전 서버: 마지막 전송된 boot/shutdown 이벤트 시간 조회
+            last_boot = get_last_event_from_server(server_url, 'boot')
+            last_shutdown = get_last_event_from_server(server_url, 'shutdown')
 
         # 둘 중 더 오래된 시간 사용 (그 이후의 모든 이벤트 수집)
         if last_boot and last_shutdown:
@@ -1016,17 +1151,8 @@ def sync_event_logs(
 
     sent_count = 0
 
-    for event in events:
-        # 이벤트 전송 (event_record_id로 중복 방지)
-        success = send_event(
-            server_url=server_url,
-            event_type=event['event_type'],
-            timestamp=event['timestamp'],
-            event_detail=event['event_detail'],
-            event_source='event_log',
-            event_record_id=event['record_id']
-        )
-
+    # 이벤트 일괄 전송 (event_record_id로 중복 방지)
+    for event, success in zip(events, send_events_batch(server_url, events)):
         if success:
             sent_count += 1
             # 상태 업데이트
@@ -1082,17 +1208,21 @@ def restart_monitor_if_needed():
 _heartbeat_call_count = 0
 # 업데이트 체크 카운터 (60회 = 약 1시간마다)
 _update_check_counter = 0
+# 서버가 update_retry_after로 알려 준 다음 업데이트 확인 시각 (time.monotonic 기준)
+_update_not_before = 0.0
 
 
 def send_heartbeat(server_url: str) -> bool:
     """하트비트를 서버로 전송 (실시간 온라인 상태용)
 
     구조화된 에러 처리:
+    - 429/503 서버 혼잡: Retry-After만큼 대기 후 재시도 (MAX_RETRY_AFTER 초과 시 다음 주기로)
     - 500+ 서버 오류: 로깅 후 재시도
     - 네트워크 오류: 로깅 후 재시도
 
     하트비트 전송 후 이벤트 로그 동기화 및 자동 업데이트 체크도 수행
     """
+    global _update_not_before
     config = load_config()
     agent_variant = config.get('agent_variant', '')
 
@@ -1101,14 +1231,18 @@ def send_heartbeat(server_url: str) -> bool:
         "computer_name": get_computer_name(),
         "ip_address": get_local_ip(),
         "agent_version": AGENT_VERSION,
-        "agent_variant": agent_variant
     }
+    # agent_variant를 보내야 서버가 업데이트를 안내(다운로드 슬롯 할당)하므로
+    # update_retry_after로 받은 시각 전에는 빼서 쓰지 않을 슬롯을 잡지 않게 함
+    if agent_variant and time.monotonic() >= _update_not_before:
+        params["agent_variant"] = agent_variant
     headers = {}
 
     heartbeat_success = False
     response_data = {}
 
     for attempt in range(MAX_RETRIES):
+        response = None
         try:
             response = requests.post(url, params=params, headers=headers, timeout=10)
 
@@ -1120,6 +1254,8 @@ def send_heartbeat(server_url: str) -> bool:
                     pass
                 break
 
+            elif response.status_code in (429, 503):
+                log_error(f"[SERVER] 서버 혼잡 (HTTP {response.status_code}, Retry-After={response.headers.get('Retry-After')})")
             elif response.status_code >= 500:
                 log_error(f"[SERVER] 서버 오류 (HTTP {response.status_code})")
             else:
@@ -1133,12 +1269,13 @@ def send_heartbeat(server_url: str) -> bool:
             log_error(f"[ERROR] 예상치 못한 오류: {type(e).__name__}: {e}")
 
         if attempt < MAX_RETRIES - 1:
-            time.sleep(1)
+            if not wait_before_retry(get_retry_delay(response, 1), "하트비트"):
+                break
 
     # 하트비트 성공 시 이벤트 로그 동기화
     if heartbeat_success:
         try:
-            sync_event_logs(server_url)
+            sync_event_logs(server_url, sync_state=response_data.get('sync_state'))
         except Exception as e:
             log_error(f"[SYNC] 이벤트 로그 동기화 실패: {e}")
 
@@ -1166,11 +1303,23 @@ def send_heartbeat(server_url: str) -> bool:
             except Exception as e:
                 log_error(f"[RESYNC] 재집계 실패 (다음 하트비트에 재시도): {e}")
 
-    # 자동 업데이트 체크 (60회마다 = 약 1시간)
+    # 코호트 대기 / 슬롯 부족: 서버가 알려 준 시간이 지날 때까지 업데이트 안내를 받지 않음
+    retry_after = response_data.get('update_retry_after') if heartbeat_success else None
+    if retry_after:
+        try:
+            _update_not_before = time.monotonic() + float(retry_after)
+            log_error(f"[UPDATE] 업데이트 대기: {float(retry_after):.0f}초 후 다시 확인")
+        except (TypeError, ValueError):
+            pass
+
+    # 자동 업데이트 체크
+    # 서버가 다운로드 슬롯을 내준 경우(download_slot_expires_in)는 슬롯이 만료되기 전에 바로 시작
+    # (슬롯을 모르는 이전 서버는 update_available만 보내므로 60회마다 = 약 1시간)
     if heartbeat_success and response_data.get('update_available') and agent_variant:
         global _update_check_counter
         _update_check_counter += 1
-        if _update_check_counter % 60 == 1:
+        has_slot = bool(response_data.get('download_slot_expires_in'))
+        if has_slot or _update_check_counter % 60 == 1:
             try:
                 from auto_updater import trigger_auto_update
                 trigger_auto_update(
@@ -1178,7 +1327,8 @@ def send_heartbeat(server_url: str) -> bool:
                     current_version=AGENT_VERSION,
                     variant=agent_variant,
                     install_dir=get_install_dir(),
-                    log_func=log_error
+                    log_func=log_error,
+                    download_url=response_data.get('download_url') if has_slot else None
                 )
             except SystemExit:
                 raise
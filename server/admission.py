@@ -0,0 +1,193 @@
+"""우선순위 기반 요청 수용 제어 (과부하 시 낮은 우선순위부터 거절)
+
+부팅 폭주 + 대량 재동기화 + 대시보드 여러 개가 겹치면 모든 요청이 똑같이 느려져
+종료 이벤트가 유실되고 하트비트가 타임아웃된다. 요청을 경로로 분류해 우선순위를 매기고,
+부하 신호가 클래스별 한도를 넘으면 그 클래스부터 503 + Retry-After로 거절한다.
+
+우선순위 (높음 → 낮음): Agent 이벤트 > 하트비트 > 대시보드 조회 > 내보내기/다운로드
+분류하지 않는 요청 (/api/health, /api/ready, /metrics, /api/stream, 인증, 관리자, 정적 파일)은 항상 수용한다.
+
+부하 신호 (프로세스 단위)
+- 처리 중 요청 수: 수용 시 +1, 응답 종료 시 -1. 클래스별로 MAX_IN_FLIGHT 대비 비율 한도
+- 큐 지연: 수용 → 엔드포인트 함수 시작까지 시간 (스레드풀 대기 + 입력 검증)의 EWMA.
+  클래스별로 TARGET_QUEUE_MS 배수 한도 (Agent 이벤트는 지연으로는 거절하지 않음)
+"""
+
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import random
+import time
+from typing import Callable, Optional
+
+import metrics
+
+# 처리 중 요청 수 상한 (이벤트 클래스 기준, 낮은 클래스는 이 값의 일부만 사용)
+MAX_IN_FLIGHT = int(os.environ.get("COMPUTEROFF_ADMISSION_MAX_IN_FLIGHT", 100))
+# 목표 큐 지연 (ms)
+TARGET_QUEUE_MS = float(os.environ.get("COMPUTEROFF_ADMISSION_TARGET_QUEUE_MS", 50))
+# 큐 지연 EWMA 가중치 / 관측이 이 시간(초) 동안 없으면 지연을 0으로 간주
+EWMA_ALPHA = 0.2
+LATENCY_STALE_SECONDS = 1.0
+
+EVENT, HEARTBEAT, DASHBOARD, EXPORT = range(4)
+CLASS_NAMES = ("event", "heartbeat", "dashboard", "export")
+
+# 클래스별 수용 한도: 처리 중 요청 비율 / 큐 지연 배수 (None = 지연으로 거절 안 함)
+IN_FLIGHT_SHARE = (1.0, 0.9, 0.7, 0.4)
+QUEUE_LATENCY_FACTOR = (None, 4.0, 2.0, 1.0)
+# 클래스별 Retry-After 기본값 (초) - 실제 값은 여기에 0~100% 무작위 가산 (재시도 분산)
+RETRY_AFTER_SECONDS = (2, 5, 5, 30)
+
+_AGENT_EVENT_PATHS = {
+    ("POST", "/api/events"),
+    ("POST", "/api/events/batch"),
+    ("POST", "/api/resync/ack"),
+    ("POST", "/api/computers/register"),
+    ("GET", "/api/events/last"),
+}
+_HEARTBEAT_PATHS = {
+    ("POST", "/api/heartbeat"),
+    ("GET", "/api/agent/version"),
+}
+_EXPORT_PREFIXES = ("/api/export/", "/api/agent/download/")
+_UNCLASSIFIED_PREFIXES = ("/api/auth/", "/api/admin/")
+_UNCLASSIFIED_PATHS = {"/api/health", "/api/ready", "/api/stream"}
+
+# 수용된 요청의 (클래스, 수용 시각) - 엔드포인트 시작 시 큐 지연 계산용
+_admitted: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("admission", default=None)
+
+
+def classify(method: str, path: str) -> Optional[int]:
+    """요청 우선순위 클래스 (None = 제어 대상 아님)"""
+    if (method, path) in _AGENT_EVENT_PATHS:
+        return EVENT
+    if (method, path) in _HEARTBEAT_PATHS:
+        return HEARTBEAT
+    if not path.startswith("/api/") or path in _UNCLASSIFIED_PATHS or path.startswith(_UNCLASSIFIED_PREFIXES):
+        return None
+    if path.startswith(_EXPORT_PREFIXES):
+        return EXPORT
+    return DASHBOARD
+
+
+class AdmissionController:
+    """처리 중 요청 수 / 큐 지연 추적 및 수용 판정
+
+    카운터는 이벤트 루프에서만 바뀌므로 락이 없다. 큐 지연 관측은 스레드풀에서 오지만
+    float 대입 하나라 경합해도 관측 1건이 빠질 뿐이다.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, target_queue_ms: float = TARGET_QUEUE_MS):
+        self.max_in_flight = max_in_flight
+        self.target_queue = target_queue_ms / 1000
+        self.in_flight = [0] * len(CLASS_NAMES)
+        self.total_in_flight = 0
+        self._queue_latency = 0.0
+        self._observed_at = 0.0
+
+    @property
+    def queue_latency(self) -> float:
+        """큐 지연 EWMA (초, 최근 관측이 없으면 0)"""
+        if time.monotonic() - self._observed_at > LATENCY_STALE_SECONDS:
+            return 0.0
+        return self._queue_latency
+
+    def observe_queue_latency(self, priority: int, seconds: float):
+        self._queue_latency += EWMA_ALPHA * (seconds - self._queue_latency)
+        self._observed_at = time.monotonic()
+        metrics.ADMISSION_QUEUE.observe(seconds, CLASS_NAMES[priority])
+
+    def check(self, priority: int) -> float:
+        """수용이면 0.0, 거절이면 Retry-After 초"""
+        limit = self.max_in_flight * IN_FLIGHT_SHARE[priority]
+        factor = QUEUE_LATENCY_FACTOR[priority]
+        if self.total_in_flight < limit and (factor is None or self.queue_latency <= self.target_queue * factor):
+            return 0.0
+        base = RETRY_AFTER_SECONDS[priority]
+        return base + random.random() * base
+
+    def acquire(self, priority: int):
+        self.in_flight[priority] += 1
+        self.total_in_flight += 1
+
+    def release(self, priority: int):
+        self.in_flight[priority] -= 1
+        self.total_in_flight -= 1
+
+    def status(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": dict(zip(CLASS_NAMES, self.in_flight)),
+            "queue_latency_ms": round(self.queue_latency * 1000, 3),
+            "target_queue_ms": self.target_queue * 1000,
+        }
+
+    def wrap_endpoint(self, call: Callable) -> Callable:
+        """엔드포인트 함수 시작 시점에 큐 지연 기록"""
+        def started():
+            admitted = _admitted.get()
+            if admitted is not None:
+                priority, admitted_at = admitted
+                self.observe_queue_latency(priority, time.perf_counter() - admitted_at)
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def async_wrapper(*args, **kwargs):
+                started()
+                return await call(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            started()
+            return call(*args, **kwargs)
+        return wrapper
+
+
+class AdmissionMiddleware:
+    """경로로 분류 → 수용 판정 → 거절 시 503 + Retry-After (순수 ASGI)"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = classify(scope["method"], scope["path"])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        retry_after = controller.check(priority)
+        if retry_after:
+            metrics.ADMISSION_SHED.inc(CLASS_NAMES[priority])
+            await _overloaded(send, math.ceil(retry_after))
+            return
+
+        controller.acquire(priority)
+        token = _admitted.set((priority, time.perf_counter()))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _admitted.reset(token)
+            controller.release(priority)
+
+
+async def _overloaded(send, retry_after: int):
+    body = ('{"detail":"서버가 혼잡합니다. %d초 후 다시 시도하세요"}' % retry_after).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(retry_after).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
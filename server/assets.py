@@ -0,0 +1,142 @@
+"""대시보드 정적 파일 빌드 (파일명 지문 + 사전 압축)
+
+static/의 JS/CSS를 내용 해시가 들어간 이름(script.3f2a9c1b7d04.js)으로 static/dist/에 쓰고,
+index.html의 참조를 새 이름으로 바꿔 dist/index.html로 쓴다. 각 파일의 gzip(.gz) /
+brotli(.br, brotli 설치 시) 압축본도 최고 압축률로 미리 만들어 둔다.
+
+- 지문 파일은 내용이 바뀌면 이름이 바뀌므로 immutable로 오래 캐시할 수 있다
+- index.html은 매번 재검증해야 새 지문 이름을 받아 간다
+- 서빙: responses.PrecompressedStaticFiles (압축본 선택, Cache-Control)
+
+서버 시작 시 build()가 실행되고, 이미 같은 내용의 파일은 다시 쓰지 않는다.
+배포 패키징 시 `python server/assets.py`로 미리 만들어 둘 수도 있다.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# brotli 임포트 (없으면 gzip 압축본만 생성)
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+STATIC_DIR = Path(__file__).parent / "static"
+# 빌드 결과 디렉터리 (static/ 아래, /static/dist/로 서빙)
+DIST_DIRNAME = "dist"
+INDEX_NAME = "index.html"
+
+# 지문을 붙이는 파일 / 압축본을 만드는 파일
+FINGERPRINT_SUFFIXES = (".js", ".css")
+COMPRESS_SUFFIXES = (".js", ".css", ".html")
+HASH_LENGTH = 12
+
+# 빌드는 한 번이므로 최고 압축률 (요청마다 압축하는 responses.CompressionMiddleware와 다름)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# 압축본 확장자 (responses.PrecompressedStaticFiles가 같은 규칙으로 찾음)
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# index.html의 /static/<파일> 참조
+_STATIC_REF = re.compile(r'(?P<attr>href|src)="/static/(?P<name>[^"?#]+)"')
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """script.js → script.<sha256 앞 12자리>.js"""
+    stem, suffix = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{suffix}"
+
+
+def _write(path: Path, content: bytes) -> bool:
+    """내용이 다를 때만 임시 파일 → 교체 (워커 여러 개가 동시에 빌드해도 안전). 썼으면 True"""
+    try:
+        if path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return True
+
+
+def _compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # mtime=0: 같은 입력이면 같은 압축본 (재빌드 시 불필요한 쓰기 방지)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _write_with_variants(path: Path, content: bytes) -> list[str]:
+    """파일 + 압축본 쓰기. 만든(또는 유지한) 파일 이름 목록"""
+    changed = _write(path, content)
+    names = [path.name]
+    if path.suffix not in COMPRESS_SUFFIXES:
+        return names
+    encodings = ("br", "gzip") if HAS_BROTLI else ("gzip",)
+    for encoding in encodings:
+        variant = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+        if changed or not variant.exists():
+            compressed = _compress(content, encoding)
+            # 압축해도 줄지 않으면 압축본을 두지 않음 (서빙 시 원본 전송)
+            if len(compressed) >= len(content):
+                continue
+            _write(variant, compressed)
+        names.append(variant.name)
+    return names
+
+
+def build(static_dir: Path = STATIC_DIR) -> dict[str, str]:
+    """dist/ 빌드 → {원본 이름: static_dir 기준 상대 경로} (index.html 포함)
+
+    이전 빌드에서 남은 지문 파일은 삭제한다.
+    """
+    dist = static_dir / DIST_DIRNAME
+    dist.mkdir(exist_ok=True)
+
+    manifest = {}
+    produced = set()
+    for source in sorted(static_dir.iterdir()):
+        if not source.is_file() or source.suffix not in FINGERPRINT_SUFFIXES:
+            continue
+        content = source.read_bytes()
+        hashed = fingerprint(source.name, content)
+        produced.update(_write_with_variants(dist / hashed, content))
+        manifest[source.name] = f"{DIST_DIRNAME}/{hashed}"
+
+    def rewrite(match: re.Match) -> str:
+        target = manifest.get(match.group("name"))
+        if target is None:
+            return match.group(0)
+        return f'{match.group("attr")}="/static/{target}"'
+
+    index = _STATIC_REF.sub(rewrite, (static_dir / INDEX_NAME).read_text(encoding="utf-8"))
+    produced.update(_write_with_variants(dist / INDEX_NAME, index.encode("utf-8")))
+    manifest[INDEX_NAME] = f"{DIST_DIRNAME}/{INDEX_NAME}"
+
+    # 다른 워커가 쓰는 중인 임시 파일(.으로 시작)은 건드리지 않음
+    for stale in dist.iterdir():
+        if stale.name not in produced and not stale.name.startswith(".") and stale.is_file():
+            stale.unlink(missing_ok=True)
+    return manifest
+
+
+if __name__ == "__main__":
+    for name, target in build().items():
+        print(f"{name} → static/{target}")
+    if not HAS_BROTLI:
+        print("[WARNING] brotli 미설치 - gzip 압축본만 생성 (pip install Brotli)")
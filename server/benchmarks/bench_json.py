@@ -0,0 +1,110 @@
+"""대용량 JSON 응답 직렬화/압축 벤치마크
+
+임시 SQLite DB에 이벤트를 채운 뒤 기존 방식(dict(row) → json.dumps)과
+database.*_json(DB가 만든 JSON) + 봉투 인코딩 방식을 비교하고,
+응답 크기(원본/gzip/brotli)를 출력한다.
+
+사용법: python server/benchmarks/bench_json.py [--events 20000] [--computers 50] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import database  # noqa: E402
+import responses  # noqa: E402
+
+
+def populate(n_events: int, n_computers: int):
+    start = datetime.now() - timedelta(days=30)
+    events = []
+    for i in range(n_events):
+        events.append({
+            'computer_name': f"PC-{i % n_computers:03d}",
+            'event_type': random.choice(('boot', 'shutdown')),
+            'timestamp': start + timedelta(seconds=random.randint(0, 30 * 86400)),
+            'event_detail': "Windows 이벤트 로그",
+            'event_source': 'eventlog',
+            'event_record_id': i,
+        })
+    for i in range(0, len(events), 1000):
+        database.insert_events(events[i:i + 1000])
+    for i in range(n_computers):
+        database.register_computer(f"PC-{i:03d}", "10.0.0.1")
+        database.set_computer_display_name(f"PC-{i:03d}", f"사무실 {i}번")
+
+
+def best_of(fn, repeat: int) -> tuple[float, bytes]:
+    best = float('inf')
+    body = b''
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, body
+
+
+def baseline_events(limit: int) -> bytes:
+    events = database.get_events(limit=limit)
+    return json.dumps({"events": events, "count": len(events)}, default=str).encode('utf-8')
+
+
+def fast_events(limit: int) -> bytes:
+    events, count, _next_cursor = database.get_events_json(limit=limit)
+    return responses.encode_envelope({"events": responses.RawJSON(events), "count": count})
+
+
+def baseline_summary(days: int) -> bytes:
+    summary = database.get_daily_summary(days)
+    return json.dumps({"summary": summary, "days": days}, default=str).encode('utf-8')
+
+
+def fast_summary(days: int) -> bytes:
+    summary, _count = database.get_daily_summary_json(days)
+    return responses.encode_envelope({"summary": responses.RawJSON(summary), "days": days})
+
+
+def report(name: str, baseline, fast, repeat: int):
+    base_ms, base_body = best_of(baseline, repeat)
+    fast_ms, fast_body = best_of(fast, repeat)
+    print(f"\n[{name}]")
+    print(f"  기존 (dict + json)      : {base_ms:8.1f} ms  {len(base_body):>10,} bytes")
+    print(f"  DB JSON + 봉투 인코딩   : {fast_ms:8.1f} ms  {len(fast_body):>10,} bytes")
+    print(f"  gzip (level {responses.GZIP_LEVEL})          : {len(gzip.compress(fast_body, responses.GZIP_LEVEL)):>22,} bytes")
+    if responses.HAS_BROTLI:
+        print(f"  brotli (quality {responses.BROTLI_QUALITY})     : "
+              f"{len(responses.compress(fast_body, 'br')):>22,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--computers', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        database.init_db()
+        populate(args.events, args.computers)
+
+        print(f"이벤트 {args.events:,}건, 컴퓨터 {args.computers}대 "
+              f"(orjson={'on' if responses.HAS_ORJSON else 'off'}, "
+              f"brotli={'on' if responses.HAS_BROTLI else 'off'})")
+        page = database.EVENTS_PAGE_MAX
+        report(f"/api/events?limit={page}",
+               lambda: baseline_events(page), lambda: fast_events(page), args.repeat)
+        report("/api/daily-summary?days=30",
+               lambda: baseline_summary(30), lambda: fast_summary(30), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""미들웨어 스택 처리량 벤치마크 (이전: BaseHTTPMiddleware 보안 헤더 + starlette CORS / 현재: 순수 ASGI)
+
+서버를 띄우지 않고 main.app을 ASGI로 직접 호출해 /api/health, /api/heartbeat의 요청/초를 잰다.
+소켓/uvicorn 파싱 비용이 빠지므로 실제 서버 처리량보다 높게 나오며, 스택 간 차이를 비교하는 용도다.
+미들웨어 없이 라우터만 호출한 값(bare)을 함께 출력해 미들웨어 자체 비용을 볼 수 있다.
+임시 SQLite DB를 사용하고 Agent Rate Limit은 사실상 끈다.
+
+사용법: python server/benchmarks/bench_middleware.py [--requests 20000] [--concurrency 1]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["COMPUTEROFF_DB_BACKEND"] = "sqlite"
+
+import database  # noqa: E402
+
+database.DB_PATH = Path(tempfile.mkdtemp(prefix="computeroff-bench-")) / "bench.db"
+
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware  # noqa: E402
+
+import main as server  # noqa: E402
+import middleware  # noqa: E402
+import ratelimit  # noqa: E402
+
+
+async def legacy_security_headers(request, call_next):
+    """이전 security_headers_middleware (@app.middleware("http"))와 동일"""
+    response = await call_next(request)
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "SAMEORIGIN"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+    response.headers["Content-Security-Policy"] = middleware.CONTENT_SECURITY_POLICY
+    return response
+
+
+def legacy_stack(current: list) -> list:
+    """현재 미들웨어 목록에서 보안 헤더/CORS만 이전 구현으로 교체"""
+    stack = []
+    for item in current:
+        if item.cls is middleware.SecurityHeadersMiddleware:
+            stack.append(Middleware(BaseHTTPMiddleware, dispatch=legacy_security_headers))
+        elif item.cls is middleware.CORSMiddleware:
+            stack.append(Middleware(StarletteCORSMiddleware, **item.options))
+        else:
+            stack.append(item)
+    return stack
+
+
+def use_stack(user_middleware: list):
+    server.app.user_middleware = list(user_middleware)
+    server.app.middleware_stack = server.app.build_middleware_stack()
+
+
+def make_scope(method: str, path: str, query: bytes = b"") -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"user-agent", b"computeroff-agent"),
+            (b"accept-encoding", b"gzip"),
+            (b"origin", b"http://testserver"),
+        ],
+        "client": ("203.0.113.7", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def request_once(scope: dict) -> int:
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 연결이 끊기지 않은 상태 (BaseHTTPMiddleware가 응답 중 대기)
+        await asyncio.Future()
+
+    status = 0
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    # starlette가 scope를 수정하므로 요청마다 복사
+    await server.app(dict(scope), receive, send)
+    return status
+
+
+async def run(scopes: list, n_requests: int, concurrency: int) -> float:
+    """요청/초 (concurrency개 작업이 나눠서 순차 호출)"""
+    per_worker = n_requests // concurrency
+
+    async def worker(offset: int):
+        for i in range(per_worker):
+            await request_once(scopes[(offset + i) % len(scopes)])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w * per_worker) for w in range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - started)
+
+
+def measure(scopes: list, n_requests: int, concurrency: int) -> float:
+    """가장 빠른 3회의 요청/초"""
+    status = asyncio.run(request_once(scopes[0]))
+    if status != 200:
+        raise SystemExit(f"{scopes[0]['path']} 응답 {status}")
+    asyncio.run(run(scopes, min(n_requests, 1000), concurrency))  # 워밍업
+    return max(asyncio.run(run(scopes, n_requests, concurrency)) for _ in range(3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--agents', type=int, default=150)
+    args = parser.parse_args()
+
+    server.db.init_db()
+    server.agent_limiter = ratelimit.AgentRateLimiter(
+        limits={kind: 10 ** 9 for kind in ratelimit.AGENT_LIMITS}, ip_per_minute=10 ** 9, redis_url="")
+
+    targets = {
+        "/api/health": [make_scope("GET", "/api/health")],
+        "/api/heartbeat": [
+            make_scope("POST", "/api/heartbeat", f"computer_name=PC-{i:04d}&ip_address=10.0.0.{i % 250}".encode())
+            for i in range(args.agents)
+        ],
+    }
+    current = list(server.app.user_middleware)
+    stacks = {"bare": [], "old": legacy_stack(current), "new": current}
+
+    print(f"요청 {args.requests:,}건 × 3회 중 최고값, 동시 {args.concurrency}")
+    print(f"  미들웨어 (바깥→안): {', '.join(item.cls.__name__ for item in current)}")
+    print(f"  {'경로':<16}{'bare':>10}{'old':>10}{'new':>10}{'new/old':>10}")
+    for path, scopes in targets.items():
+        results = {}
+        for name, stack in stacks.items():
+            use_stack(stack)
+            results[name] = measure(scopes, args.requests, args.concurrency)
+        print(f"  {path:<16}{results['bare']:>10.0f}{results['old']:>10.0f}{results['new']:>10.0f}"
+              f"{results['new'] / results['old']:>9.2f}x")
+    use_stack(current)
+
+
+if __name__ == '__main__':
+    main()
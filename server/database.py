@@ -1,9 +1,17 @@
 import sqlite3
+import base64
 import hashlib
+import json
 import secrets
+import time
+import zlib
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+import metrics
+import occupancy
+import sqlprofile
 
 # bcrypt 임포트 (없으면 SHA-256 폴백)
 try:
@@ -27,15 +35,183 @@ LEGACY_MIGRATION_DAYS = 90
 # 1회 하트비트 누락 허용, Task Scheduler 지연 고려
 ONLINE_THRESHOLD_SECONDS = 180
 
+# 점유 비트맵: boot~shutdown 구간 채우기 최대 길이 (비정상적으로 긴 구간 방지)
+OCCUPANCY_MAX_SPAN_DAYS = 31
+# 점유 비트맵 최초 생성 시 이벤트에서 재구성할 기간
+OCCUPANCY_BACKFILL_DAYS = 30
+
+# 변경 로그(change feed) 보존 기간 (일) - 이보다 오래된 변경은 주기적으로 삭제
+CHANGE_RETENTION_DAYS = 7
+# /api/changes 한 번에 반환할 최대 변경 수
+CHANGE_BATCH_MAX = 1000
+
+# 대시보드 스냅샷의 사용 현황 그래프 기간 (일)
+DASHBOARD_CHART_DAYS = 7
+
+# 이벤트 목록/타임라인 한 페이지 최대 건수 (더 보려면 next_cursor 사용)
+EVENTS_PAGE_MAX = 1000
+
+# 이벤트 내보내기: 한 번에 DB에서 가져오는 행 수 (스트리밍 메모리 상한)
+EXPORT_BATCH_SIZE = 1000
+# 내보내기 열 순서 (NDJSON 키 / CSV 헤더)
+EXPORT_COLUMNS = (
+    'id', 'timestamp', 'computer_name', 'display_name', 'event_type',
+    'event_detail', 'event_source', 'event_record_id', 'created_at'
+)
+
+KST = timezone(timedelta(hours=9))
+
+# ==================== 데이터 버전 (ETag / 조회 캐시 무효화용) ====================
+# 대시보드 응답에 영향을 주는 쓰기와 같은 트랜잭션에서 data_version 카운터를 올리므로
+# 워커가 여러 개여도(다른 프로세스의 쓰기도) 커밋 즉시 모든 워커에서 같은 값으로 보인다.
+# - 'data': 모든 데이터 쓰기 + 하트비트 중 목록이 바뀌는 것(새 PC, 오프라인→온라인, IP/버전 변경)
+#   → /api/computers, 스냅샷, 점유 현황 (시간 경과로 바뀌는 값은 ETag 시간 구간으로 반영)
+# - 'events': 이벤트/컴퓨터 메타데이터 쓰기 (하트비트 제외) → 요약/타임라인/통계/이력
+# 범위마다 카운터를 DATA_VERSION_STRIPES개 행('data:17')으로 나누고 PC 이름 해시로 고른다.
+# 버전은 행 합계 (커밋마다 정확히 늘어남). 한 행을 모든 쓰기가 갱신하면 PostgreSQL에서
+# 그 행 잠금이 커밋까지 유지되어 쓰기가 전부 직렬화되므로, 다른 PC의 쓰기는 다른 행을 잡게 한다.
+DATA_VERSION_SCOPES = ('data', 'events')
+DATA_VERSION_STRIPES = 64
+
+
+def data_version_keys(computer_names: Iterable[Optional[str]], events: bool = True) -> list[str]:
+    """쓰기가 올릴 카운터 행 (정렬 - 여러 행을 잡을 때 트랜잭션 간 잠금 순서를 같게)"""
+    stripes = {
+        zlib.crc32(name.lower().encode('utf-8')) % DATA_VERSION_STRIPES if name else 0
+        for name in computer_names
+    } or {0}
+    scopes = DATA_VERSION_SCOPES if events else ('data',)
+    return sorted(f"{scope}:{stripe}" for scope in scopes for stripe in stripes)
+
+
+def bump_data_version(cursor, computer_names: Iterable[Optional[str]] = (None,), events: bool = True):
+    """쓰기 트랜잭션 안에서 커밋 직전에 호출 (하트비트처럼 이벤트 집계와 무관한 쓰기는 events=False)
+
+    computer_names: 쓰기가 건드린 PC (PC와 무관한 쓰기는 None)
+    """
+    cursor.executemany("""
+        INSERT INTO data_version (scope, version) VALUES (?, 1)
+        ON CONFLICT(scope) DO UPDATE SET version = version + 1
+    """, [(key,) for key in data_version_keys(computer_names, events)])
+
+
+def get_data_version(scope: str = 'data') -> int:
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(version), 0) as version FROM data_version WHERE scope = ? OR scope LIKE ?",
+            (scope, f"{scope}:%")
+        ).fetchone()
+    finally:
+        conn.close()
+    return row['version']
+
+
+class _Connection(sqlite3.Connection):
+    """커밋 시간을 메트릭으로 기록하는 연결 (SQL 프로파일러가 켜져 있으면 문 단위 기록)"""
+
+    _profiled: Optional[list] = None
+
+    def cursor(self, factory=None):
+        if factory is None and sqlprofile.enabled:
+            cursor = sqlprofile.ProfiledCursor(self)
+            if self._profiled is None:
+                self._profiled = []
+            self._profiled.append(cursor)
+            return cursor
+        return super().cursor() if factory is None else super().cursor(factory)
+
+    def commit(self):
+        started = time.perf_counter()
+        super().commit()
+        metrics.DB_COMMIT.observe(time.perf_counter() - started)
+
+    def close(self):
+        if self._profiled:
+            for cursor in self._profiled:
+                cursor.finish()
+            self._profiled = None
+        super().close()
+
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(str(DB_PATH), timeout=30)
+def get_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    started = time.perf_counter()
+    conn = sqlite3.connect(str(DB_PATH), timeout=30, check_same_thread=check_same_thread,
+                           factory=_Connection)
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA busy_timeout=30000")
     conn.row_factory = sqlite3.Row
+    metrics.DB_CONNECT.observe(time.perf_counter() - started)
     return conn
 
 
+def wal_size_bytes() -> int:
+    """WAL 파일 크기 (체크포인트 지연 감시용, 파일이 없으면 0)"""
+    try:
+        return Path(f"{DB_PATH}-wal").stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def optimize_storage() -> dict:
+    """WAL 체크포인트(TRUNCATE) + PRAGMA optimize (주기 유지보수 작업)
+
+    자동 체크포인트는 읽기 트랜잭션이 계속 이어지면 WAL을 되감지 못해 파일이 커지므로
+    주기적으로 TRUNCATE 체크포인트를 시도한다. 읽기 중이면 busy=True로 일부만 반영된다.
+    """
+    wal_before = wal_size_bytes()
+    conn = get_connection()
+    busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    return {
+        "wal_bytes_before": wal_before,
+        "wal_bytes_after": wal_size_bytes(),
+        "checkpoint_busy": bool(busy),
+        "wal_frames": wal_frames,
+        "checkpointed_frames": checkpointed,
+    }
+
+
+# 준비 상태 확인이 갱신하는 settings 행
+READINESS_PROBE_KEY = 'readiness_probe'
+
+
+def probe_storage(busy_timeout_ms: int = 2000) -> dict:
+    """준비 상태 확인용 실제 읽기/쓰기 왕복 (잠금 대기는 busy_timeout_ms까지만)
+
+    settings의 READINESS_PROBE_KEY 행을 갱신·커밋한 뒤 다시 읽는다.
+    잠금 초과, 디스크 가득 참 등은 sqlite3 예외로 그대로 전달한다.
+    마지막에 PASSIVE 체크포인트(다른 연결을 기다리지 않음)를 시도하고,
+    WAL에서 DB 파일로 옮기지 못한 프레임 수를 체크포인트 지연으로 반환한다.
+    """
+    token = secrets.token_hex(8)
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        conn.execute("SELECT id FROM events ORDER BY id DESC LIMIT 1").fetchone()
+        read_done = time.perf_counter()
+        conn.execute("""
+            INSERT OR REPLACE INTO settings (key, value, updated_at)
+            VALUES (?, ?, datetime('now', '+9 hours'))
+        """, (READINESS_PROBE_KEY, token))
+        conn.commit()
+        row = conn.execute("SELECT value FROM settings WHERE key = ?", (READINESS_PROBE_KEY,)).fetchone()
+        write_done = time.perf_counter()
+        if row is None or row['value'] != token:
+            raise RuntimeError("준비 상태 확인 값이 일치하지 않습니다")
+        _busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    finally:
+        conn.close()
+    return {
+        "read_ms": round((read_done - started) * 1000, 3),
+        "write_ms": round((write_done - read_done) * 1000, 3),
+        "wal_bytes": wal_size_bytes(),
+        "checkpoint_lag_frames": max(0, wal_frames - checkpointed),
+    }
+
+
 def init_db():
     conn = get_connection()
     cursor = conn.cursor()
@@ -55,6 +231,12 @@ def init_db():
         ON events(computer_name, timestamp)
     """)
 
+    # 전체 이벤트 시간 역순 페이지 조회용 (keyset: timestamp, id)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_timestamp_id
+        ON events(timestamp, id)
+    """)
+
     # events 테이블에 새 컬럼 추가 (마이그레이션)
     try:
         cursor.execute("ALTER TABLE events ADD COLUMN event_detail TEXT")
@@ -149,10 +331,276 @@ def init_db():
         )
     """)
 
+    # 분 단위 점유 비트맵 테이블 (컴퓨터 × KST 날짜, 1440비트 BLOB)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS occupancy (
+            computer_name TEXT NOT NULL,
+            day TEXT NOT NULL,
+            bits BLOB NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (computer_name, day)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_occupancy_day ON occupancy(day)")
+
+    # 변경 로그 테이블 (증분 소비자용, seq는 AUTOINCREMENT로 재사용 없이 단조 증가)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            computer_name TEXT,
+            data TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_changes_created ON changes(created_at)")
+
+    # 리더 선출 lease 테이블 (다중 워커 중 한 프로세스만 주기 작업 실행, 시각은 epoch 초)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            acquired_at REAL NOT NULL
+        )
+    """)
+
+    # Agent 업데이트 다운로드 슬롯 (PC당 1행, 동시 다운로드 수 제한, 시각은 epoch 초)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS download_slots (
+            computer_name TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            token TEXT NOT NULL,
+            granted_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    # 다운로드 슬롯 토큰 (마이그레이션, 토큰 없는 기존 슬롯은 IP 단위 Rate Limit)
+    try:
+        cursor.execute("ALTER TABLE download_slots ADD COLUMN token TEXT")
+    except sqlite3.OperationalError:
+        pass  # 이미 존재
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_download_slots_token ON download_slots(token)")
+
+    # 데이터 버전 (범위별 카운터, 'data' / 'events' 행 + PC 해시별 'data:N' / 'events:N' 행)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO data_version (scope, version) VALUES (?, 0)",
+        [(scope,) for scope in DATA_VERSION_SCOPES]
+    )
+
+    # 비트맵이 비어 있으면 기존 이벤트로 초기 구성
+    cursor.execute("SELECT COUNT(*) as cnt FROM occupancy")
+    if cursor.fetchone()['cnt'] == 0:
+        _rebuild_occupancy(cursor, OCCUPANCY_BACKFILL_DAYS)
+
     conn.commit()
     conn.close()
 
 
+# ==================== 변경 로그 내부 함수 ====================
+
+# 변경 종류
+CHANGE_EVENT_INSERT = 'event_insert'          # 신규 이벤트 (실시간/이벤트 로그/install)
+CHANGE_EVENT_OVERWRITE = 'event_overwrite'    # 근사값 이벤트를 이벤트 로그 값으로 덮어씀
+CHANGE_RECOVERY_INSERT = 'recovery_insert'    # 서버 자동 복구 shutdown
+CHANGE_RENAME = 'rename'                      # 표시 이름 변경
+CHANGE_DELETE = 'delete'                      # 컴퓨터 삭제
+CHANGE_DELETE_ALL = 'delete_all'              # 전체 삭제
+
+
+def _record_change(cursor, op: str, computer_name: Optional[str] = None, data: Optional[dict] = None):
+    """변경 로그 기록 (호출자 트랜잭션 안에서 실행 → 데이터 변경과 원자적으로 커밋)"""
+    cursor.execute(
+        "INSERT INTO changes (op, computer_name, data) VALUES (?, ?, ?)",
+        (op, computer_name, json.dumps(data, ensure_ascii=False, separators=(',', ':')) if data else None)
+    )
+
+
+def _event_change_data(event_id: int, event_type: str, timestamp, event_detail=None,
+                       event_source=None, event_record_id=None) -> dict:
+    return {
+        'id': event_id,
+        'event_type': event_type,
+        'timestamp': timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+        'event_detail': event_detail,
+        'event_source': event_source,
+        'event_record_id': event_record_id
+    }
+
+
+# ==================== JSON 직렬화 (대용량 응답용) ====================
+# 행마다 SQLite json_object()로 JSON 텍스트를 만들고 그대로 이어 붙여 응답 바이트를 만든다.
+# 파이썬 dict 생성과 JSON 인코딩을 모두 건너뛴다 (키 순서/값은 dict(row) 버전과 동일).
+
+EVENT_JSON_COLUMNS = (
+    'id', 'computer_name', 'event_type', 'timestamp', 'created_at',
+    'event_detail', 'event_source', 'event_record_id'
+)
+
+
+def _json_object_sql(columns: tuple) -> str:
+    return "json_object(" + ", ".join(f"'{column}', {column}" for column in columns) + ")"
+
+
+def _json_array(cursor) -> tuple[bytes, int]:
+    """json_object() 1열 결과 행들 → (JSON 배열 바이트, 행 수)"""
+    rows = [row[0] for row in cursor.fetchall()]
+    return ('[' + ','.join(rows) + ']').encode('utf-8'), len(rows)
+
+
+# ==================== 페이지 커서 (keyset) ====================
+
+def encode_cursor(timestamp, event_id: int) -> str:
+    """(timestamp, id) → 불투명 커서 문자열 (다음 페이지는 이 위치보다 과거)"""
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    raw = json.dumps([timestamp, event_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[str, int]:
+    """커서 문자열 → (timestamp, id). 형식이 잘못되면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        timestamp, event_id = json.loads(raw)
+    except Exception:
+        raise ValueError("잘못된 커서입니다")
+    if not isinstance(timestamp, str) or not isinstance(event_id, int):
+        raise ValueError("잘못된 커서입니다")
+    return timestamp, event_id
+
+
+def page_limit(limit: int) -> int:
+    """페이지 크기를 1~EVENTS_PAGE_MAX로 제한"""
+    return max(1, min(limit, EVENTS_PAGE_MAX))
+
+
+def _next_cursor(rows: list, limit: int, timestamp_key='timestamp', id_key='id') -> Optional[str]:
+    """limit+1건 조회 결과에서 다음 페이지 커서 (없으면 None). rows는 limit건으로 잘라 사용"""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last[timestamp_key], last[id_key])
+
+
+# ==================== 점유 비트맵 내부 함수 ====================
+
+def _now_kst() -> datetime:
+    return datetime.now(KST).replace(tzinfo=None)
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """DB 타임스탬프 문자열(ISO 'T' 또는 SQLite 공백 구분) → naive KST datetime"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(KST).replace(tzinfo=None)
+    return dt
+
+
+def _occupancy_mark(cursor, computer_name: str, start: datetime, end: Optional[datetime] = None):
+    """[start, end] 구간을 점유 비트맵에 OR 반영 (end 없으면 start 1분만)"""
+    if end is None or end < start:
+        end = start
+    if end - start > timedelta(days=OCCUPANCY_MAX_SPAN_DAYS):
+        start = end - timedelta(days=OCCUPANCY_MAX_SPAN_DAYS)
+
+    for day, start_minute, end_minute in occupancy.split_by_day(start, end):
+        cursor.execute(
+            "SELECT bits FROM occupancy WHERE computer_name = ? AND day = ?",
+            (computer_name, day)
+        )
+        row = cursor.fetchone()
+        bits = bytearray(row['bits']) if row else occupancy.empty_bitmap()
+        occupancy.set_range(bits, start_minute, end_minute)
+        cursor.execute("""
+            INSERT INTO occupancy (computer_name, day, bits, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(computer_name, day) DO UPDATE SET
+                bits = excluded.bits,
+                updated_at = CURRENT_TIMESTAMP
+        """, (computer_name, day, bytes(bits)))
+
+
+def _occupancy_mark_event(cursor, computer_name: str, event_type: str, timestamp: datetime):
+    """boot/shutdown 이벤트와 짝이 되는 이벤트를 찾아 켜져 있던 구간을 반영
+
+    - shutdown: 직전 이벤트가 boot이면 boot~shutdown 구간
+    - boot: 직후 이벤트가 shutdown이면 boot~shutdown 구간
+    - 짝이 없으면 해당 1분만 (이후 구간은 하트비트가 채움)
+    """
+    if event_type not in ('boot', 'shutdown'):
+        return
+    timestamp = _parse_timestamp(timestamp)
+    if timestamp is None:
+        return
+    ts = timestamp.isoformat()
+
+    if event_type == 'shutdown':
+        cursor.execute("""
+            SELECT event_type, timestamp FROM events
+            WHERE computer_name = ? AND event_type IN ('boot', 'shutdown')
+            AND timestamp < ?
+            ORDER BY timestamp DESC
+            LIMIT 1
+        """, (computer_name, ts))
+        row = cursor.fetchone()
+        if row and row['event_type'] == 'boot':
+            _occupancy_mark(cursor, computer_name, _parse_timestamp(row['timestamp']), timestamp)
+            return
+    else:
+        cursor.execute("""
+            SELECT event_type, timestamp FROM events
+            WHERE computer_name = ? AND event_type IN ('boot', 'shutdown')
+            AND timestamp > ?
+            ORDER BY timestamp ASC
+            LIMIT 1
+        """, (computer_name, ts))
+        row = cursor.fetchone()
+        if row and row['event_type'] == 'shutdown':
+            _occupancy_mark(cursor, computer_name, timestamp, _parse_timestamp(row['timestamp']))
+            return
+
+    _occupancy_mark(cursor, computer_name, timestamp)
+
+
+def _rebuild_occupancy(cursor, days: int):
+    """최근 N일 이벤트로 점유 비트맵 재구성 (boot→shutdown 짝 맞춤)"""
+    cursor.execute("""
+        SELECT computer_name, event_type, timestamp FROM events
+        WHERE event_type IN ('boot', 'shutdown')
+        AND timestamp >= DATE('now', '+9 hours', ?)
+        ORDER BY computer_name, datetime(timestamp)
+    """, (f'-{days} days',))
+    rows = cursor.fetchall()
+
+    last_boot = {}
+    for row in rows:
+        computer_name = row['computer_name']
+        ts = _parse_timestamp(row['timestamp'])
+        if ts is None:
+            continue
+        if row['event_type'] == 'boot':
+            _occupancy_mark(cursor, computer_name, ts)
+            last_boot[computer_name] = ts
+        else:
+            boot = last_boot.pop(computer_name, None)
+            _occupancy_mark(cursor, computer_name, boot or ts, ts)
+
+
 def insert_event(
     computer_name: str,
     event_type: str,
@@ -176,7 +624,69 @@ def insert_event(
     """
     conn = get_connection()
     cursor = conn.cursor()
+    result = _insert_event(
+        cursor, computer_name, event_type, timestamp,
+        event_detail, event_source, event_record_id
+    )
+    if not result[1]:
+        bump_data_version(cursor, (computer_name,))
+    conn.commit()
+    conn.close()
+    return result
+
 
+def insert_events(events: list[dict]) -> list[tuple[int, bool]]:
+    """이벤트 일괄 삽입 (단일 트랜잭션)
+
+    각 항목은 insert_event와 같은 키(computer_name, event_type, timestamp,
+    event_detail, event_source, event_record_id)를 갖는 dict.
+    중복/덮어쓰기 정책은 insert_event와 동일하며, 배치 내 항목끼리도 순서대로 중복 체크된다.
+
+    Returns:
+        입력 순서대로 (event_id, is_duplicate) 목록
+    """
+    if not events:
+        return []
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # 쓰기 잠금을 먼저 잡아 배치 전체의 중복 체크와 삽입을 하나의 트랜잭션으로 처리
+        cursor.execute("BEGIN IMMEDIATE")
+        results = [
+            _insert_event(
+                cursor,
+                event['computer_name'],
+                event['event_type'],
+                event['timestamp'],
+                event.get('event_detail'),
+                event.get('event_source') or 'realtime',
+                event.get('event_record_id')
+            )
+            for event in events
+        ]
+        inserted = {event['computer_name'] for event, (_, is_duplicate) in zip(events, results) if not is_duplicate}
+        if inserted:
+            bump_data_version(cursor, inserted)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return results
+
+
+def _insert_event(
+    cursor,
+    computer_name: str,
+    event_type: str,
+    timestamp: datetime,
+    event_detail: Optional[str],
+    event_source: str,
+    event_record_id: Optional[int]
+) -> tuple[int, bool]:
+    """insert_event/insert_events 공통 처리 (커밋은 호출자 책임)"""
     timestamp_str = timestamp.isoformat()
 
     # 중복 체크 1: event_record_id 기반 (정확한 매칭)
@@ -187,7 +697,7 @@ def insert_event(
         """, (computer_name, event_record_id))
         existing = cursor.fetchone()
         if existing:
-            conn.close()
+            metrics.EVENTS_INGESTED.inc('duplicate')
             return existing['id'], True  # 중복
 
     # 중복 체크 2: 시간 기반 (60초 이내 동일 event_type)
@@ -223,10 +733,13 @@ def insert_event(
                    WHERE id = ?""",
                 (timestamp_str, event_detail, event_source, event_record_id, existing['id'])
             )
-            conn.commit()
-            conn.close()
+            _occupancy_mark_event(cursor, computer_name, event_type, timestamp)
+            _record_change(cursor, CHANGE_EVENT_OVERWRITE, computer_name, _event_change_data(
+                existing['id'], event_type, timestamp_str, event_detail, event_source, event_record_id
+            ))
+            metrics.EVENTS_INGESTED.inc('overwritten')
             return existing['id'], False  # 덮어씀 (신규 취급)
-        conn.close()
+        metrics.EVENTS_INGESTED.inc('duplicate')
         return existing['id'], True  # 중복
 
     cursor.execute(
@@ -236,23 +749,25 @@ def insert_event(
     )
 
     event_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    _occupancy_mark_event(cursor, computer_name, event_type, timestamp)
+    _record_change(cursor, CHANGE_EVENT_INSERT, computer_name, _event_change_data(
+        event_id, event_type, timestamp_str, event_detail, event_source, event_record_id
+    ))
+    metrics.EVENTS_INGESTED.inc('inserted')
 
     return event_id, False
 
 
-def get_events(
-    computer_name: Optional[str] = None,
-    event_type: Optional[str] = None,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    limit: int = 100
-) -> list[dict]:
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    query = "SELECT * FROM events WHERE 1=1"
+def _events_query(
+    select: str,
+    computer_name: Optional[str],
+    event_type: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int,
+    after: Optional[tuple[str, int]] = None
+) -> tuple[str, list]:
+    query = f"SELECT {select} FROM events WHERE 1=1"
     params = []
 
     if computer_name:
@@ -271,20 +786,140 @@ def get_events(
         query += " AND timestamp <= ?"
         params.append(end_date.isoformat())
 
-    query += " ORDER BY timestamp DESC LIMIT ?"
+    if after:
+        query += " AND (timestamp, id) < (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
     params.append(limit)
+    return query, params
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+
+def get_events(
+    computer_name: Optional[str] = None,
+    event_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> list[dict]:
+    after = decode_cursor(cursor) if cursor else None
+    conn = get_connection()
+    db_cursor = conn.cursor()
+
+    db_cursor.execute(*_events_query(
+        "*", computer_name, event_type, start_date, end_date, page_limit(limit), after
+    ))
+    rows = db_cursor.fetchall()
     conn.close()
 
     return [dict(row) for row in rows]
 
 
+def get_events_json(
+    computer_name: Optional[str] = None,
+    event_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> tuple[bytes, int, Optional[str]]:
+    """get_events와 같은 페이지를 (JSON 배열 바이트, 행 수, 다음 페이지 커서)로 반환
+
+    Args:
+        cursor: 이전 페이지의 next_cursor (없으면 최신부터)
+    """
+    after = decode_cursor(cursor) if cursor else None
+    limit = page_limit(limit)
+    conn = get_connection()
+    db_cursor = conn.cursor()
+    # 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+    db_cursor.execute(*_events_query(
+        f"{_json_object_sql(EVENT_JSON_COLUMNS)}, timestamp, id",
+        computer_name, event_type, start_date, end_date, limit + 1, after
+    ))
+    rows = db_cursor.fetchall()
+    conn.close()
+
+    next_cursor = _next_cursor(rows, limit)
+    rows = rows[:limit]
+    return ('[' + ','.join(row[0] for row in rows) + ']').encode('utf-8'), len(rows), next_cursor
+
+
+def _export_filters(
+    computer_name: Optional[str],
+    event_type: Optional[str],
+    event_source: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    placeholder: str = '?'
+) -> tuple[str, list]:
+    """내보내기 WHERE 절 (SQLite/PostgreSQL 공용, 시각 파라미터는 naive datetime)"""
+    conditions = []
+    params = []
+    for column, value in (
+        ('e.computer_name', computer_name),
+        ('e.event_type', event_type),
+        ('e.event_source', event_source),
+    ):
+        if value:
+            conditions.append(f"{column} = {placeholder}")
+            params.append(value)
+    if start_date:
+        conditions.append(f"e.timestamp >= {placeholder}")
+        params.append(_parse_timestamp(start_date))
+    if end_date:
+        conditions.append(f"e.timestamp <= {placeholder}")
+        params.append(_parse_timestamp(end_date))
+    return ("WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def iter_events_export(
+    computer_name: Optional[str] = None,
+    event_type: Optional[str] = None,
+    event_source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[list[tuple]]:
+    """조건에 맞는 이벤트를 시간순으로 batch_size건씩 생성 (EXPORT_COLUMNS 순서 튜플)
+
+    하나의 커서를 끝까지 읽으므로 전체가 같은 스냅샷이며, 메모리는 배치 하나 크기로 유지된다.
+    StreamingResponse가 다른 스레드에서 이어 읽으므로 check_same_thread를 끈 전용 커넥션을 사용한다.
+    """
+    where, params = _export_filters(computer_name, event_type, event_source, start_date, end_date)
+    # 저장된 타임스탬프가 ISO('T') 문자열이므로 비교 파라미터도 같은 형식으로 전달
+    params = [p.isoformat() if isinstance(p, datetime) else p for p in params]
+
+    conn = get_connection(check_same_thread=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT e.id, e.timestamp, e.computer_name, c.display_name, e.event_type,
+                   e.event_detail, e.event_source, e.event_record_id, e.created_at
+            FROM events e
+            LEFT JOIN computers c ON c.hostname = e.computer_name
+            {where}
+            ORDER BY e.timestamp, e.id
+        """, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+
 def get_computers() -> list[dict]:
     conn = get_connection()
     cursor = conn.cursor()
+    result = _select_computers(cursor)
+    conn.close()
+    return result
+
 
+def _select_computers(cursor) -> list[dict]:
     # 이벤트 기반 정보 + 하트비트 정보 + 표시 이름 조인
     cursor.execute("""
         SELECT
@@ -294,7 +929,8 @@ def get_computers() -> list[dict]:
             COUNT(*) as total_events,
             h.last_seen,
             h.ip_address,
-            c.display_name
+            c.display_name,
+            (julianday('now', '+9 hours') - julianday(h.last_seen)) * 86400 as seconds_ago
         FROM events e
         LEFT JOIN heartbeats h ON e.computer_name = h.computer_name
         LEFT JOIN computers c ON e.computer_name = c.hostname
@@ -307,15 +943,13 @@ def get_computers() -> list[dict]:
     result = []
     for row in rows:
         data = dict(row)
+        seconds_ago = data.pop('seconds_ago')
         last_seen = data.get('last_seen')
 
         # 하트비트 기반 온라인 상태 (ONLINE_THRESHOLD_SECONDS 이내 하트비트 있으면 온라인)
         if last_seen:
-            cursor.execute("""
-                SELECT (julianday('now', '+9 hours') - julianday(?)) * 86400 as seconds_ago
-            """, (last_seen,))
-            result_check = cursor.fetchone()
-            seconds_ago = result_check['seconds_ago'] if result_check else 9999
+            if seconds_ago is None:
+                seconds_ago = 9999
 
             data['status'] = 'online' if seconds_ago < ONLINE_THRESHOLD_SECONDS else 'offline'
             data['seconds_ago'] = int(seconds_ago)
@@ -333,20 +967,83 @@ def get_computers() -> list[dict]:
 
         result.append(data)
 
+    return result
+
+
+def get_presence() -> list[dict]:
+    """하트비트 기반 온라인 상태만 조회 (실시간 푸시의 상태 전환 감지용, 이벤트 집계 없음)
+
+    Returns:
+        [{computer_name, last_seen, ip_address, status, seconds_ago}, ...]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            computer_name,
+            last_seen,
+            ip_address,
+            (julianday('now', '+9 hours') - julianday(last_seen)) * 86400 as seconds_ago
+        FROM heartbeats
+    """)
+    rows = cursor.fetchall()
     conn.close()
+
+    result = []
+    for row in rows:
+        data = dict(row)
+        seconds_ago = data['seconds_ago'] if data['seconds_ago'] is not None else 9999
+        data['status'] = 'online' if seconds_ago < ONLINE_THRESHOLD_SECONDS else 'offline'
+        data['seconds_ago'] = int(seconds_ago)
+        result.append(data)
     return result
 
 
+def heartbeat_changes_listing(row, previous: Optional[datetime], now: datetime,
+                              ip_address: Optional[str], agent_version: Optional[str]) -> bool:
+    """하트비트가 목록에 보이는 값을 바꾸는지 (새 PC, 오프라인→온라인, IP/버전 변경)
+
+    온라인 PC의 주기적 하트비트는 last_seen만 바뀌므로 데이터 버전을 올리지 않는다
+    (온라인→오프라인과 seconds_ago는 시간 경과로 바뀌므로 ETag 시간 구간이 반영).
+    """
+    if row is None or previous is None:
+        return True
+    if not timedelta(0) <= now - previous < timedelta(seconds=ONLINE_THRESHOLD_SECONDS):
+        return True
+    return row['ip_address'] != ip_address or row['agent_version'] != agent_version
+
+
 def update_heartbeat(computer_name: str, ip_address: Optional[str] = None, agent_version: Optional[str] = None):
-    """하트비트 업데이트 (온라인 상태 갱신)"""
+    """하트비트 업데이트 (온라인 상태 갱신)
+
+    점유 비트맵에도 반영: 직전 하트비트가 ONLINE_THRESHOLD_SECONDS 이내면
+    그 사이 구간 전체를, 아니면 현재 1분만 표시한다.
+    직전 하트비트와 같은 분이면 이미 표시되어 있으므로 비트맵은 건드리지 않는다.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
+    cursor.execute(
+        "SELECT last_seen, ip_address, agent_version FROM heartbeats WHERE computer_name = ?",
+        (computer_name,)
+    )
+    row = cursor.fetchone()
+    previous = _parse_timestamp(row['last_seen']) if row else None
+
     cursor.execute("""
         INSERT OR REPLACE INTO heartbeats (computer_name, last_seen, ip_address, agent_version)
         VALUES (?, datetime('now', '+9 hours'), ?, ?)
     """, (computer_name, ip_address, agent_version))
 
+    now = _now_kst()
+    if previous is None or not occupancy.same_minute(previous, now):
+        if previous and timedelta(0) <= now - previous < timedelta(seconds=ONLINE_THRESHOLD_SECONDS):
+            _occupancy_mark(cursor, computer_name, previous, now)
+        else:
+            _occupancy_mark(cursor, computer_name, now)
+
+    if heartbeat_changes_listing(row, previous, now, ip_address, agent_version):
+        bump_data_version(cursor, (computer_name,), events=False)
     conn.commit()
     conn.close()
 
@@ -384,23 +1081,32 @@ def register_computer(computer_name: str, ip_address: Optional[str] = None):
             INSERT INTO events (computer_name, event_type, timestamp)
             VALUES (?, 'install', datetime('now', '+9 hours'))
         """, (computer_name,))
+        install_id = cursor.lastrowid
+        cursor.execute("SELECT timestamp FROM events WHERE id = ?", (install_id,))
+        _record_change(cursor, CHANGE_EVENT_INSERT, computer_name, _event_change_data(
+            install_id, 'install', cursor.fetchone()['timestamp'], event_source='realtime'
+        ))
 
+    bump_data_version(cursor, (computer_name,))
     conn.commit()
     conn.close()
 
 
+_HISTORY_SQL = """
+    SELECT {select} FROM events
+    WHERE computer_name = ?
+    AND event_type IN ('boot', 'shutdown')
+    AND timestamp >= datetime('now', '+9 hours', ?)
+    ORDER BY timestamp DESC
+"""
+
+
 def get_computer_history(computer_name: str, days: int = 30) -> list[dict]:
     """특정 컴퓨터의 boot/shutdown 이벤트 이력 조회"""
     conn = get_connection()
     cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT * FROM events
-        WHERE computer_name = ?
-        AND event_type IN ('boot', 'shutdown')
-        AND timestamp >= datetime('now', '+9 hours', ?)
-        ORDER BY timestamp DESC
-    """, (computer_name, f'-{days} days'))
+    cursor.execute(_HISTORY_SQL.format(select="*"), (computer_name, f'-{days} days'))
 
     rows = cursor.fetchall()
     conn.close()
@@ -408,6 +1114,19 @@ def get_computer_history(computer_name: str, days: int = 30) -> list[dict]:
     return [dict(row) for row in rows]
 
 
+def get_computer_history_json(computer_name: str, days: int = 30) -> tuple[bytes, int]:
+    """get_computer_history와 같은 결과를 (JSON 배열 바이트, 행 수)로 반환"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        _HISTORY_SQL.format(select=_json_object_sql(EVENT_JSON_COLUMNS)),
+        (computer_name, f'-{days} days')
+    )
+    result = _json_array(cursor)
+    conn.close()
+    return result
+
+
 def get_daily_stats(computer_name: Optional[str] = None, days: int = 7) -> list[dict]:
     conn = get_connection()
     cursor = conn.cursor()
@@ -647,13 +1366,15 @@ def delete_session(session_id: str):
     conn.close()
 
 
-def cleanup_expired_sessions():
-    """만료된 세션 정리"""
+def cleanup_expired_sessions() -> int:
+    """만료된 세션 정리 (삭제한 세션 수)"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("DELETE FROM sessions WHERE expires_at <= datetime('now', '+9 hours')")
+    deleted = cursor.rowcount
     conn.commit()
     conn.close()
+    return deleted
 
 
 # ==================== 컴퓨터 이름 관련 함수 ====================
@@ -676,6 +1397,8 @@ def set_computer_display_name(hostname: str, display_name: str):
         INSERT OR REPLACE INTO computers (hostname, display_name, updated_at)
         VALUES (?, ?, datetime('now', '+9 hours'))
     """, (hostname, display_name))
+    _record_change(cursor, CHANGE_RENAME, hostname, {'display_name': display_name})
+    bump_data_version(cursor, (hostname,))
     conn.commit()
     conn.close()
 
@@ -695,6 +1418,12 @@ def delete_computer(hostname: str) -> int:
     # 컴퓨터 정보 삭제
     cursor.execute("DELETE FROM computers WHERE hostname = ?", (hostname,))
 
+    # 점유 비트맵 삭제
+    cursor.execute("DELETE FROM occupancy WHERE computer_name = ?", (hostname,))
+
+    _record_change(cursor, CHANGE_DELETE, hostname, {'deleted_events': deleted_events})
+    bump_data_version(cursor, (hostname,))
+
     conn.commit()
     conn.close()
     return deleted_events
@@ -721,6 +1450,15 @@ def delete_all_computers() -> dict:
     # 모든 컴퓨터 정보 삭제
     cursor.execute("DELETE FROM computers")
 
+    # 모든 점유 비트맵 삭제
+    cursor.execute("DELETE FROM occupancy")
+
+    _record_change(cursor, CHANGE_DELETE_ALL, None, {
+        'deleted_computers': deleted_computers,
+        'deleted_events': deleted_events
+    })
+    bump_data_version(cursor)
+
     conn.commit()
     conn.close()
 
@@ -799,41 +1537,63 @@ def get_shutdown_timeline(days: int = 7) -> dict:
     }
 
 
+# 일별 요약 (표시 이름 포함). ISO 형식 타임스탬프 처리를 위해 strftime 사용,
+# 서브쿼리로 마지막 종료 이벤트의 event_detail 조회. {where}: 기간 조건
+_DAILY_SUMMARY_TEMPLATE = """
+    SELECT
+        strftime('%Y-%m-%d', e.timestamp) as date,
+        e.computer_name,
+        MIN(CASE WHEN e.event_type = 'boot' THEN strftime('%H:%M:%S', e.timestamp) END) as first_boot,
+        MAX(CASE WHEN e.event_type = 'shutdown' THEN strftime('%H:%M:%S', e.timestamp) END) as last_shutdown,
+        (
+            SELECT e2.event_detail
+            FROM events e2
+            WHERE e2.computer_name = e.computer_name
+            AND strftime('%Y-%m-%d', e2.timestamp) = strftime('%Y-%m-%d', e.timestamp)
+            AND e2.event_type = 'shutdown'
+            ORDER BY e2.timestamp DESC
+            LIMIT 1
+        ) as shutdown_detail,
+        c.display_name
+    FROM events e
+    LEFT JOIN computers c ON c.hostname = e.computer_name
+    WHERE {where}
+    AND e.event_type IN ('boot', 'shutdown')
+    GROUP BY strftime('%Y-%m-%d', e.timestamp), e.computer_name
+    ORDER BY date DESC, e.computer_name
+"""
+# 최근 N일 (파라미터: '-N days')
+_DAILY_SUMMARY_SQL = _DAILY_SUMMARY_TEMPLATE.format(
+    where="e.timestamp >= strftime('%Y-%m-%d', datetime('now', '+9 hours', ?))"
+)
+# 특정 날짜 하루 (파라미터: 'YYYY-MM-DD', 'YYYY-MM-DD')
+_DATE_SUMMARY_SQL = _DAILY_SUMMARY_TEMPLATE.format(
+    where="e.timestamp >= ? AND e.timestamp < date(?, '+1 day')"
+)
+DAILY_SUMMARY_JSON_COLUMNS = ('date', 'computer_name', 'first_boot', 'last_shutdown', 'shutdown_detail', 'display_name')
+
+
 def get_daily_summary(days: int = 7) -> list[dict]:
     """하루 단위 시작/종료 요약 조회"""
     conn = get_connection()
     cursor = conn.cursor()
-    # ISO 형식 타임스탬프 처리를 위해 strftime 사용
-    # 서브쿼리로 마지막 종료 이벤트의 event_detail 조회
-    cursor.execute("""
-        SELECT
-            strftime('%Y-%m-%d', e.timestamp) as date,
-            e.computer_name,
-            MIN(CASE WHEN e.event_type = 'boot' THEN strftime('%H:%M:%S', e.timestamp) END) as first_boot,
-            MAX(CASE WHEN e.event_type = 'shutdown' THEN strftime('%H:%M:%S', e.timestamp) END) as last_shutdown,
-            (
-                SELECT e2.event_detail
-                FROM events e2
-                WHERE e2.computer_name = e.computer_name
-                AND strftime('%Y-%m-%d', e2.timestamp) = strftime('%Y-%m-%d', e.timestamp)
-                AND e2.event_type = 'shutdown'
-                ORDER BY e2.timestamp DESC
-                LIMIT 1
-            ) as shutdown_detail
-        FROM events e
-        WHERE e.timestamp >= strftime('%Y-%m-%d', datetime('now', '+9 hours', ?))
-        AND e.event_type IN ('boot', 'shutdown')
-        GROUP BY strftime('%Y-%m-%d', e.timestamp), e.computer_name
-        ORDER BY date DESC, e.computer_name
-    """, (f'-{days} days',))
+    cursor.execute(_DAILY_SUMMARY_SQL, (f'-{days} days',))
     rows = cursor.fetchall()
     conn.close()
-    display_names = get_all_display_names()
-    result = []
-    for row in rows:
-        data = dict(row)
-        data['display_name'] = display_names.get(data['computer_name'])
-        result.append(data)
+    return [dict(row) for row in rows]
+
+
+def get_daily_summary_json(days: int = 7) -> tuple[bytes, int]:
+    """get_daily_summary와 같은 결과를 (JSON 배열 바이트, 행 수)로 반환"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT {_json_object_sql(DAILY_SUMMARY_JSON_COLUMNS)}
+        FROM ({_DAILY_SUMMARY_SQL})
+        ORDER BY date DESC, computer_name
+    """, (f'-{days} days',))
+    result = _json_array(cursor)
+    conn.close()
     return result
 
 
@@ -861,6 +1621,77 @@ def get_computer_daily_summary(computer_name: str, days: int = 30) -> list[dict]
     return [dict(row) for row in rows]
 
 
+# ==================== 대시보드 스냅샷 ====================
+
+def summary_cutoff(days: int) -> str:
+    """최근 N일 요약의 시작 날짜 (daily-summary?days=N 과 같은 기준: KST 오늘 - N일)"""
+    return (_now_kst() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def build_chart_series(summary: list[dict], computers: list[dict], days: int = DASHBOARD_CHART_DAYS) -> dict:
+    """사용 현황 그래프 시리즈 (최근 days일 중 기록이 있는 날짜, 컴퓨터 목록 순서)
+
+    series[i].first_boot / last_shutdown은 dates와 같은 순서의 'HH:MM:SS' 또는 None.
+    """
+    cutoff = summary_cutoff(days)
+    rows = [row for row in summary if row['date'] >= cutoff]
+    dates = sorted({row['date'] for row in rows})
+    index = {(row['date'], row['computer_name']): row for row in rows}
+
+    series = []
+    for pc in computers:
+        name = pc['computer_name']
+        points = [index.get((day, name)) for day in dates]
+        series.append({
+            'computer_name': name,
+            'display_name': pc.get('display_name'),
+            'first_boot': [point['first_boot'] if point else None for point in points],
+            'last_shutdown': [point['last_shutdown'] if point else None for point in points],
+        })
+    return {'days': days, 'dates': dates, 'series': series}
+
+
+def get_dashboard_snapshot(date: str, days: int = 7, timeline_days: int = 7,
+                           timeline_limit: int = 100) -> dict:
+    """대시보드 전체 화면 데이터 (하나의 읽기 트랜잭션)
+
+    컴퓨터 목록, 선택 날짜 요약, 최근 N일 요약, 최근 타임라인, 사용 현황 그래프를
+    같은 스냅샷에서 조회하므로 패널 간 데이터가 어긋나지 않는다.
+
+    Args:
+        date: 선택 날짜 (YYYY-MM-DD, KST)
+        days: 일별 요약 기간
+        timeline_days / timeline_limit: 타임라인 기간 / 최대 건수
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # WAL 모드: 첫 SELECT 시점의 스냅샷이 트랜잭션 끝까지 유지됨
+        cursor.execute("BEGIN")
+        computers = _select_computers(cursor)
+        # 그래프 기간까지 한 번에 조회 후 요약 기간은 파이썬에서 잘라냄
+        cursor.execute(_DAILY_SUMMARY_SQL, (f'-{max(days, DASHBOARD_CHART_DAYS)} days',))
+        summary_rows = [dict(row) for row in cursor.fetchall()]
+        cursor.execute(_DATE_SUMMARY_SQL, (date, date))
+        date_summary = [dict(row) for row in cursor.fetchall()]
+        timeline, timeline_next_cursor = _select_events_timeline(cursor, timeline_days, timeline_limit)
+        conn.commit()
+    finally:
+        conn.close()
+
+    cutoff = summary_cutoff(days)
+    return {
+        'date': date,
+        'days': days,
+        'computers': computers,
+        'date_summary': date_summary,
+        'summary': [row for row in summary_rows if row['date'] >= cutoff],
+        'timeline': timeline,
+        'timeline_next_cursor': timeline_next_cursor,
+        'chart': build_chart_series(summary_rows, computers),
+    }
+
+
 # ==================== 재집계 요청 관리 ====================
 
 def request_resync(computer_name: str, days: int) -> datetime:
@@ -910,6 +1741,34 @@ def get_pending_resync(computer_name: str) -> Optional[datetime]:
     return datetime.fromisoformat(row['since'])
 
 
+def get_sync_state(computer_name: str) -> dict:
+    """Agent 동기화 상태 조회 (하트비트 응답용, 단일 쿼리)
+
+    Returns:
+        {last_boot, last_shutdown, last_event_record_id, resync_since}
+        - last_boot/last_shutdown: 서버에 기록된 마지막 이벤트 시각 (ISO 문자열 또는 None)
+        - last_event_record_id: 서버가 받은 가장 큰 Windows 이벤트 로그 레코드 ID
+        - resync_since: 처리되지 않은 재집계 요청 시작 시각 (없으면 None)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            (SELECT MAX(timestamp) FROM events
+             WHERE computer_name = :name AND event_type = 'boot') as last_boot,
+            (SELECT MAX(timestamp) FROM events
+             WHERE computer_name = :name AND event_type = 'shutdown') as last_shutdown,
+            (SELECT MAX(event_record_id) FROM events
+             WHERE computer_name = :name AND event_record_id IS NOT NULL) as last_event_record_id,
+            (SELECT since FROM resync_requests
+             WHERE computer_name = :name AND consumed_at IS NULL
+             LIMIT 1) as resync_since
+    """, {'name': computer_name})
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row)
+
+
 def ack_resync(computer_name: str) -> bool:
     """Agent가 재집계 완료를 알림"""
     conn = get_connection()
@@ -925,11 +1784,26 @@ def ack_resync(computer_name: str) -> bool:
     return updated
 
 
-def get_all_events_timeline(days: int = 7, limit: int = 100) -> list[dict]:
-    """전체 컴퓨터의 이벤트를 시간순으로 조회"""
+def get_all_events_timeline(days: int = 7, limit: int = 100,
+                            cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """전체 컴퓨터의 이벤트를 시간순으로 조회
+
+    Returns:
+        (이벤트 목록, 다음 페이지 커서 또는 None)
+    """
+    after = decode_cursor(cursor) if cursor else None
     conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    db_cursor = conn.cursor()
+    result = _select_events_timeline(db_cursor, days, limit, after)
+    conn.close()
+    return result
+
+
+def _select_events_timeline(cursor, days: int, limit: int,
+                            after: Optional[tuple[str, int]] = None) -> tuple[list[dict], Optional[str]]:
+    limit = page_limit(limit)
+    keyset = "AND (e.timestamp, e.id) < (?, ?)" if after else ""
+    cursor.execute(f"""
         SELECT
             e.id,
             e.computer_name,
@@ -942,12 +1816,12 @@ def get_all_events_timeline(days: int = 7, limit: int = 100) -> list[dict]:
         LEFT JOIN computers c ON e.computer_name = c.hostname
         WHERE e.timestamp >= DATE('now', '+9 hours', ?)
         AND e.event_type IN ('boot', 'shutdown')
-        ORDER BY e.timestamp DESC
+        {keyset}
+        ORDER BY e.timestamp DESC, e.id DESC
         LIMIT ?
-    """, (f'-{days} days', limit))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    """, (f'-{days} days', *(after or ()), limit + 1))
+    rows = [dict(row) for row in cursor.fetchall()]
+    return rows[:limit], _next_cursor(rows, limit)
 
 
 def get_last_event(computer_name: str, event_type: str) -> Optional[dict]:
@@ -990,7 +1864,12 @@ def get_computers_needing_shutdown_recovery() -> list[dict]:
     """
     conn = get_connection()
     cursor = conn.cursor()
+    result = _select_recovery_targets(cursor)
+    conn.close()
+    return result
+
 
+def _select_recovery_targets(cursor) -> list[dict]:
     # NOT EXISTS 조건 추가로 중복 삽입 방지
     cursor.execute("""
         SELECT
@@ -1019,50 +1898,310 @@ def get_computers_needing_shutdown_recovery() -> list[dict]:
             AND datetime(h.last_seen) >= datetime(last_boot)
     """, (ONLINE_THRESHOLD_SECONDS,))
 
-    rows = cursor.fetchall()
-    conn.close()
-
-    return [dict(row) for row in rows]
+    return [dict(row) for row in cursor.fetchall()]
 
 
 def check_and_recover_offline_shutdowns() -> list[dict]:
     """오프라인 전환된 컴퓨터들의 종료 이벤트 자동 복구
 
     메인 로직:
-    1. get_computers_needing_shutdown_recovery() 호출
+    1. 쓰기 잠금(BEGIN IMMEDIATE) 후 복구 대상 조회
     2. 각 컴퓨터에 대해 shutdown 이벤트 생성 (last_seen 시간 사용)
     3. 복구 결과 반환
 
+    대상 조회와 삽입이 한 쓰기 트랜잭션이므로 여러 프로세스(워커)가 동시에 호출해도
+    뒤 호출은 앞 호출의 커밋 이후 상태로 다시 조회하여 같은 복구 이벤트를 중복 삽입하지 않는다.
+
     Returns:
         복구된 이벤트 목록 [{computer_name, shutdown_time}, ...]
     """
-    computers = get_computers_needing_shutdown_recovery()
-
-    if not computers:
+    # 잠금 없이 먼저 확인 (대부분의 호출은 대상 없음)
+    if not get_computers_needing_shutdown_recovery():
         return []
 
     recovered = []
     conn = get_connection()
     cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        for comp in _select_recovery_targets(cursor):
+            computer_name = comp['computer_name']
+            last_seen = comp['last_seen']
+
+            # shutdown 이벤트 삽입 (last_seen 근사값, event_record_id 없음)
+            # event_source='auto_recovery'로 태깅하여 이후 재집계 시
+            # 실제 이벤트 로그 기반의 정확한 shutdown으로 덮어써질 수 있도록 함
+            cursor.execute("""
+                INSERT INTO events (computer_name, event_type, timestamp, event_source)
+                VALUES (?, 'shutdown', ?, 'auto_recovery')
+            """, (computer_name, last_seen))
+            _record_change(cursor, CHANGE_RECOVERY_INSERT, computer_name, _event_change_data(
+                cursor.lastrowid, 'shutdown', last_seen, event_source='auto_recovery'
+            ))
+            _occupancy_mark_event(cursor, computer_name, 'shutdown', last_seen)
+
+            recovered.append({
+                'computer_name': computer_name,
+                'shutdown_time': last_seen
+            })
+        if recovered:
+            bump_data_version(cursor, [item['computer_name'] for item in recovered])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if recovered:
+        metrics.RECOVERY_INSERTS.inc(amount=len(recovered))
+
+    return recovered
 
-    for comp in computers:
-        computer_name = comp['computer_name']
-        last_seen = comp['last_seen']
 
-        # shutdown 이벤트 삽입 (last_seen 근사값, event_record_id 없음)
-        # event_source='auto_recovery'로 태깅하여 이후 재집계 시
-        # 실제 이벤트 로그 기반의 정확한 shutdown으로 덮어써질 수 있도록 함
+# ==================== 리더 선출 (lease) ====================
+
+def try_acquire_lease(name: str, holder: str, ttl_seconds: float) -> bool:
+    """lease 획득 또는 갱신 (원자적 upsert)
+
+    비어 있거나, 만료되었거나, 이미 holder 소유면 만료 시각을 now + ttl로 설정하고 True.
+    다른 프로세스가 유효한 lease를 갖고 있으면 False.
+    """
+    now = time.time()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO events (computer_name, event_type, timestamp, event_source)
-            VALUES (?, 'shutdown', ?, 'auto_recovery')
-        """, (computer_name, last_seen))
+            INSERT INTO leases (name, holder, expires_at, acquired_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                holder = excluded.holder,
+                expires_at = excluded.expires_at,
+                acquired_at = CASE WHEN leases.holder = excluded.holder
+                                   THEN leases.acquired_at ELSE excluded.acquired_at END
+            WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+        """, (name, holder, now + ttl_seconds, now, now))
+        acquired = cursor.rowcount == 1
+        conn.commit()
+    finally:
+        conn.close()
+    return acquired
 
-        recovered.append({
-            'computer_name': computer_name,
-            'shutdown_time': last_seen
-        })
 
-    conn.commit()
+def release_lease(name: str, holder: str) -> bool:
+    """holder 소유 lease 반납 (다른 프로세스가 즉시 획득 가능)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+        released = cursor.rowcount > 0
+        conn.commit()
+    finally:
+        conn.close()
+    return released
+
+
+def get_lease(name: str) -> Optional[dict]:
+    """현재 lease 상태 {name, holder, expires_at, acquired_at} (epoch 초)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, holder, expires_at, acquired_at FROM leases WHERE name = ?", (name,))
+    row = cursor.fetchone()
     conn.close()
+    return dict(row) if row else None
 
-    return recovered
+
+# ==================== Agent 업데이트 다운로드 슬롯 ====================
+
+# 사용 중 슬롯: 만료 전이고, 아직 그 버전으로 하트비트가 오지 않음 (업데이트를 마치면 자동 반납)
+_ACTIVE_SLOT_SQL = """
+    s.expires_at >= ? AND NOT EXISTS (
+        SELECT 1 FROM heartbeats h WHERE h.computer_name = s.computer_name AND h.agent_version = s.version
+    )
+"""
+
+
+def acquire_download_slot(computer_name: str, version: str, max_slots: int,
+                          ttl_seconds: float) -> tuple[bool, float, Optional[str]]:
+    """version 다운로드 슬롯 획득 (이미 가진 유효 슬롯이면 그대로 유지)
+
+    사용 중 슬롯이 max_slots개 미만일 때만 새로 내준다 (수 확인과 삽입이 한 문장).
+    슬롯마다 추측할 수 없는 토큰을 발급하며, 다운로드 요청은 이 토큰으로 슬롯을 증명한다.
+
+    Returns:
+        (획득 여부, 획득 시 슬롯 만료까지 초 / 실패 시 가장 먼저 만료되는 슬롯까지 초, 획득 시 토큰)
+    """
+    now = time.time()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            INSERT INTO download_slots (computer_name, version, token, granted_at, expires_at)
+            SELECT ?, ?, ?, ?, ?
+            WHERE (SELECT COUNT(*) FROM download_slots s
+                   WHERE {_ACTIVE_SLOT_SQL} AND s.computer_name != ?) < ?
+            ON CONFLICT(computer_name) DO UPDATE SET
+                version = excluded.version,
+                token = excluded.token,
+                granted_at = excluded.granted_at,
+                expires_at = excluded.expires_at
+            WHERE download_slots.version != excluded.version OR download_slots.expires_at < ?
+        """, (computer_name, version, secrets.token_urlsafe(16), now, now + ttl_seconds,
+              now, computer_name, max_slots, now))
+        conn.commit()
+
+        cursor.execute(
+            "SELECT token, expires_at FROM download_slots WHERE computer_name = ? AND version = ? AND expires_at >= ?",
+            (computer_name, version, now)
+        )
+        row = cursor.fetchone()
+        if row:
+            return True, row['expires_at'] - now, row['token']
+        cursor.execute(f"SELECT MIN(s.expires_at) as next_at FROM download_slots s WHERE {_ACTIVE_SLOT_SQL}", (now,))
+        next_at = cursor.fetchone()['next_at']
+        return False, max(0.0, (next_at or now) - now), None
+    finally:
+        conn.close()
+
+
+def get_download_slot(token: str) -> Optional[dict]:
+    """토큰의 사용 중 다운로드 슬롯 {computer_name, version, expires_at} (없거나 만료/반납이면 None)"""
+    conn = get_connection()
+    try:
+        row = conn.execute(f"""
+            SELECT s.computer_name, s.version, s.expires_at FROM download_slots s
+            WHERE s.token = ? AND {_ACTIVE_SLOT_SQL}
+        """, (token, time.time())).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def get_rollout_progress() -> dict:
+    """Agent 버전별 PC 수 (하트비트 기준, 버전 미보고는 '') + 사용 중 다운로드 슬롯"""
+    now = time.time()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(agent_version, '') as agent_version, COUNT(*) as cnt
+            FROM heartbeats GROUP BY COALESCE(agent_version, '')
+        """)
+        versions = {row['agent_version']: row['cnt'] for row in cursor.fetchall()}
+        cursor.execute(f"""
+            SELECT s.computer_name, s.version, s.granted_at, s.expires_at
+            FROM download_slots s WHERE {_ACTIVE_SLOT_SQL}
+            ORDER BY s.granted_at
+        """, (now,))
+        slots = [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    return {"agent_versions": versions, "slots": slots}
+
+
+# ==================== 점유 비트맵 조회 ====================
+
+def get_occupancy_bitmaps(day: str) -> list[tuple[str, bytes]]:
+    """특정 KST 날짜의 (computer_name, bits) 목록 (events 테이블 미사용)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT computer_name, bits FROM occupancy
+        WHERE day = ?
+        ORDER BY computer_name
+    """, (day,))
+    rows = cursor.fetchall()
+    conn.close()
+    return [(row['computer_name'], bytes(row['bits'])) for row in rows]
+
+
+def get_occupancy_at(day: str, minute: int) -> list[str]:
+    """특정 날짜/분에 켜져 있던 컴퓨터 목록"""
+    return [
+        computer_name
+        for computer_name, bits in get_occupancy_bitmaps(day)
+        if occupancy.is_set(bits, minute)
+    ]
+
+
+def get_occupancy_curve(day: str, step: int = 10) -> dict:
+    """특정 날짜의 전체 점유 곡선 + 컴퓨터별 켜져 있던 시간(분)
+
+    Returns:
+        {'curve': [{time, count}, ...], 'computers': [{computer_name, minutes}, ...]}
+    """
+    bitmaps = get_occupancy_bitmaps(day)
+    counts = occupancy.sum_bitmaps([bits for _, bits in bitmaps])
+    return {
+        'curve': occupancy.bucket_curve(counts, step),
+        'peak': max(counts) if counts else 0,
+        'computers': [
+            {'computer_name': computer_name, 'minutes': occupancy.popcount(bits)}
+            for computer_name, bits in bitmaps
+        ]
+    }
+
+
+# ==================== 변경 로그 조회 ====================
+
+def get_changes(after: int = 0, limit: int = 500) -> dict:
+    """seq > after 인 변경을 오름차순으로 조회 (증분 소비자용)
+
+    Returns:
+        {
+            'changes': [{seq, op, computer_name, data, created_at}, ...],
+            'last_seq': 이번 배치의 마지막 seq (없으면 after) → 다음 요청의 after,
+            'head_seq': 현재 최신 seq,
+            'has_more': 추가 변경 존재 여부,
+            'reset_required': after 이후 변경 일부가 보존 기간 정리로 삭제됨 → 전체 재동기화 필요
+        }
+    """
+    limit = max(1, min(limit, CHANGE_BATCH_MAX))
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(seq) as min_seq, MAX(seq) as max_seq FROM changes")
+    bounds = cursor.fetchone()
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+    row = cursor.fetchone()
+    head_seq = row['seq'] if row else 0
+
+    cursor.execute("""
+        SELECT seq, op, computer_name, data, created_at FROM changes
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+    """, (after, limit))
+    rows = cursor.fetchall()
+    conn.close()
+
+    changes = []
+    for row in rows:
+        change = dict(row)
+        change['data'] = json.loads(change['data']) if change['data'] else None
+        changes.append(change)
+
+    # 가장 오래 남은 seq보다 앞선 구간을 요청했는데 그 사이가 정리되었으면 재동기화 필요
+    min_seq = bounds['min_seq'] if bounds['min_seq'] is not None else head_seq + 1
+    last_seq = changes[-1]['seq'] if changes else max(after, 0)
+
+    return {
+        'changes': changes,
+        'last_seq': last_seq,
+        'head_seq': head_seq,
+        'has_more': bounds['max_seq'] is not None and last_seq < bounds['max_seq'],
+        'reset_required': after < min_seq - 1
+    }
+
+
+def prune_changes(retention_days: int = CHANGE_RETENTION_DAYS) -> int:
+    """보존 기간이 지난 변경 로그 삭제 (seq는 재사용되지 않음)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE FROM changes WHERE created_at < datetime('now', ?)",
+        (f'-{retention_days} days',)
+    )
+    deleted = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return deleted
@@ -0,0 +1,49 @@
+"""이벤트 내보내기 스트림 포맷 (NDJSON / CSV)
+
+StorageBackend.iter_events_export가 생성하는 행 배치를 받아 배치마다 bytes 한 덩어리를 만든다.
+전체 결과를 메모리에 모으지 않으므로 기간 크기와 무관하게 메모리 사용량이 일정하다.
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator
+
+import responses
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+# Excel에서 한글 표시 이름이 깨지지 않도록 CSV 앞에 붙이는 UTF-8 BOM
+CSV_BOM = "﻿"
+
+
+def iter_ndjson(batches: Iterable[list[tuple]], columns: tuple) -> Iterator[bytes]:
+    """한 줄에 이벤트 하나 (JSON 객체)"""
+    for rows in batches:
+        yield b"".join(responses.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def iter_csv(batches: Iterable[list[tuple]], columns: tuple) -> Iterator[bytes]:
+    """헤더 + 이벤트 행 (None은 빈 칸)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+
+    buffer.write(CSV_BOM)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # 결과가 없어도 헤더는 전송
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream(fmt: str, batches: Iterable[list[tuple]], columns: tuple) -> Iterator[bytes]:
+    if fmt == "csv":
+        return iter_csv(batches, columns)
+    return iter_ndjson(batches, columns)
@@ -0,0 +1,91 @@
+"""다중 워커 주기 작업 리더 선출 (DB lease)
+
+uvicorn --workers N / gunicorn처럼 프로세스가 여러 개일 때 주기 작업(종료 이벤트 자동 복구,
+변경 로그 정리 등)은 한 프로세스만 실행해야 한다. 각 프로세스가 RENEW_INTERVAL_SECONDS마다
+leases 테이블의 같은 행을 획득/갱신하려 시도하고, 성공한 프로세스만 리더가 된다.
+
+- 리더가 죽거나 멈추면 lease가 LEASE_TTL_SECONDS 뒤 만료되어 다른 프로세스가 다음 시도에서 인계
+  → 인계까지 최대 LEASE_TTL_SECONDS + RENEW_INTERVAL_SECONDS
+- is_leader는 마지막 갱신 요청 시작 시점 + TTL까지만 True (DB 오류/지연 시 스스로 물러남)
+- 정상 종료 시 lease를 반납하여 즉시 인계
+"""
+
+import os
+import secrets
+import socket
+import threading
+import time
+from typing import Optional
+
+import metrics
+
+LEASE_NAME = "periodic-jobs"
+LEASE_TTL_SECONDS = 30.0
+RENEW_INTERVAL_SECONDS = 10.0
+
+
+class LeaderElector:
+    """lease 갱신 스레드 + 리더 여부 조회"""
+
+    def __init__(self, backend, name: str = LEASE_NAME, ttl: float = LEASE_TTL_SECONDS,
+                 renew_interval: float = RENEW_INTERVAL_SECONDS):
+        if renew_interval >= ttl:
+            raise ValueError("renew_interval은 ttl보다 짧아야 합니다")
+        self._backend = backend
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self._ttl = ttl
+        self._renew_interval = renew_interval
+        self._valid_until = 0.0  # time.monotonic() 기준
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="leader-elector")
+        self._thread.start()
+
+    def stop(self):
+        """갱신 중지 및 lease 반납"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.is_leader:
+            self._valid_until = 0.0
+            try:
+                self._backend.release_lease(self.name, self.holder)
+                print(f"[Leader] lease 반납: {self.holder}")
+            except Exception as e:
+                print(f"[Leader Error] lease 반납 실패: {e}")
+
+    def renew(self) -> bool:
+        """lease 획득/갱신 1회 (결과에 따라 리더 상태 갱신)"""
+        # DB 왕복 지연만큼 유효 기간을 보수적으로 잡기 위해 요청 전에 시각 기록
+        started = time.monotonic()
+        was_leader = self.is_leader
+        try:
+            with metrics.JOB_DURATION.time("leader_renew"):
+                acquired = self._backend.try_acquire_lease(self.name, self.holder, self._ttl)
+        except Exception as e:
+            metrics.JOB_ERRORS.inc("leader_renew")
+            print(f"[Leader Error] lease 갱신 실패: {e}")
+            acquired = False
+
+        self._valid_until = started + self._ttl if acquired else 0.0
+        if acquired and not was_leader:
+            print(f"[Leader] 리더 획득: {self.holder}")
+        elif was_leader and not acquired:
+            print(f"[Leader] 리더 상실: {self.holder}")
+        return acquired
+
+    def _run(self):
+        while True:
+            self.renew()
+            if self._stop.wait(self._renew_interval):
+                return
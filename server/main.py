@@ -1,6 +1,9 @@
+import hashlib
 import json as json_module
+import math
+import os
 import re
-import threading
+import secrets
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -10,72 +13,140 @@ KST = timezone(timedelta(hours=9))
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException, Response, Request, Depends, Header
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ValidationError, field_validator
 
 # Rate Limiting
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+import admission
+import assets
 import database
+import export
+import leader
+import metrics
+import middleware
+import occupancy
+import profiler
+import querycache
+import ratelimit
+import readiness
+import responses
+import rollout
+import scheduler
+import sqlprofile
+import storage
+import stream
+import tracing
 
 
 AGENT_UPDATES_DIR = Path(__file__).parent / "agent_updates"
 
+# /metrics 접근 토큰 (비우면 인증 없이 공개, 설정 시 Authorization: Bearer <토큰> 필요)
+METRICS_TOKEN = os.environ.get("COMPUTEROFF_METRICS_TOKEN", "")
+
+# 요청 추적 (COMPUTEROFF_TRACE_SAMPLE_RATE / COMPUTEROFF_TRACE_TAIL_MS 설정 시에만 활성)
+tracer = tracing.create_tracer()
+
+# 스토리지 백엔드 (COMPUTEROFF_DB_BACKEND: sqlite/postgres)
+db = storage.get_backend()
+if querycache.TTL_SECONDS > 0:
+    # 대시보드 조회 결과 캐시 (짧은 TTL, 쓰기 시 무효화, 동시 미스 합치기)
+    db = querycache.CachedBackend(db, querycache.QueryCache())
+if tracer.enabled:
+    # 백엔드 메서드 호출마다 db.<메서드> span 기록
+    db = tracing.TracedBackend(db)
+
+# 대시보드 실시간 푸시 (SSE) 브로커 - 프로세스당 폴러 하나
+broker = stream.StreamBroker(db)
+
+# 주기 작업 리더 선출 (다중 워커 중 한 프로세스만 주기 작업 실행)
+elector = leader.LeaderElector(db)
+
+# 과부하 시 우선순위 낮은 요청부터 거절 (Agent 이벤트 > 하트비트 > 대시보드 > 내보내기)
+admission_controller = admission.AdmissionController()
+
+# 관리자 요청 단위 프로파일러 (X-Profile 헤더 / 라우트별 N번째 요청)
+request_profiler = profiler.RequestProfiler()
+
 # ==================== Rate Limiter 설정 ====================
 limiter = Limiter(key_func=get_remote_address)
 
+# Agent 엔드포인트는 NAT 뒤 사무실 PC들이 IP를 공유하므로 computer_name 기준 토큰 버킷 사용
+agent_limiter = ratelimit.AgentRateLimiter()
+
 
-app = FastAPI(title="ComputerOff", description="컴퓨터 온오프 시간 수집 시스템")
+app = FastAPI(
+    title="ComputerOff",
+    description="컴퓨터 온오프 시간 수집 시스템",
+    default_response_class=responses.FastJSONResponse
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
+class InstrumentedRoute(APIRoute):
+    """엔드포인트 함수에 큐 지연 기록 + 프로파일러(요청 지정/롤링 차례일 때만 샘플링)를 걸고,
+    추적 활성 시 route span(입력 검증 + 엔드포인트 + 직렬화) 안에 validate / endpoint span 기록"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = request_profiler.wrap_endpoint(self.dependant.call, self.path)
+        call = admission_controller.wrap_endpoint(call)
+        if tracer.enabled:
+            call = tracing.trace_endpoint(call)
+        self.dependant.call = call
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        return tracing.trace_route_handler(handler) if tracer.enabled else handler
+
+
+# 이후 데코레이터로 등록되는 모든 라우트에 적용
+app.router.route_class = InstrumentedRoute
+
+
 # ==================== 보안 미들웨어 ====================
 
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    """보안 헤더 추가 미들웨어"""
-    response = await call_next(request)
-
-    # 보안 헤더 추가
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "SAMEORIGIN"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-
-    # CSP (Content Security Policy)
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-        "img-src 'self' data:; "
-        "font-src 'self' https://fonts.gstatic.com; "
-        "connect-src 'self' https://cdn.jsdelivr.net; "
-        "frame-ancestors 'self'"
-    )
+# 미들웨어는 모두 순수 ASGI (아래에서 위로 갈수록 바깥쪽, 마지막에 추가한 것이 가장 먼저 실행)
 
-    return response
+# 우선순위 수용 제어 (거절 응답에도 보안 헤더/CORS/메트릭이 적용되도록 가장 안쪽)
+app.add_middleware(admission.AdmissionMiddleware, controller=admission_controller)
 
+# 보안 헤더 + CSP (미리 만든 헤더 튜플을 응답 시작 메시지에 덧붙임)
+app.add_middleware(middleware.SecurityHeadersMiddleware)
 
 # CORS 설정
 app.add_middleware(
-    CORSMiddleware,
+    middleware.CORSMiddleware,
     allow_origins=["*"],  # 프로덕션에서는 특정 도메인으로 제한
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
 
+# 응답 압축 (임계값 이상, brotli 우선 / gzip)
+app.add_middleware(responses.CompressionMiddleware, minimum_size=responses.COMPRESS_MIN_SIZE)
+
+# 요청 수/처리 시간 메트릭 (압축, CORS, 보안 헤더까지 포함해 측정)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# 관리자 프로파일 요청 표시 (X-Profile: 1 또는 __profile=1 + 유효 세션)
+app.add_middleware(profiler.ProfilerMiddleware, validate_session=db.validate_session)
+
+# 요청 루트 span (추적 활성 시, 모든 미들웨어를 포함하도록 가장 바깥)
+if tracer.enabled:
+    app.add_middleware(tracing.TracingMiddleware, tracer=tracer)
+
 
 # ==================== 입력 검증 상수 ====================
 COMPUTER_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9_\-\.]{1,64}$')
 DISPLAY_NAME_MAX_LENGTH = 100
 EVENT_TYPES = ('boot', 'shutdown')
+MAX_BATCH_EVENTS = 500
 
 
 # ==================== 입력 검증 Pydantic 모델 ====================
@@ -133,6 +204,18 @@ class EventCreate(BaseModel):
         return v
 
 
+class EventBatch(BaseModel):
+    # 항목별 검증은 엔드포인트에서 EventCreate로 수행 (잘못된 항목만 개별 오류 처리)
+    events: list[dict]
+
+    @field_validator('events')
+    @classmethod
+    def validate_events(cls, v):
+        if len(v) > MAX_BATCH_EVENTS:
+            raise ValueError(f'events는 최대 {MAX_BATCH_EVENTS}개입니다')
+        return v
+
+
 class EventResponse(BaseModel):
     id: int
     computer_name: str
@@ -155,6 +238,31 @@ class ComputerUpdate(BaseModel):
         return v
 
 
+class SqlProfileUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    slow_ms: Optional[float] = None
+    reset: bool = False
+
+    @field_validator('slow_ms')
+    @classmethod
+    def validate_slow_ms(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('slow_ms는 0 이상이어야 합니다')
+        return v
+
+
+class ProfilerUpdate(BaseModel):
+    route: Optional[str] = None
+    every: int = 0
+
+    @field_validator('every')
+    @classmethod
+    def validate_every(cls, v):
+        if v < 0:
+            raise ValueError('every는 0 이상이어야 합니다')
+        return v
+
+
 class LoginRequest(BaseModel):
     password: str
 
@@ -183,7 +291,7 @@ class PasswordRequest(BaseModel):
 def verify_session(request: Request):
     """세션 검증 (Dashboard 엔드포인트용)"""
     session = request.cookies.get("session")
-    if not session or not database.validate_session(session):
+    if not session or not db.validate_session(session):
         raise HTTPException(status_code=401, detail="로그인이 필요합니다")
     return session
 
@@ -195,45 +303,136 @@ def verify_csrf(request: Request, x_csrf_token: Optional[str] = Header(None, ali
         raise HTTPException(status_code=401, detail="로그인이 필요합니다")
     if not x_csrf_token:
         raise HTTPException(status_code=403, detail="CSRF 토큰이 필요합니다")
-    if not database.validate_csrf_token(session, x_csrf_token):
+    if not db.validate_csrf_token(session, x_csrf_token):
         raise HTTPException(status_code=403, detail="유효하지 않은 CSRF 토큰입니다")
     return x_csrf_token
 
 
+# ==================== 조건부 요청 (ETag) ====================
+
+# /api/computers, /api/occupancy는 온라인 상태가 시간 경과로 바뀌므로 이 간격(초)마다 ETag 갱신
+COMPUTERS_ETAG_SECONDS = 10
+
+
+def _data_etag(request: Request, scope: str = 'events', time_bucket: Optional[int] = None) -> str:
+    """데이터 버전 + 경로/쿼리 + KST 날짜(상대 기간 기준)로 만든 약한 ETag
+
+    데이터 버전이 DB 값이므로 어느 워커가 응답해도 같은 ETag가 나온다.
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    key = "|".join([
+        str(db.get_data_version(scope)),
+        request.url.path,
+        query,
+        datetime.now(KST).strftime('%Y-%m-%d'),
+        str(time_bucket if time_bucket is not None else ''),
+    ])
+    return 'W/"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:24] + '"'
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match가 현재 ETag와 일치하면 304 응답 (DB 조회 없음)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+
+def _set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _limit_agent(request: Request, kind: str, *computer_names: str):
+    """Agent 요청 Rate Limit (IP 상한 + 검증된 computer_name별 버킷), 초과 시 429 + Retry-After"""
+    with tracing.span("ratelimit.agent", kind=kind):
+        retry_after = agent_limiter.check(get_remote_address(request), kind, *computer_names)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 너무 많습니다. 잠시 후 다시 시도하세요",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
 # ==================== 애플리케이션 이벤트 ====================
 
-def _periodic_recovery_loop():
-    """5분마다 오프라인 전환된 컴퓨터의 종료 이벤트 자동 복구"""
-    while True:
-        try:
-            time.sleep(300)  # 5분
-            recovered = database.check_and_recover_offline_shutdowns()
-            if recovered:
-                for r in recovered:
-                    print(f"[Auto-Recovery] {r['computer_name']} shutdown at {r['shutdown_time']}")
-        except Exception as e:
-            print(f"[Auto-Recovery Error] {e}")
-            time.sleep(60)
+def _recover_shutdowns_job() -> str:
+    """오프라인 전환된 컴퓨터의 종료 이벤트 자동 복구"""
+    recovered = db.check_and_recover_offline_shutdowns()
+    for r in recovered:
+        print(f"[Auto-Recovery] {r['computer_name']} shutdown at {r['shutdown_time']}")
+    return f"recovered={len(recovered)}"
+
+
+def _cleanup_sessions_job() -> str:
+    return f"deleted={db.cleanup_expired_sessions()}"
+
+
+def _prune_changes_job() -> str:
+    return f"deleted={db.prune_changes()}"
+
+
+def _optimize_storage_job() -> str:
+    result = db.optimize_storage()
+    return " ".join(f"{key}={value}" for key, value in result.items())
+
+
+# 주기 작업 (리더 프로세스만 실행, 간격은 ±10% 지터)
+job_scheduler = scheduler.Scheduler(elector)
+job_scheduler.register("recovery", _recover_shutdowns_job, 300, timeout=120)
+job_scheduler.register("cleanup_sessions", _cleanup_sessions_job, 3600, timeout=60, initial_delay=60)
+job_scheduler.register("prune_changes", _prune_changes_job, 3600, timeout=120, initial_delay=120)
+if db.name == "sqlite":
+    # WAL 체크포인트(TRUNCATE) + PRAGMA optimize
+    job_scheduler.register("optimize_storage", _optimize_storage_job, 3600, timeout=300, initial_delay=600)
+
+# /api/ready 준비 상태 확인 (DB 왕복, WAL, 작업 정체, 수집 대기, p99)
+readiness_checker = readiness.ReadinessChecker(db, job_scheduler, admission_controller)
+
+
+def _computer_status_counts() -> dict:
+    counts = {('online',): 0, ('offline',): 0}
+    for row in db.get_presence():
+        counts[(row['status'],)] += 1
+    return counts
+
+
+metrics.COMPUTERS.set_function(_computer_status_counts)
+metrics.ADMISSION_IN_FLIGHT.set_function(
+    lambda: {(name,): count for name, count in zip(admission.CLASS_NAMES, admission_controller.in_flight)})
+if db.name == "sqlite":
+    metrics.SQLITE_WAL_BYTES.set_function(lambda: {(): database.wal_size_bytes()})
 
 
 @app.on_event("startup")
 def startup():
-    database.init_db()
+    db.init_db()
 
-    # 주기적 종료 이벤트 자동 복구 스레드 시작
-    recovery_thread = threading.Thread(target=_periodic_recovery_loop, daemon=True)
-    recovery_thread.start()
-    print("[Startup] 종료 이벤트 자동 복구 스레드 시작 (5분 간격)")
+    elector.start()
+    job_scheduler.start()
+    print(f"[Startup] 주기 작업 스케줄러 시작 (리더만 실행: {elector.holder})")
+
+
+@app.on_event("shutdown")
+def shutdown():
+    # 새 작업 실행 중지 + 실행 중인 작업 완료 대기 (리더 상태에서 끝나도록 lease 반납 전)
+    job_scheduler.stop()
+    # lease 반납 → 다른 워커가 TTL 만료를 기다리지 않고 바로 인계
+    elector.stop()
 
 
 # ==================== Agent 엔드포인트 (API 키 인증) ====================
 
 @app.post("/api/events", response_model=dict)
-@limiter.limit("60/minute")
 def create_event(request: Request, event: EventCreate):
     """이벤트 생성 (Agent용, API 키 필수)"""
+    _limit_agent(request, "event", event.computer_name)
     timestamp = event.timestamp or datetime.now()
-    event_id, is_duplicate = database.insert_event(
+    event_id, is_duplicate = db.insert_event(
         computer_name=event.computer_name,
         event_type=event.event_type,
         timestamp=timestamp,
@@ -245,8 +444,49 @@ def create_event(request: Request, event: EventCreate):
     return {"id": event_id, "status": "ok", "duplicate": is_duplicate}
 
 
+@app.post("/api/events/batch", response_model=dict)
+def create_events_batch(request: Request, batch: EventBatch):
+    """이벤트 일괄 생성 (Agent용, API 키 필수)
+
+    각 항목을 EventCreate 규칙으로 검증한 뒤 유효한 항목만 단일 트랜잭션으로 삽입.
+    results는 입력 순서대로 {"id", "duplicate"} 또는 {"error"}.
+    """
+    results: list[dict] = [{} for _ in batch.events]
+    valid_indexes = []
+    rows = []
+    now = datetime.now()
+
+    for index, item in enumerate(batch.events):
+        try:
+            event = EventCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = {"error": "; ".join(err["msg"] for err in e.errors())}
+            continue
+        valid_indexes.append(index)
+        rows.append({
+            "computer_name": event.computer_name,
+            "event_type": event.event_type,
+            "timestamp": event.timestamp or now,
+            "event_detail": event.event_detail,
+            "event_source": event.event_source or 'realtime',
+            "event_record_id": event.event_record_id,
+        })
+
+    # 배치는 보통 한 PC의 이벤트 → 포함된 PC마다 배치 1회로 계산
+    _limit_agent(request, "event_batch", *dict.fromkeys(row["computer_name"] for row in rows))
+
+    for index, (event_id, is_duplicate) in zip(valid_indexes, db.insert_events(rows)):
+        results[index] = {"id": event_id, "duplicate": is_duplicate}
+
+    return {
+        "status": "ok",
+        "accepted": len(rows),
+        "rejected": len(batch.events) - len(rows),
+        "results": results
+    }
+
+
 @app.post("/api/heartbeat")
-@limiter.limit("120/minute")
 def heartbeat(
     request: Request,
     computer_name: str,
@@ -258,36 +498,41 @@ def heartbeat(
     # computer_name 검증
     if not COMPUTER_NAME_PATTERN.match(computer_name):
         raise HTTPException(status_code=422, detail="잘못된 computer_name 형식")
+    _limit_agent(request, "heartbeat", computer_name)
 
-    database.update_heartbeat(computer_name, ip_address, agent_version)
+    db.update_heartbeat(computer_name, ip_address, agent_version)
+    metrics.HEARTBEATS.inc()
 
     response = {"status": "ok"}
 
     # Check for agent update if version info provided
     if agent_version and agent_variant:
-        version_file = AGENT_UPDATES_DIR / "version.json"
-        if version_file.exists():
-            try:
-                with open(version_file, 'r', encoding='utf-8') as f:
-                    version_info = json_module.load(f)
-                latest = version_info.get("version", "")
-                if latest and latest != agent_version:
-                    response["update_available"] = True
-                    response["latest_version"] = latest
-                    response["download_url"] = f"/api/agent/download/{agent_variant}"
-            except Exception:
-                pass
+        try:
+            version_info = _read_version_info()
+        except Exception:
+            version_info = None
+        if version_info:
+            latest = version_info.get("version", "")
+            if latest and latest != agent_version:
+                # 코호트 대상 + 다운로드 슬롯을 받은 PC만 update_available (그 외 update_retry_after)
+                response.update(rollout.offer_update(db, version_info, computer_name, agent_variant, AGENT_UPDATES_DIR))
+
+    # Agent 동기화 상태 (마지막 boot/shutdown, 최대 record_id) - Agent의 /api/events/last 조회 대체
+    sync_state = db.get_sync_state(computer_name)
+    response["sync_state"] = {
+        "last_boot": sync_state["last_boot"],
+        "last_shutdown": sync_state["last_shutdown"],
+        "last_event_record_id": sync_state["last_event_record_id"]
+    }
 
     # 대시보드에서 요청된 재집계가 있으면 응답에 since 포함
-    pending_since = database.get_pending_resync(computer_name)
-    if pending_since is not None:
-        response["resync_since"] = pending_since.isoformat()
+    if sync_state["resync_since"] is not None:
+        response["resync_since"] = sync_state["resync_since"]
 
     return response
 
 
 @app.post("/api/computers/register")
-@limiter.limit("10/minute")
 def register_computer(
     request: Request,
     computer_name: str,
@@ -297,24 +542,24 @@ def register_computer(
     # computer_name 검증
     if not COMPUTER_NAME_PATTERN.match(computer_name):
         raise HTTPException(status_code=422, detail="잘못된 computer_name 형식")
+    _limit_agent(request, "register", computer_name)
 
-    database.register_computer(computer_name, ip_address)
+    db.register_computer(computer_name, ip_address)
     return {"status": "ok"}
 
 
 @app.post("/api/resync/ack")
-@limiter.limit("30/minute")
 def ack_resync(request: Request, computer_name: str):
     """재집계 완료 알림 (Agent용)"""
     if not COMPUTER_NAME_PATTERN.match(computer_name):
         raise HTTPException(status_code=422, detail="잘못된 computer_name 형식")
+    _limit_agent(request, "resync_ack", computer_name)
 
-    acked = database.ack_resync(computer_name)
+    acked = db.ack_resync(computer_name)
     return {"status": "ok", "acked": acked}
 
 
 @app.get("/api/events/last")
-@limiter.limit("60/minute")
 def get_last_event(
     request: Request,
     computer_name: str,
@@ -326,8 +571,9 @@ def get_last_event(
         raise HTTPException(status_code=422, detail="잘못된 computer_name 형식")
     if event_type not in EVENT_TYPES:
         raise HTTPException(status_code=400, detail="event_type은 'boot' 또는 'shutdown'이어야 합니다")
+    _limit_agent(request, "last_event", computer_name)
 
-    event = database.get_last_event(computer_name, event_type)
+    event = db.get_last_event(computer_name, event_type)
     if event:
         return {"event": event, "found": True}
     return {"event": None, "found": False}
@@ -335,12 +581,28 @@ def get_last_event(
 
 # ==================== 공개 엔드포인트 (인증 불필요) ====================
 
+@app.get("/metrics")
+def metrics_endpoint(authorization: Optional[str] = Header(None)):
+    """Prometheus 메트릭 (COMPUTEROFF_METRICS_TOKEN 설정 시 Bearer 토큰 필요)"""
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="메트릭 토큰이 필요합니다")
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/health")
 def health_check():
-    """헬스 체크 (인증 불필요)"""
+    """헬스 체크 (인증 불필요, 프로세스 생존 여부만)"""
     return {"status": "ok", "service": "computeroff"}
 
 
+@app.get("/api/ready")
+def readiness_check():
+    """준비 상태 확인 (인증 불필요, 로드밸런서용) - 항목 하나라도 기준 초과 시 503"""
+    ready, report = readiness_checker.check()
+    return responses.FastJSONResponse(
+        report, status_code=200 if ready else 503, headers={"Cache-Control": "no-store"})
+
+
 # ==================== Dashboard 엔드포인트 (세션 인증) ====================
 
 @app.get("/api/events")
@@ -351,53 +613,98 @@ def get_events(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     limit: int = 100,
+    cursor: Optional[str] = None,
     _: str = Depends(verify_session)
 ):
-    """이벤트 목록 조회 (Dashboard용, 세션 필수)"""
-    events = database.get_events(
-        computer_name=computer_name,
-        event_type=event_type,
-        start_date=start_date,
-        end_date=end_date,
-        limit=limit
-    )
-    return {"events": events, "count": len(events)}
+    """이벤트 목록 조회 (Dashboard용, 세션 필수)
+
+    시간 역순 keyset 페이지. limit은 최대 database.EVENTS_PAGE_MAX건으로 제한되며,
+    다음 페이지는 응답의 next_cursor를 cursor로 넘겨 조회한다 (마지막 페이지면 null).
+    행은 DB에서 바로 JSON으로 직렬화 (count는 배열 길이)
+    """
+    try:
+        events, count, next_cursor = db.get_events_json(
+            computer_name=computer_name,
+            event_type=event_type,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return responses.json_response({
+        "events": responses.RawJSON(events),
+        "count": count,
+        "next_cursor": next_cursor
+    })
 
 
 @app.get("/api/computers")
-def get_computers(request: Request, _: str = Depends(verify_session)):
-    """컴퓨터 목록 조회 (Dashboard용, 세션 필수)"""
+def get_computers(request: Request, response: Response, _: str = Depends(verify_session)):
+    """컴퓨터 목록 조회 (Dashboard용, 세션 필수)
+
+    하트비트 포함 모든 쓰기 + COMPUTERS_ETAG_SECONDS 시간 구간 기준 ETag.
+    304 응답 시에는 복구 검사도 건너뜀 (주기 복구 스레드/실시간 푸시 폴러가 담당).
+    """
+    etag = _data_etag(request, 'data', int(time.time() // COMPUTERS_ETAG_SECONDS))
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
     # 먼저 오프라인 전환된 컴퓨터들의 종료 이벤트 복구
-    recovered = database.check_and_recover_offline_shutdowns()
+    recovered = db.check_and_recover_offline_shutdowns()
     if recovered:
         print(f"[Recovery] 종료 이벤트 {len(recovered)}개 복구됨: {[r['computer_name'] for r in recovered]}")
 
-    computers = database.get_computers()
+    # 복구로 데이터 버전이 바뀌었을 수 있으므로 조회 직전 기준으로 ETag 재계산
+    # (조회 전에 계산해야 이후 쓰기가 있어도 ETag가 데이터보다 앞서지 않음)
+    _set_etag(response, _data_etag(request, 'data', int(time.time() // COMPUTERS_ETAG_SECONDS)))
+    computers = db.get_computers()
     return {"computers": computers, "count": len(computers)}
 
 
 @app.get("/api/stats")
 def get_stats(
     request: Request,
+    response: Response,
     computer_name: Optional[str] = None,
     days: int = 7,
     _: str = Depends(verify_session)
 ):
     """통계 조회 (Dashboard용, 세션 필수)"""
-    stats = database.get_daily_stats(computer_name=computer_name, days=days)
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    _set_etag(response, etag)
+
+    stats = db.get_daily_stats(computer_name=computer_name, days=days)
     return {"stats": stats, "days": days}
 
 
 @app.get("/api/computers/{computer_name}/history")
 def get_computer_history(
     request: Request,
+    response: Response,
     computer_name: str,
     days: int = 30,
     _: str = Depends(verify_session)
 ):
     """특정 컴퓨터의 이벤트 이력 조회 (Dashboard용, 세션 필수)"""
-    history = database.get_computer_history(computer_name, days)
-    return {"computer_name": computer_name, "history": history, "days": days}
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    history, _count = db.get_computer_history_json(computer_name, days)
+    result = responses.json_response({
+        "computer_name": computer_name,
+        "history": responses.RawJSON(history),
+        "days": days
+    })
+    _set_etag(result, etag)
+    return result
 
 
 @app.put("/api/computers/{hostname}")
@@ -409,7 +716,7 @@ def update_computer(
     _csrf: str = Depends(verify_csrf)
 ):
     """컴퓨터 표시 이름 변경 (CSRF 보호)"""
-    database.set_computer_display_name(hostname, data.display_name)
+    db.set_computer_display_name(hostname, data.display_name)
     return {"status": "ok", "hostname": hostname, "display_name": data.display_name}
 
 
@@ -431,7 +738,7 @@ def request_resync(
     if not 1 <= days <= 30:
         raise HTTPException(status_code=422, detail="days는 1~30 범위여야 합니다")
 
-    since = database.request_resync(hostname, days)
+    since = db.request_resync(hostname, days)
     return {"status": "ok", "hostname": hostname, "days": days, "since": since.isoformat()}
 
 
@@ -443,7 +750,7 @@ def delete_computer(
     _csrf: str = Depends(verify_csrf)
 ):
     """컴퓨터 및 관련 이벤트 삭제 (CSRF 보호)"""
-    deleted_events = database.delete_computer(hostname)
+    deleted_events = db.delete_computer(hostname)
     return {"status": "ok", "hostname": hostname, "deleted_events": deleted_events}
 
 
@@ -454,7 +761,7 @@ def delete_all_computers(
     _csrf: str = Depends(verify_csrf)
 ):
     """모든 컴퓨터 및 관련 이벤트 삭제 (CSRF 보호)"""
-    result = database.delete_all_computers()
+    result = db.delete_all_computers()
     return {"status": "ok", **result}
 
 
@@ -463,18 +770,18 @@ def delete_all_computers(
 @app.get("/api/auth/check")
 def check_auth(request: Request):
     """인증 상태 확인"""
-    password_set = database.is_password_set()
+    password_set = db.is_password_set()
 
     if not password_set:
         return {"authenticated": False, "password_set": False}
 
     session = request.cookies.get("session")
-    authenticated = database.validate_session(session) if session else False
+    authenticated = db.validate_session(session) if session else False
 
     # CSRF 토큰도 함께 반환 (인증된 경우)
     csrf_token = None
     if authenticated and session:
-        csrf_token = database.get_session_csrf_token(session)
+        csrf_token = db.get_session_csrf_token(session)
 
     return {
         "authenticated": authenticated,
@@ -487,14 +794,14 @@ def check_auth(request: Request):
 @limiter.limit("5/minute")
 def set_password(request: Request, data: PasswordRequest, response: Response):
     """최초 비밀번호 설정"""
-    if database.is_password_set():
+    if db.is_password_set():
         raise HTTPException(status_code=400, detail="비밀번호가 이미 설정되어 있습니다")
 
-    hashed = database.hash_password(data.password)
-    database.set_setting('admin_password', hashed)
+    hashed = db.hash_password(data.password)
+    db.set_setting('admin_password', hashed)
 
     # 자동 로그인
-    session_id, csrf_token = database.create_session()
+    session_id, csrf_token = db.create_session()
     response.set_cookie(
         key="session",
         value=session_id,
@@ -511,13 +818,13 @@ def set_password(request: Request, data: PasswordRequest, response: Response):
 @limiter.limit("5/minute")
 def login(request: Request, data: LoginRequest, response: Response):
     """로그인"""
-    if not database.is_password_set():
+    if not db.is_password_set():
         raise HTTPException(status_code=400, detail="비밀번호가 설정되지 않았습니다")
 
-    if not database.verify_password(data.password):
+    if not db.verify_password(data.password):
         raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다")
 
-    session_id, csrf_token = database.create_session()
+    session_id, csrf_token = db.create_session()
     response.set_cookie(
         key="session",
         value=session_id,
@@ -535,99 +842,459 @@ def logout(request: Request, response: Response):
     """로그아웃"""
     session = request.cookies.get("session")
     if session:
-        database.delete_session(session)
+        db.delete_session(session)
     response.delete_cookie("session")
     return {"status": "ok"}
 
 
 # ==================== 관리자 API ====================
 
+SQL_PROFILE_ORDERS = ('total', 'max', 'calls', 'avg')
+
+
+@app.get("/api/admin/sql-profile")
+def get_sql_profile(
+    limit: int = 20,
+    order: str = 'total',
+    slow_limit: int = 50,
+    _: str = Depends(verify_session)
+):
+    """SQL 프로파일러 상태 + 문별 집계 상위 N개 + 최근 느린 쿼리 (SQLite 백엔드)"""
+    if order not in SQL_PROFILE_ORDERS:
+        raise HTTPException(status_code=422, detail=f"order는 {SQL_PROFILE_ORDERS} 중 하나여야 합니다")
+    limit = max(1, min(limit, 200))
+    slow_limit = max(0, min(slow_limit, sqlprofile.SLOW_LOG_SIZE))
+    return {
+        "backend": db.name,
+        **sqlprofile.status(),
+        "top": sqlprofile.top(limit, order),
+        "slow": sqlprofile.slow_queries(slow_limit),
+    }
+
+
+@app.put("/api/admin/sql-profile")
+def update_sql_profile(
+    data: SqlProfileUpdate,
+    _session: str = Depends(verify_session),
+    _csrf: str = Depends(verify_csrf)
+):
+    """SQL 프로파일러 켜기/끄기, 느린 쿼리 기준 변경, 집계 초기화 (CSRF 보호, 재시작 불필요)"""
+    if data.enabled and db.name != "sqlite":
+        raise HTTPException(status_code=400, detail="SQL 프로파일러는 sqlite 백엔드에서만 사용할 수 있습니다")
+    status = sqlprofile.configure(data.enabled, data.slow_ms, data.reset)
+    print(f"[SQL Profile] enabled={status['enabled']} slow_ms={status['slow_ms']}")
+    return {"backend": db.name, **status}
+
+
+@app.get("/api/admin/jobs")
+def list_jobs(_: str = Depends(verify_session)):
+    """주기 작업 상태 + 최근 실행 기록 (이 프로세스 기준, 리더가 아니면 기록 없음)"""
+    return {"leader": elector.is_leader, "holder": elector.holder, "jobs": job_scheduler.status()}
+
+
+@app.get("/api/admin/rollout")
+def rollout_status(_: str = Depends(verify_session)):
+    """Agent 업데이트 배포 진행 상황 (버전별 PC 수, 현재 배포 비율, 사용 중 다운로드 슬롯)"""
+    try:
+        version_info = _read_version_info()
+    except Exception:
+        version_info = None
+    return rollout.status(db, version_info)
+
+
+@app.get("/api/admin/profiles")
+def list_profiles(_: str = Depends(verify_session)):
+    """요청 프로파일러 설정 + 이번 프로세스에서 기록한 프로파일 목록 (최신순)"""
+    return {**request_profiler.status(), "profiles": request_profiler.list_profiles()}
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+def get_profile(profile_id: str, _: str = Depends(verify_session)):
+    """프로파일 1건 (folded stack 텍스트 - flamegraph.pl / speedscope에 그대로 입력)"""
+    content = request_profiler.read(profile_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다")
+    return Response(
+        content=content,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
+
+
+@app.put("/api/admin/profiler")
+def update_profiler(
+    data: ProfilerUpdate,
+    _session: str = Depends(verify_session),
+    _csrf: str = Depends(verify_csrf)
+):
+    """롤링 프로파일 설정: route 라우트의 every번째 요청마다 기록 (every=0이면 끔, CSRF 보호)"""
+    if data.route and data.every and data.route not in {route.path for route in app.routes}:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 라우트입니다: {data.route}")
+    status = request_profiler.configure(data.route, data.every)
+    print(f"[Profiler] rolling route={status['rolling_route']} every={status['rolling_every']}")
+    return status
+
+
 # ==================== 타임라인 API (세션 인증) ====================
 
 @app.get("/api/timeline/shutdown")
-def get_shutdown_timeline(request: Request, days: int = 7, _: str = Depends(verify_session)):
+def get_shutdown_timeline(request: Request, response: Response, days: int = 7,
+                          _: str = Depends(verify_session)):
     """날짜별 종료 이벤트 타임라인"""
-    return database.get_shutdown_timeline(days)
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    _set_etag(response, etag)
+
+    return db.get_shutdown_timeline(days)
 
 
 @app.get("/api/daily-summary")
-def get_daily_summary_api(request: Request, days: int = 7, _: str = Depends(verify_session)):
+def get_daily_summary_api(request: Request, response: Response, days: int = 7,
+                          _: str = Depends(verify_session)):
     """하루 단위 시작/종료 요약"""
-    summary = database.get_daily_summary(days)
-    return {"summary": summary, "days": days}
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    summary, _count = db.get_daily_summary_json(days)
+    result = responses.json_response({"summary": responses.RawJSON(summary), "days": days})
+    _set_etag(result, etag)
+    return result
 
 
 @app.get("/api/computers/{computer_name}/daily-summary")
 def get_computer_daily_summary_api(
     request: Request,
+    response: Response,
     computer_name: str,
     days: int = 30,
     _: str = Depends(verify_session)
 ):
     """특정 컴퓨터의 하루 단위 시작/종료 요약"""
-    summary = database.get_computer_daily_summary(computer_name, days)
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    _set_etag(response, etag)
+
+    summary = db.get_computer_daily_summary(computer_name, days)
     return {"computer_name": computer_name, "summary": summary, "days": days}
 
 
 @app.get("/api/timeline/all")
 def get_all_events_timeline_api(
     request: Request,
+    response: Response,
     days: int = 7,
     limit: int = 100,
+    cursor: Optional[str] = None,
     _: str = Depends(verify_session)
 ):
-    """전체 컴퓨터 이벤트 타임라인"""
-    events = database.get_all_events_timeline(days, limit)
-    return {"events": events, "days": days, "count": len(events)}
+    """전체 컴퓨터 이벤트 타임라인
+
+    시간 역순 keyset 페이지 (limit 최대 database.EVENTS_PAGE_MAX, 다음 페이지는 next_cursor)
+    """
+    etag = _data_etag(request)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    try:
+        events, next_cursor = db.get_all_events_timeline(days, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    _set_etag(response, etag)
+    return {"events": events, "days": days, "count": len(events), "next_cursor": next_cursor}
+
+
+# ==================== 대시보드 스냅샷 API (세션 인증) ====================
+
+# 스냅샷 파라미터 상한
+SNAPSHOT_MAX_DAYS = 366
+
+
+@app.get("/api/dashboard/snapshot")
+def get_dashboard_snapshot_api(
+    request: Request,
+    date: Optional[str] = None,
+    days: int = 7,
+    timeline_days: int = 7,
+    timeline_limit: int = 100,
+    _: str = Depends(verify_session)
+):
+    """대시보드 전체 화면 데이터 (하나의 읽기 트랜잭션)
+
+    컴퓨터 목록, 선택 날짜(date, 기본 오늘) 요약, 최근 days일 요약,
+    최근 타임라인, 사용 현황 그래프 시리즈를 한 번에 반환한다.
+    ETag 기준은 /api/computers와 같다 (하트비트 포함 모든 쓰기 + 시간 구간).
+    """
+    if date is None:
+        date = datetime.now(KST).strftime('%Y-%m-%d')
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=422, detail="date는 YYYY-MM-DD 형식이어야 합니다")
+    if not 1 <= days <= SNAPSHOT_MAX_DAYS or not 1 <= timeline_days <= SNAPSHOT_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"days/timeline_days는 1~{SNAPSHOT_MAX_DAYS} 범위여야 합니다")
+    if not 1 <= timeline_limit <= database.EVENTS_PAGE_MAX:
+        raise HTTPException(status_code=422, detail=f"timeline_limit은 1~{database.EVENTS_PAGE_MAX} 범위여야 합니다")
+
+    etag = _data_etag(request, 'data', int(time.time() // COMPUTERS_ETAG_SECONDS))
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    recovered = db.check_and_recover_offline_shutdowns()
+    if recovered:
+        print(f"[Recovery] 종료 이벤트 {len(recovered)}개 복구됨: {[r['computer_name'] for r in recovered]}")
+
+    # 복구 반영 후, 조회 전에 ETag 계산 (/api/computers와 동일)
+    etag = _data_etag(request, 'data', int(time.time() // COMPUTERS_ETAG_SECONDS))
+    result = responses.json_response(db.get_dashboard_snapshot(date, days, timeline_days, timeline_limit))
+    _set_etag(result, etag)
+    return result
+
+
+# ==================== 내보내기 API (세션 인증) ====================
+
+@app.get("/api/export/events")
+@limiter.limit("10/minute")
+def export_events(
+    request: Request,
+    format: str = "ndjson",
+    computer_name: Optional[str] = None,
+    event_type: Optional[str] = None,
+    event_source: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    _: str = Depends(verify_session)
+):
+    """이벤트 내보내기 (감사용, NDJSON 또는 CSV 스트리밍)
+
+    조건에 맞는 전체 이벤트를 시간순으로 전송한다 (건수 제한 없음).
+    DB 커서에서 database.EXPORT_BATCH_SIZE건씩 읽어 바로 내보내므로 기간이 길어도 메모리 사용량이 일정하다.
+    각 행에 표시 이름(display_name)이 포함된다.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=422, detail=f"format은 {list(export.FORMATS)} 중 하나여야 합니다")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=422, detail="start_date가 end_date보다 늦습니다")
+
+    media_type, extension = export.FORMATS[format]
+    filename = f"events_{datetime.now(KST).strftime('%Y%m%d_%H%M%S')}.{extension}"
+    batches = db.iter_events_export(
+        computer_name=computer_name,
+        event_type=event_type,
+        event_source=event_source,
+        start_date=start_date,
+        end_date=end_date
+    )
+    return StreamingResponse(
+        export.stream(format, batches, database.EXPORT_COLUMNS),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+# ==================== 변경 피드 API (세션 인증) ====================
+
+@app.get("/api/changes")
+def get_changes_api(
+    request: Request,
+    after: int = 0,
+    limit: int = 500,
+    _: str = Depends(verify_session)
+):
+    """seq > after 인 변경 목록 (증분 미러링용)
+
+    다음 요청은 응답의 last_seq를 after로 사용한다.
+    reset_required가 true면 보존 기간 정리로 일부 변경이 사라진 것이므로
+    전체 데이터를 다시 가져온 뒤 head_seq부터 이어서 소비한다.
+    """
+    if after < 0:
+        raise HTTPException(status_code=422, detail="after는 0 이상이어야 합니다")
+    if not 1 <= limit <= database.CHANGE_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"limit은 1~{database.CHANGE_BATCH_MAX} 범위여야 합니다")
+
+    return db.get_changes(after, limit)
+
+
+@app.get("/api/stream")
+async def stream_api(request: Request, _: str = Depends(verify_session)):
+    """대시보드 실시간 푸시 (Server-Sent Events)
+
+    컴퓨터 온라인/오프라인 전환, 새 이벤트, 자동 복구, 이름 변경, 삭제를 발행한다.
+    클라이언트는 연결(재연결) 직후 한 번 전체 조회하고 이후에는 메시지만 반영한다.
+    """
+    return StreamingResponse(
+        broker.iter_messages(request),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # 리버스 프록시 버퍼링 비활성화
+        }
+    )
+
+
+# ==================== 점유 현황 API (세션 인증) ====================
+
+@app.get("/api/occupancy")
+def get_occupancy_api(
+    request: Request,
+    response: Response,
+    date: Optional[str] = None,
+    at: Optional[str] = None,
+    step: int = 10,
+    _: str = Depends(verify_session)
+):
+    """분 단위 점유 비트맵 기반 온라인 현황 (events 테이블 미사용)
+
+    - at 지정 (HH:MM): 해당 시각에 켜져 있던 컴퓨터 목록
+    - at 미지정: step분 단위 전체 점유 곡선 + 컴퓨터별 사용 시간(분)
+    """
+    if date is None:
+        date = datetime.now(KST).strftime('%Y-%m-%d')
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=422, detail="date는 YYYY-MM-DD 형식이어야 합니다")
+
+    # 점유 비트맵은 하트비트가 쓰므로 'data' 범위, 분 단위로 늘어나는 오늘 곡선은 시간 구간으로 반영
+    etag = _data_etag(request, 'data', int(time.time() // COMPUTERS_ETAG_SECONDS))
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    _set_etag(response, etag)
+
+    display_names = db.get_all_display_names()
+
+    if at is not None:
+        minute = occupancy.parse_minute(at)
+        if minute is None:
+            raise HTTPException(status_code=422, detail="at은 HH:MM 형식이어야 합니다")
+        online = db.get_occupancy_at(date, minute)
+        return {
+            "date": date,
+            "at": at,
+            "count": len(online),
+            "computers": [
+                {"computer_name": name, "display_name": display_names.get(name)}
+                for name in online
+            ]
+        }
+
+    if not 1 <= step <= 60:
+        raise HTTPException(status_code=422, detail="step은 1~60 범위여야 합니다")
+
+    # 결과는 조회 캐시와 공유되므로 복사본에 표시 이름 추가
+    result = db.get_occupancy_curve(date, step)
+    computers = [
+        {**item, "display_name": display_names.get(item["computer_name"])}
+        for item in result["computers"]
+    ]
+    return {"date": date, "step": step, **result, "computers": computers}
 
 
 # ==================== Agent 자동 업데이트 API ====================
 
+def _read_version_info() -> Optional[dict]:
+    """agent_updates/version.json (없으면 None)"""
+    version_file = AGENT_UPDATES_DIR / "version.json"
+    with tracing.span("file.read", path=version_file.name):
+        if not version_file.exists():
+            return None
+        with open(version_file, 'r', encoding='utf-8') as f:
+            return json_module.load(f)
+
+
+# 파일 이름 → (mtime_ns, 크기, SHA-256) - 파일이 바뀌면 다시 계산
+_agent_file_hashes: dict[str, tuple[int, int, str]] = {}
+
+
+def _agent_file_sha256(exe_path: Path) -> str:
+    """에이전트 EXE의 SHA-256 (hex, 파일이 바뀔 때만 계산)"""
+    stat_result = exe_path.stat()
+    cached = _agent_file_hashes.get(exe_path.name)
+    if cached is not None and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+        return cached[2]
+    with tracing.span("file.hash", path=exe_path.name):
+        digest = hashlib.sha256()
+        with open(exe_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    _agent_file_hashes[exe_path.name] = (stat_result.st_mtime_ns, stat_result.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
 @app.get("/api/agent/version")
 @limiter.limit("60/minute")
 def get_agent_version(request: Request):
-    """에이전트 최신 버전 정보"""
-    version_file = AGENT_UPDATES_DIR / "version.json"
-    if not version_file.exists():
+    """에이전트 최신 버전 정보 (variant별 sha256 포함)"""
+    version_info = _read_version_info()
+    if version_info is None:
         raise HTTPException(status_code=404, detail="버전 정보를 찾을 수 없습니다")
+    # build.bat이 기록한 해시가 우선, 없는 variant(이전 빌드)만 서버에서 계산
+    sha256 = dict(version_info.get("sha256") or {})
+    for variant, exe_name in (version_info.get("variants") or {}).items():
+        exe_path = AGENT_UPDATES_DIR / exe_name
+        if variant not in sha256 and exe_path.exists():
+            sha256[variant] = _agent_file_sha256(exe_path)
+    return {**version_info, "sha256": sha256}
+
 
-    with open(version_file, 'r', encoding='utf-8') as f:
-        return json_module.load(f)
+def _agent_download_key(request: Request) -> str:
+    """유효한 슬롯 토큰이 있으면 슬롯 단위, 그 외는 IP 단위 Rate Limit (사무실 NAT 공유 IP 대응)"""
+    holder = rollout.slot_holder(db, request.query_params.get("token"))
+    if holder:
+        return f"slot:{holder}"
+    return get_remote_address(request)
 
 
 @app.get("/api/agent/download/{variant}")
-@limiter.limit("10/minute")
+@limiter.limit("10/minute", key_func=_agent_download_key)
 def download_agent(request: Request, variant: str):
-    """에이전트 EXE 다운로드"""
-    valid_variants = ("x64", "x86", "win7_x64")
-    if variant not in valid_variants:
-        raise HTTPException(status_code=400, detail=f"variant는 {valid_variants} 중 하나여야 합니다")
+    """에이전트 EXE 다운로드 (Range 이어받기 지원, ETag = 파일 SHA-256)"""
+    if variant not in rollout.AGENT_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"variant는 {rollout.AGENT_VARIANTS} 중 하나여야 합니다")
 
-    exe_name = f"agent_windows_{variant}.exe"
+    exe_name = rollout.agent_exe_name(variant)
     exe_path = AGENT_UPDATES_DIR / exe_name
     if not exe_path.exists():
         raise HTTPException(status_code=404, detail=f"{exe_name}를 찾을 수 없습니다")
 
-    return FileResponse(
-        path=str(exe_path),
-        filename=exe_name,
-        media_type="application/octet-stream"
-    )
+    etag = f'"{_agent_file_sha256(exe_path)}"'
+    return responses.ranged_file_response(exe_path, request.headers, etag, exe_name)
 
 
 # ==================== 정적 파일 및 루트 ====================
 
 static_path = Path(__file__).parent / "static"
-app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
+
+# JS/CSS 파일명 지문 + gzip/brotli 압축본 생성 (실패 시 원본을 no-cache로 서빙)
+try:
+    static_manifest = assets.build(static_path)
+except OSError as e:
+    print(f"[Assets] 정적 파일 빌드 실패 - 원본 사용: {e}")
+    static_manifest = {}
+static_files = responses.PrecompressedStaticFiles(
+    directory=str(static_path), immutable_dir=static_path / assets.DIST_DIRNAME)
+app.mount("/static", static_files, name="static")
 
 
 @app.get("/")
-def dashboard():
-    return FileResponse(static_path / "index.html")
+def dashboard(request: Request):
+    """대시보드 (index.html은 no-cache: 매번 재검증해야 새 지문 파일 이름을 받음)"""
+    index_path = static_path / static_manifest.get(assets.INDEX_NAME, assets.INDEX_NAME)
+    return static_files.file_response(str(index_path), None, request.scope)
 
 
 if __name__ == "__main__":
-    import os
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,320 @@
+"""Prometheus 메트릭 수집 및 텍스트 노출 형식 렌더링 (/metrics)
+
+외부 라이브러리 없이 counter / gauge / histogram만 구현한다.
+- 기록: 스레드마다 자기 샤드(dict)에만 쓰므로 요청 경로에서 락을 잡지 않는다
+  (샤드 등록 시 스레드당 1회만 락). uvicorn 스레드풀 스레드는 재사용되므로 샤드 수는 일정하다
+- 조회: /metrics 요청 시 모든 샤드를 합산. gauge는 조회 시점에 콜백으로 계산
+- 값은 프로세스 단위 (워커가 여러 개면 워커별로 따로 집계됨)
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP 요청 처리 시간 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# DB 연결/커밋 시간 버킷 (초) - 대부분 ms 이하
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# 백그라운드 작업 1회 실행 시간 버킷 (초)
+JOB_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+_metrics: list["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = {}
+            self._local.values = values
+            with self._lock:
+                self._shards.append(values)
+            return values
+
+    def _snapshot(self) -> list[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # 다른 스레드가 쓰는 중일 수 있으므로 dict 복사본으로 합산
+        return [dict(shard) for shard in shards]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> dict[tuple, float]:
+        totals: dict[tuple, float] = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Gauge(_Metric):
+    """조회 시점에 콜백으로 값을 계산하는 gauge
+
+    콜백은 {레이블 값 튜플: 값}을 반환한다 (레이블이 없으면 {(): 값}).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], dict]] = None
+
+    def set_function(self, function: Callable[[], dict]):
+        self._function = function
+
+    def _render_samples(self) -> list[str]:
+        if self._function is None:
+            return []
+        try:
+            values = self._function()
+        except Exception as e:
+            print(f"[Metrics Error] {self.name}: {e}")
+            return []
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # [버킷별 개수..., +Inf 개수, 합계]
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def values(self) -> dict[tuple, list]:
+        totals: dict[tuple, list] = {}
+        for shard in self._snapshot():
+            for labels, state in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return totals
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+        for labels, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class LatencyWindow:
+    """최근 요청 처리 시간 표본 (준비 상태 확인의 p99용, /metrics에는 노출하지 않음)
+
+    요청마다 (시각, 초)를 고정 크기 deque에 넣기만 하고, 백분위는 조회 시 정렬해 계산한다.
+    """
+
+    def __init__(self, size: int = 2048, max_age: float = 60.0):
+        self.max_age = max_age
+        self._samples: deque = deque(maxlen=size)
+
+    def observe(self, seconds: float):
+        self._samples.append((time.monotonic(), seconds))
+
+    def percentile(self, q: float) -> Optional[float]:
+        """최근 max_age초 표본의 q 분위수 (표본이 없으면 None)"""
+        cutoff = time.monotonic() - self.max_age
+        values = sorted(seconds for at, seconds in list(self._samples) if at >= cutoff)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def render() -> bytes:
+    """등록된 모든 메트릭을 Prometheus 텍스트 형식으로"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# ==================== 메트릭 정의 ====================
+
+HTTP_REQUESTS = Counter(
+    "computeroff_http_requests_total", "HTTP 요청 수", ("method", "route", "status"))
+HTTP_DURATION = Histogram(
+    "computeroff_http_request_duration_seconds", "HTTP 요청 처리 시간 (SSE 스트림 제외)",
+    ("method", "route"), LATENCY_BUCKETS)
+RECENT_LATENCY = LatencyWindow()
+
+EVENTS_INGESTED = Counter(
+    "computeroff_events_ingested_total", "수신 이벤트 처리 결과 (inserted/duplicate/overwritten)", ("outcome",))
+RECOVERY_INSERTS = Counter(
+    "computeroff_recovery_inserts_total", "자동 복구로 삽입된 shutdown 이벤트 수")
+HEARTBEATS = Counter(
+    "computeroff_heartbeats_total", "수신 하트비트 수")
+COMPUTERS = Gauge(
+    "computeroff_computers", "하트비트 기준 온라인/오프라인 컴퓨터 수", ("status",))
+
+DB_CONNECT = Histogram(
+    "computeroff_db_connect_seconds", "DB 연결 획득 시간 (SQLite: 연결 + PRAGMA, PostgreSQL: 풀 대여)",
+    buckets=DB_BUCKETS)
+DB_COMMIT = Histogram(
+    "computeroff_db_commit_seconds", "DB 커밋 시간", buckets=DB_BUCKETS)
+SQLITE_WAL_BYTES = Gauge(
+    "computeroff_sqlite_wal_bytes", "SQLite WAL 파일 크기")
+
+QUERY_CACHE = Counter(
+    "computeroff_query_cache_requests_total", "대시보드 조회 캐시 결과 (hit/miss/coalesced)", ("function", "result"))
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "computeroff_admission_in_flight", "우선순위 클래스별 처리 중 요청 수", ("class",))
+ADMISSION_QUEUE = Histogram(
+    "computeroff_admission_queue_seconds", "수용 후 엔드포인트 시작까지 대기 시간", ("class",), LATENCY_BUCKETS)
+ADMISSION_SHED = Counter(
+    "computeroff_admission_shed_total", "과부하로 거절(503)한 요청 수", ("class",))
+
+UPDATE_OFFERS = Counter(
+    "computeroff_agent_update_offers_total", "하트비트 업데이트 안내 결과 (granted/slots_full/cohort_wait/unavailable)",
+    ("version", "result"))
+
+JOB_DURATION = Histogram(
+    "computeroff_background_run_seconds", "백그라운드 작업 1회 실행 시간", ("job",), JOB_BUCKETS)
+JOB_ERRORS = Counter(
+    "computeroff_background_errors_total", "백그라운드 작업 오류 수", ("job",))
+JOB_RUNS = Counter(
+    "computeroff_background_runs_total", "주기 작업 실행 결과 (ok/error/timeout/skipped)", ("job", "status"))
+
+
+# ==================== HTTP 미들웨어 ====================
+
+# 엔드포인트 → 라우트 템플릿 경로 (첫 요청 시 생성)
+_route_paths: Optional[dict] = None
+
+
+def route_template(scope) -> str:
+    """라우팅이 끝난 scope의 라우트 템플릿(/api/computers/{hostname}), 매칭 실패 시 "unmatched"
+
+    실제 경로 대신 템플릿을 레이블로 써서 레이블 종류 수가 라우트 수로 고정되게 한다.
+    """
+    global _route_paths
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if _route_paths is None:
+        # 라우트는 앱 생성 후 데코레이터로 등록되므로 첫 요청 시점에 매핑 생성
+        _route_paths = {
+            getattr(route, "endpoint", None) or getattr(route, "app", None): route.path
+            for route in scope["app"].routes
+        }
+    return _route_paths.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    """요청 수/처리 시간 기록 (순수 ASGI)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope["method"]
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(method, route, status)
+            if not streaming:
+                elapsed = time.perf_counter() - started
+                HTTP_DURATION.observe(elapsed, method, route)
+                RECENT_LATENCY.observe(elapsed)
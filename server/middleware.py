@@ -0,0 +1,188 @@
+"""보안 헤더 / CORS 미들웨어 (순수 ASGI)
+
+@app.middleware("http")(BaseHTTPMiddleware)는 요청마다 태스크와 메모리 스트림을 만들고
+Response 객체를 다시 감싼다. 여기서는 응답 시작 메시지(http.response.start)의 헤더 목록에
+미리 만든 (bytes, bytes) 튜플만 덧붙인다.
+
+- SecurityHeadersMiddleware: 모든 HTTP 응답에 보안 헤더 + CSP
+- CORSMiddleware: starlette CORSMiddleware와 같은 동작 (Origin 없는 요청은 그대로 통과)
+"""
+
+from typing import Sequence
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+    "img-src 'self' data:; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "connect-src 'self' https://cdn.jsdelivr.net; "
+    "frame-ancestors 'self'"
+)
+
+SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = tuple(
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "SAMEORIGIN"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+        ("Content-Security-Policy", CONTENT_SECURITY_POLICY),
+    )
+)
+_SECURITY_HEADER_NAMES = frozenset(name for name, _ in SECURITY_HEADERS)
+
+
+class SecurityHeadersMiddleware:
+    """보안 헤더 추가 (엔드포인트가 같은 헤더를 이미 설정했으면 덮어씀)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = message.get("headers") or []
+                if any(name in _SECURITY_HEADER_NAMES for name, _ in headers):
+                    headers = [item for item in headers if item[0] not in _SECURITY_HEADER_NAMES]
+                else:
+                    headers = list(headers)
+                headers.extend(SECURITY_HEADERS)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ==================== CORS ====================
+
+# starlette와 동일: 별도 허용 없이도 항상 허용되는 요청 헤더
+_SAFELISTED_HEADERS = ("accept", "accept-language", "content-language", "content-type")
+_ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+
+def _request_headers(scope) -> dict[bytes, bytes]:
+    """CORS 판정에 필요한 요청 헤더만 (같은 이름이 여러 번이면 첫 값)"""
+    found = {}
+    for name, value in scope["headers"]:
+        if name in (b"origin", b"cookie", b"access-control-request-method",
+                    b"access-control-request-headers") and name not in found:
+            found[name] = value
+    return found
+
+
+def _add_vary_origin(headers: list) -> list:
+    for i, (name, value) in enumerate(headers):
+        if name == b"vary":
+            headers[i] = (name, value + b", Origin")
+            return headers
+    headers.append((b"vary", b"Origin"))
+    return headers
+
+
+class CORSMiddleware:
+    """CORS 처리 (starlette.middleware.cors.CORSMiddleware 대체, 정규식 origin 미지원)
+
+    응답 헤더는 생성 시 모두 bytes 튜플로 만들어 두고, 요청마다 origin 반영 여부만 판단한다.
+    """
+
+    def __init__(self, app, allow_origins: Sequence[str] = (), allow_methods: Sequence[str] = ("GET",),
+                 allow_headers: Sequence[str] = (), allow_credentials: bool = False,
+                 expose_headers: Sequence[str] = (), max_age: int = 600):
+        self.app = app
+        if "*" in allow_methods:
+            allow_methods = _ALL_METHODS
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.allow_methods = frozenset(method.encode("latin-1") for method in allow_methods)
+        self.allow_headers = frozenset(header.lower() for header in allow_headers) | set(_SAFELISTED_HEADERS)
+        # credentials가 허용되면 "*" 대신 요청 origin을 그대로 돌려줘야 함
+        self.explicit_origin = not self.allow_all_origins or allow_credentials
+
+        simple = []
+        if self.allow_all_origins:
+            simple.append((b"access-control-allow-origin", b"*"))
+        if allow_credentials:
+            simple.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            simple.append((b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1")))
+        self.simple_headers = tuple(simple)
+
+        preflight = [(b"vary", b"Origin")] if self.explicit_origin else [(b"access-control-allow-origin", b"*")]
+        preflight.append((b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")))
+        preflight.append((b"access-control-max-age", str(max_age).encode("latin-1")))
+        if allow_headers and not self.allow_all_headers:
+            preflight.append((b"access-control-allow-headers",
+                              ", ".join(sorted(self.allow_headers)).encode("latin-1")))
+        if allow_credentials:
+            preflight.append((b"access-control-allow-credentials", b"true"))
+        self.preflight_headers = tuple(preflight)
+
+    def is_allowed_origin(self, origin: bytes) -> bool:
+        return self.allow_all_origins or origin in self.allow_origins
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = _request_headers(scope)
+        origin = request_headers.get(b"origin")
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in request_headers:
+            await self._preflight(request_headers, origin, send)
+            return
+
+        explicit = (b"cookie" in request_headers) if self.allow_all_origins else self.is_allowed_origin(origin)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                headers.extend(self.simple_headers)
+                if explicit:
+                    headers = [item for item in headers if item[0] != b"access-control-allow-origin"]
+                    headers.append((b"access-control-allow-origin", origin))
+                    _add_vary_origin(headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _preflight(self, request_headers: dict, origin: bytes, send):
+        headers = list(self.preflight_headers)
+        failures = []
+        if self.is_allowed_origin(origin):
+            if self.explicit_origin:
+                headers.append((b"access-control-allow-origin", origin))
+        else:
+            failures.append("origin")
+
+        if request_headers[b"access-control-request-method"] not in self.allow_methods:
+            failures.append("method")
+
+        requested_headers = request_headers.get(b"access-control-request-headers")
+        if requested_headers is not None:
+            if self.allow_all_headers:
+                # 모든 헤더 허용이면 요청한 헤더 목록을 그대로 돌려줌
+                headers.append((b"access-control-allow-headers", requested_headers))
+            elif any(header.strip() not in self.allow_headers
+                     for header in requested_headers.decode("latin-1").lower().split(",")):
+                failures.append("headers")
+
+        if failures:
+            status, body = 400, ("Disallowed CORS " + ", ".join(failures)).encode("utf-8")
+        else:
+            status, body = 200, b"OK"
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,126 @@
+"""분 단위 점유(온라인) 비트맵 유틸리티
+
+(컴퓨터, KST 날짜) 하나당 1440비트(180바이트) 비트맵을 사용한다.
+비트 i = 00:00부터 i분째 (바이트 i // 8, MSB 우선 → numpy.unpackbits 기본 순서와 동일)
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+# numpy 임포트 (없으면 순수 파이썬 폴백)
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+MINUTES_PER_DAY = 1440
+BITMAP_BYTES = MINUTES_PER_DAY // 8
+
+# 바이트 → 8개 비트 튜플 (순수 파이썬 합산용)
+_BYTE_BITS = tuple(tuple((b >> (7 - i)) & 1 for i in range(8)) for b in range(256))
+
+
+def empty_bitmap() -> bytearray:
+    return bytearray(BITMAP_BYTES)
+
+
+def set_range(bits: bytearray, start_minute: int, end_minute: int):
+    """[start_minute, end_minute] 구간(양끝 포함)의 비트를 1로 설정"""
+    start_minute = max(0, start_minute)
+    end_minute = min(MINUTES_PER_DAY - 1, end_minute)
+    if start_minute > end_minute:
+        return
+
+    first_byte, first_bit = divmod(start_minute, 8)
+    last_byte, last_bit = divmod(end_minute, 8)
+
+    if first_byte == last_byte:
+        bits[first_byte] |= (0xFF >> first_bit) & (0xFF << (7 - last_bit)) & 0xFF
+        return
+
+    bits[first_byte] |= 0xFF >> first_bit
+    for i in range(first_byte + 1, last_byte):
+        bits[i] = 0xFF
+    bits[last_byte] |= (0xFF << (7 - last_bit)) & 0xFF
+
+
+def is_set(bits: bytes, minute: int) -> bool:
+    return bool(bits[minute // 8] & (0x80 >> (minute % 8)))
+
+
+def same_minute(a: datetime, b: datetime) -> bool:
+    """같은 분 버킷(같은 날짜·같은 분)인지"""
+    return a.replace(second=0, microsecond=0) == b.replace(second=0, microsecond=0)
+
+
+def popcount(bits: bytes) -> int:
+    """켜진 분(minute) 수"""
+    return bin(int.from_bytes(bits, 'big')).count('1')
+
+
+def split_by_day(start: datetime, end: datetime) -> Iterable[tuple[str, int, int]]:
+    """[start, end] 구간을 KST 날짜별 (day, start_minute, end_minute)로 분할"""
+    if end < start:
+        return
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= end:
+        next_day = day + timedelta(days=1)
+        seg_start = max(start, day)
+        seg_end = min(end, next_day - timedelta(minutes=1))
+        start_minute = seg_start.hour * 60 + seg_start.minute
+        end_minute = seg_end.hour * 60 + seg_end.minute
+        if end_minute >= start_minute:
+            yield day.strftime('%Y-%m-%d'), start_minute, end_minute
+        day = next_day
+
+
+def sum_bitmaps(bitmaps: list[bytes]) -> list[int]:
+    """분별 온라인 컴퓨터 수 (길이 1440)
+
+    numpy가 있으면 unpackbits + sum으로 한 번에 계산한다.
+    """
+    if not bitmaps:
+        return [0] * MINUTES_PER_DAY
+
+    if HAS_NUMPY:
+        matrix = np.frombuffer(b''.join(bitmaps), dtype=np.uint8).reshape(len(bitmaps), BITMAP_BYTES)
+        return np.unpackbits(matrix, axis=1).sum(axis=0, dtype=np.int32).tolist()
+
+    counts = [0] * MINUTES_PER_DAY
+    for bits in bitmaps:
+        if not any(bits):
+            continue
+        for byte_index, value in enumerate(bits):
+            if not value:
+                continue
+            base = byte_index * 8
+            for offset, bit in enumerate(_BYTE_BITS[value]):
+                if bit:
+                    counts[base + offset] += 1
+    return counts
+
+
+def bucket_curve(counts: list[int], step: int) -> list[dict]:
+    """분별 카운트를 step분 단위로 묶음 (구간 내 최댓값)"""
+    curve = []
+    for start in range(0, MINUTES_PER_DAY, step):
+        window = counts[start:start + step]
+        curve.append({
+            'time': f'{start // 60:02d}:{start % 60:02d}',
+            'count': max(window) if window else 0
+        })
+    return curve
+
+
+def parse_minute(value: str) -> Optional[int]:
+    """'HH:MM' → 0~1439, 형식 오류 시 None"""
+    try:
+        hour, minute = value.split(':')
+        hour, minute = int(hour), int(minute)
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
@@ -0,0 +1,276 @@
+"""요청 단위 CPU 샘플링 프로파일러 (관리자 전용)
+
+서버 재시작 없이 특정 요청 하나, 또는 특정 라우트의 N번째 요청마다 프로파일을 남긴다.
+
+- 요청 지정: 로그인 세션이 유효한 요청에 X-Profile: 1 헤더 또는 __profile=1 쿼리
+  → 응답 X-Profile-Id 헤더의 ID로 /api/admin/profiles/{id} 조회
+- 롤링 모드: configure(route, every) → 해당 라우트의 every번째 요청마다 기록
+- 샘플링: 엔드포인트를 실행하는 스레드의 호출 스택을 INTERVAL_MS마다 읽어 집계
+  (sys._current_frames, 대상 코드 수정/트레이싱 훅 없음)
+- 결과: folded stack 텍스트 ("바깥;...;안쪽 샘플수" 한 줄씩) - flamegraph.pl, speedscope, inferno 호환
+- 보관: PROFILE_DIR에 최근 MAX_PROFILES개만 유지 (오래된 파일부터 삭제)
+"""
+
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+PROFILE_DIR = Path(os.environ.get("COMPUTEROFF_PROFILE_DIR", Path(__file__).parent / "profiles"))
+# 디스크에 보관하는 최대 프로파일 수
+MAX_PROFILES = int(os.environ.get("COMPUTEROFF_PROFILE_MAX_FILES", 50))
+# 샘플 간격 (ms)
+INTERVAL_MS = float(os.environ.get("COMPUTEROFF_PROFILE_INTERVAL_MS", 1))
+# 한 요청 최대 프로파일 시간 (초) - 넘으면 샘플링만 중단
+MAX_DURATION_SECONDS = 60
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "__profile"
+
+_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+
+# 미들웨어가 요청 지정 프로파일을 엔드포인트 스레드로 넘기는 컨텍스트
+_requested: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar("profile_request", default=None)
+
+
+class Profile:
+    """샘플링 결과 (folded stack → 샘플 수)"""
+
+    def __init__(self, source: str):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+        self.source = source  # request / rolling
+        self.route: Optional[str] = None
+        self.stacks: dict[str, int] = {}
+        self.samples = 0
+        self.duration_ms = 0.0
+        self.created_at = time.time()
+        self.saved = False
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in
+                       sorted(self.stacks.items(), key=lambda item: -item[1]))
+
+    def meta(self) -> dict:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "route": self.route,
+            "samples": self.samples,
+            "duration_ms": round(self.duration_ms, 3),
+            "created_at": self.created_at,
+        }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler:
+    """대상 스레드 하나의 스택을 주기적으로 읽는 스레드"""
+
+    def __init__(self, profile: Profile, thread_id: int, interval: float):
+        self._profile = profile
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="request-profiler")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        stacks = self._profile.stacks
+        deadline = time.monotonic() + MAX_DURATION_SECONDS
+        while not self._stop.wait(self._interval) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                return
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stack = ";".join(reversed(labels))
+            stacks[stack] = stacks.get(stack, 0) + 1
+            self._profile.samples += 1
+
+
+class RequestProfiler:
+    def __init__(self, directory: Path = PROFILE_DIR, max_profiles: int = MAX_PROFILES,
+                 interval_ms: float = INTERVAL_MS):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self.interval = interval_ms / 1000
+        self._index: deque = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+        # 롤링 모드 설정
+        self.rolling_route: Optional[str] = None
+        self.rolling_every = 0
+        self._rolling_counter = itertools.count(1)
+
+    # ==================== 설정 / 조회 ====================
+
+    def configure(self, route: Optional[str], every: int) -> dict:
+        """롤링 모드 설정 (route=None 또는 every=0이면 끔)"""
+        if every < 0:
+            raise ValueError("every는 0 이상이어야 합니다")
+        self.rolling_route = route if route and every else None
+        self.rolling_every = every if route else 0
+        self._rolling_counter = itertools.count(1)
+        return self.status()
+
+    def status(self) -> dict:
+        return {
+            "rolling_route": self.rolling_route,
+            "rolling_every": self.rolling_every,
+            "interval_ms": self.interval * 1000,
+            "max_profiles": self.max_profiles,
+        }
+
+    def list_profiles(self) -> list[dict]:
+        """최근 프로파일 메타데이터 (최신순, 이번 프로세스 시작 이후)"""
+        with self._lock:
+            return [profile.meta() for profile in reversed(self._index)]
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not _ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    # ==================== 기록 ====================
+
+    def _rolling_due(self, route: str) -> bool:
+        return route == self.rolling_route and next(self._rolling_counter) % self.rolling_every == 0
+
+    def _save(self, profile: Profile):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile.id}.folded").write_text(profile.folded(), encoding="utf-8")
+        profile.saved = True
+        with self._lock:
+            self._index.append(profile)
+        self._prune()
+
+    def _prune(self):
+        # 같은 초에 만든 ID는 이름 순서가 생성 순서와 다르므로 수정 시각 기준
+        files = sorted(self.directory.glob("*.folded"), key=lambda path: (path.stat().st_mtime_ns, path.name))
+        for path in files[:max(0, len(files) - self.max_profiles)]:
+            path.unlink(missing_ok=True)
+
+    def wrap_endpoint(self, call: Callable, route: str) -> Callable:
+        """엔드포인트 함수 래핑: 요청 지정 또는 롤링 차례일 때만 샘플러 실행"""
+        def begin() -> Optional[tuple]:
+            profile = _requested.get()
+            if profile is None:
+                if not (self.rolling_every and self._rolling_due(route)):
+                    return None
+                profile = Profile("rolling")
+            profile.route = route
+            sampler = _Sampler(profile, threading.get_ident(), self.interval)
+            sampler.start()
+            return profile, sampler, time.perf_counter()
+
+        def end(state: tuple):
+            profile, sampler, started = state
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                self._save(profile)
+            except OSError as e:
+                print(f"[Profiler Error] 저장 실패: {e}")
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def async_wrapper(*args, **kwargs):
+                state = begin()
+                if state is None:
+                    return await call(*args, **kwargs)
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    end(state)
+            return async_wrapper
+
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            state = begin()
+            if state is None:
+                return call(*args, **kwargs)
+            try:
+                return call(*args, **kwargs)
+            finally:
+                end(state)
+        return wrapper
+
+
+# ==================== ASGI 미들웨어 ====================
+
+def _profile_flag(scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == PROFILE_HEADER:
+            return value in (b"1", b"true")
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY.encode() not in query:
+        return False
+    return parse_qs(query.decode("latin-1")).get(PROFILE_QUERY, [""])[0] in ("1", "true")
+
+
+def _session_cookie(scope) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get("session")
+            return morsel.value if morsel else None
+    return None
+
+
+class ProfilerMiddleware:
+    """X-Profile / __profile 요청을 세션 검증 후 프로파일 대상으로 표시 (순수 ASGI)
+
+    표시가 없거나 세션이 유효하지 않으면 아무 것도 하지 않는다 (일반 요청 비용: 헤더 순회 1회).
+    """
+
+    def __init__(self, app, validate_session: Callable[[str], bool]):
+        self.app = app
+        self.validate_session = validate_session
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_flag(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = _session_cookie(scope)
+        if not session or not await asyncio.to_thread(self.validate_session, session):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile("request")
+        token = _requested.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and profile.saved:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode("ascii"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _requested.reset(token)
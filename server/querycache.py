@@ -0,0 +1,130 @@
+"""대시보드 조회 결과 캐시 (짧은 TTL + 동시 요청 합치기)
+
+관리자 여러 명의 대시보드가 같은 순간에 폴링하면 get_daily_summary_json(30),
+get_shutdown_timeline(7) 같은 같은 조회가 동시에 중복 실행된다.
+
+- 키: (메서드 이름, 인자). 항목마다 계산 시작 시점의 데이터 버전(backend.get_data_version)을
+  같이 저장하고, 조회 시 버전이 바뀌었으면(관련 쓰기 커밋) 미스로 처리 → 쓰기 즉시 무효화.
+  버전은 DB 값이므로 다른 워커 프로세스의 쓰기도 바로 반영된다
+- TTL(기본 5초): 시간 경과로 바뀌는 값(온라인 상태, 오늘 사용 시간)을 반영하는 상한
+- 동시 미스 합치기(single-flight): 같은 키·같은 버전을 이미 계산 중이면 그 결과를 기다려 공유
+- 결과 객체는 요청 간에 공유되므로 호출 측에서 수정하면 안 된다
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import metrics
+
+# 결과 유지 시간 (초, 0이면 캐시 끔) / 최대 항목 수
+TTL_SECONDS = float(os.environ.get("COMPUTEROFF_QUERY_CACHE_TTL", 5))
+MAX_ENTRIES = int(os.environ.get("COMPUTEROFF_QUERY_CACHE_MAX_ENTRIES", 256))
+
+# 캐시 대상 백엔드 메서드 → 무효화 기준 데이터 버전 범위
+# ('events': 하트비트 제외 쓰기, 'data': 하트비트 포함 모든 쓰기 - 점유 비트맵은 하트비트가 씀)
+CACHED_METHODS = {
+    "get_computers": "data",
+    "get_dashboard_snapshot": "data",
+    "get_daily_stats": "events",
+    "get_computer_history_json": "events",
+    "get_shutdown_timeline": "events",
+    "get_daily_summary": "events",
+    "get_daily_summary_json": "events",
+    "get_computer_daily_summary": "events",
+    "get_all_events_timeline": "events",
+    "get_occupancy_at": "data",
+    "get_occupancy_curve": "data",
+}
+
+
+class _Flight:
+    """계산 중인 조회 하나 (기다리는 요청은 done 이벤트 대기)"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class QueryCache:
+    def __init__(self, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key → (version, expires_at, result)
+        self._entries: OrderedDict = OrderedDict()
+        # (key, version) → _Flight
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, version: int, compute: Callable):
+        """version: 호출 시점의 데이터 버전 (저장된 항목과 다르면 미스)"""
+        label = key[0]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                metrics.QUERY_CACHE.inc(label, "hit")
+                return entry[2]
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+
+        if not leader:
+            metrics.QUERY_CACHE.inc(label, "coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        metrics.QUERY_CACHE.inc(label, "miss")
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[(key, version)]
+                if flight.error is None:
+                    self._entries[key] = (version, time.monotonic() + self.ttl, flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def status(self) -> dict:
+        return {"ttl_seconds": self.ttl, "max_entries": self.max_entries, "entries": len(self._entries)}
+
+
+class CachedBackend:
+    """CACHED_METHODS 호출을 QueryCache로 감싸는 StorageBackend 프록시 (나머지는 그대로 위임)"""
+
+    def __init__(self, backend, cache: QueryCache):
+        self._backend = backend
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        value = getattr(self._backend, name)
+        scope = CACHED_METHODS.get(name)
+        if scope is not None:
+            method = value
+
+            def value(*args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                version = self._backend.get_data_version(scope)
+                return self.cache.get_or_compute(key, version, lambda: method(*args, **kwargs))
+
+        self.__dict__[name] = value
+        return value
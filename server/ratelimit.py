@@ -0,0 +1,178 @@
+"""Agent 엔드포인트 토큰 버킷 Rate Limiting (computer_name 기준 + IP 상한)
+
+사무실 PC들은 대부분 NAT 뒤에서 같은 공인 IP로 접속하므로 IP 기준 제한(slowapi)은
+사무실 전체가 한도를 나눠 쓰게 된다. Agent 엔드포인트는 검증된 computer_name마다
+토큰 버킷을 두고, IP에는 사무실 단위의 넉넉한 상한만 건다.
+
+- 버킷: 분당 N회 = 초당 N/60개 충전, 최대 N개 적립 (기존 slowapi 한도와 같은 숫자)
+- 저장: key → (토큰, 마지막 갱신 시각) OrderedDict, 최근 사용 순서 유지
+- 축출: 테이블이 차면 가장 오래 쉰 버킷 하나만 비운다. 그 버킷이 가득 찰 만큼 쉬었으면
+  잊어도 결과가 같고, 아니면 테이블이 사용 중 버킷으로 가득 찬 것이므로 MAX_ENTRIES를 늘려야 한다
+- 판정: IP 상한과 computer_name 버킷을 락 한 번으로 판정 (Redis는 스크립트 호출 한 번)
+- 다중 워커: COMPUTEROFF_RATELIMIT_REDIS_URL 지정 시 Redis에서 버킷 공유 (redis 패키지 필요).
+  Redis 오류 시 해당 요청은 프로세스 로컬 버킷으로 판정
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Redis 공유 저장소 (선택, 미설치 시 프로세스 로컬 버킷만 사용)
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+# 엔드포인트 종류별 computer_name당 분당 허용 횟수
+AGENT_LIMITS = {
+    "event": 60,
+    "event_batch": 30,
+    "heartbeat": 120,
+    "register": 10,
+    "resync_ack": 30,
+    "last_event": 60,
+}
+
+# IP당 Agent 엔드포인트 전체 분당 상한 (NAT 뒤 사무실 하나 기준)
+IP_LIMIT_PER_MINUTE = int(os.environ.get("COMPUTEROFF_AGENT_IP_LIMIT_PER_MINUTE", 6000))
+
+# 종류별 버킷 테이블 최대 항목 수 (넘으면 축출)
+MAX_ENTRIES = int(os.environ.get("COMPUTEROFF_RATELIMIT_MAX_ENTRIES", 4096))
+
+REDIS_URL = os.environ.get("COMPUTEROFF_RATELIMIT_REDIS_URL", "")
+REDIS_PREFIX = "computeroff:rl:"
+
+
+class TokenBucketTable:
+    """프로세스 로컬 토큰 버킷 테이블
+
+    lock을 넘기면 여러 테이블이 같은 락을 쓴다 (AgentRateLimiter가 한 번의 락으로 여러 버킷 판정).
+    """
+
+    def __init__(self, per_minute: int, max_entries: int = MAX_ENTRIES, lock: Optional[threading.Lock] = None):
+        if per_minute <= 0 or max_entries <= 0:
+            raise ValueError("per_minute와 max_entries는 1 이상이어야 합니다")
+        self.rate = per_minute / 60.0
+        self.burst = float(per_minute)
+        self.max_entries = max_entries
+        # key → (토큰, 마지막 갱신 시각), 오래 쉰 순서
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = lock or threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str, now: Optional[float] = None, _monotonic=time.monotonic) -> float:
+        """토큰 1개 사용 시도. 허용이면 0.0, 거부면 다음 토큰까지 남은 초"""
+        if now is None:
+            now = _monotonic()
+        with self._lock:
+            return self._take(key, now)
+
+    def _take(self, key: str, now: float) -> float:
+        """acquire 본체 (락 보유 상태에서 호출)"""
+        buckets = self._buckets
+        state = buckets.get(key)
+        if state is None:
+            if len(buckets) >= self.max_entries:
+                buckets.popitem(last=False)
+            tokens = self.burst
+        else:
+            buckets.move_to_end(key)
+            tokens = state[0] + (now - state[1]) * self.rate
+            if tokens > self.burst:
+                tokens = self.burst
+        if tokens >= 1.0:
+            buckets[key] = (tokens - 1.0, now)
+            return 0.0
+        buckets[key] = (tokens, now)
+        return (1.0 - tokens) / self.rate
+
+
+# KEYS[i]: 버킷 키 / ARGV[2i-1], ARGV[2i]: 그 버킷의 초당 충전량, 최대 적립량
+# 앞에서부터 판정하고 거부된 버킷에서 멈춤 (뒤 버킷의 토큰은 쓰지 않음)
+# 반환: 0 이면 모두 허용, 아니면 거부된 버킷의 다음 토큰까지 남은 밀리초
+_REDIS_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'stamp')
+  local tokens = burst
+  if state[1] then
+    tokens = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+  end
+  local wait = 0
+  if tokens >= 1 then
+    tokens = tokens - 1
+  else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+  end
+  redis.call('HSET', key, 'tokens', tostring(tokens), 'stamp', tostring(now))
+  redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000))
+  if wait > 0 then
+    return wait
+  end
+end
+return 0
+"""
+
+
+class AgentRateLimiter:
+    """Agent 엔드포인트 판정: IP 상한 → computer_name 버킷
+
+    로컬 버킷은 모든 테이블이 락 하나를 공유하여 한 요청의 판정을 락 한 번으로 끝낸다.
+    Redis를 쓰면 한 요청의 버킷들을 스크립트 호출 한 번으로 판정하고,
+    Redis 오류 시 로컬 버킷으로 판정하여 Redis 장애가 Agent 요청 실패로 번지지 않게 한다.
+    """
+
+    def __init__(self, limits: dict = AGENT_LIMITS, ip_per_minute: int = IP_LIMIT_PER_MINUTE,
+                 max_entries: int = MAX_ENTRIES, redis_url: str = REDIS_URL):
+        self._lock = threading.Lock()
+        self._ip = TokenBucketTable(ip_per_minute, max_entries, self._lock)
+        self._agents = {
+            kind: TokenBucketTable(per_minute, max_entries, self._lock)
+            for kind, per_minute in limits.items()
+        }
+
+        self._script = None
+        if redis_url:
+            if HAS_REDIS:
+                client = redis.Redis.from_url(redis_url, socket_timeout=0.2)
+                self._script = client.register_script(_REDIS_ACQUIRE_SCRIPT)
+                print("[RateLimit] Redis 공유 버킷 사용")
+            else:
+                print("[RateLimit] redis 패키지 미설치 - 프로세스 로컬 버킷 사용")
+
+    def check(self, ip: str, kind: str, *computer_names: str) -> float:
+        """IP 상한 → 검증된 computer_name별 버킷 순서로 판정 (허용이면 0.0, 거부면 Retry-After 초)
+
+        먼저 거부된 단계에서 멈추므로 거부된 요청은 뒤 버킷의 토큰을 쓰지 않는다.
+        """
+        if self._script is not None:
+            try:
+                return self._check_redis(ip, kind, computer_names)
+            except Exception as e:
+                print(f"[RateLimit Error] Redis 판정 실패, 로컬 버킷 사용: {e}")
+
+        now = time.monotonic()
+        table = self._agents[kind]
+        with self._lock:
+            retry_after = self._ip._take(ip, now)
+            if retry_after:
+                return retry_after
+            for computer_name in computer_names:
+                retry_after = table._take(computer_name, now)
+                if retry_after:
+                    return retry_after
+        return 0.0
+
+    def _check_redis(self, ip: str, kind: str, computer_names: tuple) -> float:
+        table = self._agents[kind]
+        keys = [f"{REDIS_PREFIX}ip:{ip}"] + [f"{REDIS_PREFIX}{kind}:{name}" for name in computer_names]
+        args = [self._ip.rate, self._ip.burst] + [table.rate, table.burst] * len(computer_names)
+        return int(self._script(keys=keys, args=args)) / 1000.0
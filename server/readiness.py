@@ -0,0 +1,94 @@
+"""준비 상태 확인 (/api/ready, 로드밸런서용)
+
+/api/health는 프로세스가 살아 있는지만 보므로 DB 잠금·디스크 가득 참 상태에서도 200이다.
+여기서는 실제 읽기/쓰기 왕복과 부하 지표를 확인하고, 하나라도 기준을 넘으면 준비 안 됨(503)으로 본다.
+
+- db: settings 행 하나 갱신·커밋 후 재조회 (잠금은 DB_TIMEOUT_MS까지만 대기), 왕복 시간
+- wal_bytes / checkpoint_lag_frames: SQLite WAL 크기 / 체크포인트로 옮기지 못한 프레임 수
+- jobs: 주기 작업 정체 (마지막 정상 처리 후 경과 시간이 작업별 기준 초과)
+- ingest_in_flight: 처리 중인 Agent 이벤트 + 하트비트 요청 수
+- p99_ms: 최근 60초 요청 처리 시간 p99
+
+여러 로드밸런서가 몇 초마다 호출해도 DB 쓰기가 몰리지 않도록 결과를 CACHE_SECONDS 동안 재사용하고,
+동시에 들어온 확인은 하나만 실행한다.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+import admission
+import metrics
+
+# 기준값 (넘으면 503)
+MAX_DB_MS = float(os.environ.get("COMPUTEROFF_READY_MAX_DB_MS", 1000))
+MAX_WAL_BYTES = int(float(os.environ.get("COMPUTEROFF_READY_MAX_WAL_MB", 256)) * 1024 * 1024)
+MAX_CHECKPOINT_LAG_FRAMES = int(os.environ.get("COMPUTEROFF_READY_MAX_CHECKPOINT_LAG", 50000))
+MAX_INGEST_IN_FLIGHT = int(os.environ.get("COMPUTEROFF_READY_MAX_INGEST_IN_FLIGHT", 80))
+MAX_P99_MS = float(os.environ.get("COMPUTEROFF_READY_MAX_P99_MS", 2000))
+
+# DB 잠금 대기 상한 (ms) / 결과 재사용 시간 (초)
+DB_TIMEOUT_MS = 2000
+CACHE_SECONDS = 1.0
+
+
+def _threshold(value, limit) -> dict:
+    """값이 없으면(해당 없음) 통과"""
+    return {"ok": value is None or value <= limit, "value": value, "limit": limit}
+
+
+class ReadinessChecker:
+    def __init__(self, backend, job_scheduler, controller: admission.AdmissionController):
+        self._backend = backend
+        self._scheduler = job_scheduler
+        self._controller = controller
+        self._lock = threading.Lock()
+        self._cached: Optional[tuple[float, bool, dict]] = None
+
+    def check(self) -> tuple[bool, dict]:
+        """(준비 여부, 항목별 결과)"""
+        cached = self._cached
+        if cached is not None and time.monotonic() - cached[0] < CACHE_SECONDS:
+            return cached[1], cached[2]
+        with self._lock:
+            cached = self._cached
+            if cached is not None and time.monotonic() - cached[0] < CACHE_SECONDS:
+                return cached[1], cached[2]
+            ready, report = self._evaluate()
+            # 상태가 바뀔 때만 로그 (매 확인마다 찍지 않음)
+            if cached is None or cached[1] != ready:
+                print(f"[Ready] {report['status']}" + (f": {', '.join(report['failed'])}" if report['failed'] else ""))
+            self._cached = (time.monotonic(), ready, report)
+            return ready, report
+
+    def _evaluate(self) -> tuple[bool, dict]:
+        checks = {}
+
+        started = time.perf_counter()
+        try:
+            probe = self._backend.probe_storage(DB_TIMEOUT_MS)
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+            checks["db"] = {**_threshold(elapsed_ms, MAX_DB_MS),
+                            "read_ms": probe["read_ms"], "write_ms": probe["write_ms"]}
+            checks["wal_bytes"] = _threshold(probe["wal_bytes"], MAX_WAL_BYTES)
+            checks["checkpoint_lag_frames"] = _threshold(probe["checkpoint_lag_frames"], MAX_CHECKPOINT_LAG_FRAMES)
+        except Exception as e:
+            checks["db"] = {"ok": False, "error": f"{type(e).__name__}: {e}", "limit": MAX_DB_MS}
+
+        stale = {}
+        for name, (since_ok, limit) in self._scheduler.staleness().items():
+            if since_ok > limit:
+                stale[name] = {"since_ok_seconds": round(since_ok, 1), "limit_seconds": round(limit, 1)}
+        checks["jobs"] = {"ok": not stale, "stale": stale}
+
+        in_flight = self._controller.in_flight
+        checks["ingest_in_flight"] = _threshold(
+            in_flight[admission.EVENT] + in_flight[admission.HEARTBEAT], MAX_INGEST_IN_FLIGHT)
+
+        p99 = metrics.RECENT_LATENCY.percentile(0.99)
+        checks["p99_ms"] = _threshold(round(p99 * 1000, 3) if p99 is not None else None, MAX_P99_MS)
+
+        failed = [name for name, result in checks.items() if not result["ok"]]
+        ready = not failed
+        return ready, {"status": "ready" if ready else "not_ready", "failed": failed, "checks": checks}
@@ -0,0 +1,301 @@
+"""JSON 응답 직렬화 및 압축
+
+- FastJSONResponse: orjson 기반 기본 응답 클래스 (orjson 없으면 표준 json)
+- RawJSON / json_response: DB가 만든 JSON 배열 바이트(database.*_json)를 재인코딩 없이 응답에 삽입
+- CompressionMiddleware: 임계값 이상 응답을 brotli(가능 시) 또는 gzip으로 압축 (순수 ASGI)
+- PrecompressedStaticFiles: 빌드 때 미리 압축해 둔 정적 파일 서빙 + 캐시 헤더 (assets.py)
+- ranged_file_response: Range / If-Range / If-None-Match를 지원하는 파일 다운로드 응답
+"""
+
+import gzip
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+import assets
+
+# orjson 임포트 (없으면 표준 json 폴백)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# brotli 임포트 (없으면 gzip만 사용)
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+# 이 크기(바이트) 미만 응답은 압축하지 않음 (압축 이득보다 CPU 비용이 큼)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# 압축하지 않는 Content-Type (스트리밍/이미 압축된 형식)
+_SKIP_CONTENT_TYPES = ("text/event-stream", "application/octet-stream", "image/", "application/zip")
+
+
+def dumps(content) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 직렬화 응답 (datetime은 ISO 8601 문자열)"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class RawJSON(bytes):
+    """이미 직렬화된 JSON 조각 (json_response에서 그대로 삽입)"""
+
+
+def encode_envelope(content: dict) -> bytes:
+    """최상위 dict 직렬화 - RawJSON 값은 재인코딩 없이 삽입"""
+    parts = []
+    for key, value in content.items():
+        encoded = bytes(value) if isinstance(value, RawJSON) else dumps(value)
+        parts.append(dumps(key) + b':' + encoded)
+    return b'{' + b','.join(parts) + b'}'
+
+
+def json_response(content: dict, headers: Optional[dict] = None) -> Response:
+    """RawJSON 값을 포함할 수 있는 dict → JSON 응답 (FastAPI 인코더 우회)"""
+    return Response(encode_envelope(content), media_type="application/json", headers=headers)
+
+
+# ==================== 압축 미들웨어 ====================
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Accept-Encoding 파싱 (q=0 제외)"""
+    accepted = set()
+    for token in accept_encoding.split(","):
+        name, _, params = token.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name)
+    return accepted
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """단일 본문 응답을 크기 임계값 이상일 때 압축
+
+    스트리밍 응답(more_body), 이미 인코딩된 응답, SSE 등은 그대로 통과시킨다.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if HAS_BROTLI and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or content_type.startswith(_SKIP_CONTENT_TYPES)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ==================== 정적 파일 ====================
+
+# 파일명 지문이 붙은 파일 (내용이 바뀌면 이름이 바뀜) / 그 외 (매번 ETag 재검증)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """정적 파일 서빙 - Accept-Encoding에 맞는 압축본(.br/.gz)이 있으면 그대로 전송
+
+    immutable_dir 아래 파일(assets.build()의 지문 파일)은 immutable, 나머지는 no-cache.
+    압축본 응답은 Content-Encoding이 붙어 있어 CompressionMiddleware가 다시 압축하지 않는다.
+    """
+
+    def __init__(self, *, immutable_dir: Path, **kwargs):
+        super().__init__(**kwargs)
+        self.immutable_dir = Path(immutable_dir).resolve()
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        path = Path(full_path)
+        immutable = path.resolve().is_relative_to(self.immutable_dir) and path.name != assets.INDEX_NAME
+        request_headers = Headers(scope=scope)
+
+        encoding = None
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for name, suffix in assets.ENCODING_SUFFIXES.items():
+            if name not in accepted:
+                continue
+            try:
+                stat_result = os.stat(f"{path}{suffix}")
+            except FileNotFoundError:
+                continue
+            encoding = name
+            break
+        if stat_result is None:
+            stat_result = os.stat(path)
+
+        response = FileResponse(
+            f"{path}{assets.ENCODING_SUFFIXES[encoding]}" if encoding else path,
+            status_code=status_code,
+            media_type=mimetypes.guess_type(path.name)[0] or "text/plain",
+            stat_result=stat_result,
+            method=scope["method"],
+        )
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        response.headers.add_vary_header("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+# ==================== 파일 범위 응답 (이어받기) ====================
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    """요청한 범위가 파일 밖 (416)"""
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Range 헤더 → (시작, 끝) 바이트 위치 (끝 포함)
+
+    없거나 해석할 수 없거나 여러 구간이면 None (전체 전송, RFC 9110에서 허용).
+    범위가 파일 밖이면 RangeNotSatisfiable.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first.isdigit() or last.isdigit()):
+        return None
+    if not first:
+        # bytes=-N: 마지막 N바이트
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    if last and not last.isdigit():
+        return None
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, (min(int(last), size - 1) if last else size - 1)
+
+
+def _read_range(path: Path, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(FILE_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(path: Path, request_headers: Headers, etag: str, filename: str,
+                         media_type: str = "application/octet-stream") -> Response:
+    """파일 다운로드 응답 - 끊긴 다운로드를 Range로 이어받을 수 있음
+
+    etag는 따옴표 포함 강한 ETag. If-Range가 ETag와 다르면(파일이 바뀜) 범위를 무시하고 전체를 보낸다.
+    """
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    byte_range = None
+    if_range = request_headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_byte_range(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_read_range(path, start, end - start + 1),
+                             status_code=status_code, media_type=media_type, headers=headers)
@@ -0,0 +1,173 @@
+"""Agent 업데이트 단계적 배포 (코호트 + 다운로드 슬롯)
+
+새 version.json을 올리면 모든 Agent가 다음 하트비트에서 한꺼번에 /api/agent/download로 몰린다.
+하트비트 응답의 update_available을 두 단계를 통과한 PC에만 내준다.
+
+1. 코호트: (버전, PC 이름) 해시로 0~99 구간을 정하고, 배포 비율(%)보다 작은 PC만 대상.
+   버전마다 해시가 달라 매번 같은 PC가 먼저 받지 않는다.
+   - version.json rollout_percent: 배포 비율 상한 (기본 100)
+   - version.json rollout_ramp_hours: updated_at부터 이 시간에 걸쳐 비율을 0 → 상한으로 늘림
+     (기본 COMPUTEROFF_ROLLOUT_RAMP_HOURS, 0이면 바로 상한)
+2. 다운로드 슬롯: 동시에 다운로드 중인 PC 수를 MAX_SLOTS로 제한 (DB 테이블, 워커 간 공유).
+   슬롯은 SLOT_SECONDS 뒤 만료되고, 그 PC가 새 버전으로 하트비트를 보내면 바로 반납된다.
+
+대상이 아니거나 슬롯이 없으면 update_retry_after(초, 다시 확인할 시점)만 알려 준다.
+version.json에 없거나 EXE가 없는 variant는 슬롯을 잡지 않고 아무것도 알려 주지 않는다
+(받을 수 없는 PC가 슬롯을 차지해 배포가 멈추지 않도록).
+슬롯마다 토큰을 발급해 download_url에 넣고, 유효한 토큰을 가진 다운로드는 IP가 아니라
+슬롯 단위로 Rate Limit을 적용한다 (NAT 공유 IP 대응, 인증 없는 PC 이름은 키로 쓰지 않음).
+"""
+
+import hashlib
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import database
+import metrics
+
+# 동시 다운로드 슬롯 수 / 슬롯 유효 시간 (초)
+MAX_SLOTS = int(os.environ.get("COMPUTEROFF_ROLLOUT_MAX_SLOTS", 5))
+SLOT_SECONDS = float(os.environ.get("COMPUTEROFF_ROLLOUT_SLOT_SECONDS", 600))
+# version.json에 rollout_ramp_hours가 없을 때 기본값 (0 = 바로 rollout_percent까지)
+RAMP_HOURS = float(os.environ.get("COMPUTEROFF_ROLLOUT_RAMP_HOURS", 0))
+
+# 슬롯이 없을 때 update_retry_after 최소값 (초) - 하트비트 주기보다 짧게 알려 줄 필요 없음
+MIN_RETRY_AFTER = 60
+
+# /api/agent/download가 내려주는 variant
+AGENT_VARIANTS = ("x64", "x86", "win7_x64")
+
+# 슬롯 토큰 형식 (secrets.token_urlsafe(16) = 22자)
+DOWNLOAD_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def agent_exe_name(variant: str) -> str:
+    """variant의 배포 EXE 파일 이름 (agent_updates/ 아래)"""
+    return f"agent_windows_{variant}.exe"
+
+
+def is_downloadable(version_info: dict, variant: Optional[str], updates_dir: Path) -> bool:
+    """이 variant를 지금 내려받을 수 있는지 (version.json에 있고 EXE가 있음)"""
+    return (
+        variant in AGENT_VARIANTS
+        and variant in (version_info.get("variants") or {})
+        and (updates_dir / agent_exe_name(variant)).exists()
+    )
+
+
+def cohort_bucket(version: str, computer_name: str) -> int:
+    """(버전, PC 이름) → 0~99 (버전마다 다른 순서)"""
+    digest = hashlib.sha256(f"{version}:{computer_name.lower()}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % 100
+
+
+def _percent_cap(version_info: dict) -> float:
+    try:
+        return min(100.0, max(0.0, float(version_info.get("rollout_percent", 100))))
+    except (TypeError, ValueError):
+        return 100.0
+
+
+def _ramp_hours(version_info: dict) -> float:
+    try:
+        return max(0.0, float(version_info.get("rollout_ramp_hours", RAMP_HOURS)))
+    except (TypeError, ValueError):
+        return RAMP_HOURS
+
+
+def _published_at(version_info: dict) -> Optional[datetime]:
+    """version.json updated_at (build.bat이 빌드 PC 시각으로 기록 → naive KST로 취급)"""
+    try:
+        published = datetime.fromisoformat(version_info["updated_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if published.tzinfo is not None:
+        published = published.astimezone(database.KST).replace(tzinfo=None)
+    return published
+
+
+def rollout_percent(version_info: dict, now: Optional[datetime] = None) -> float:
+    """현재 배포 비율 (0~100)"""
+    percent = _percent_cap(version_info)
+    ramp = _ramp_hours(version_info)
+    published = _published_at(version_info)
+    if ramp <= 0 or published is None:
+        return percent
+    now = now or datetime.now(database.KST).replace(tzinfo=None)
+    elapsed_hours = max(0.0, (now - published).total_seconds() / 3600)
+    return min(percent, 100.0 * elapsed_hours / ramp)
+
+
+def _cohort_wait_seconds(version_info: dict, bucket: int, now: datetime) -> Optional[float]:
+    """비율이 늘어나 이 구간이 대상이 될 때까지 초 (상한에 막혀 있으면 None)"""
+    ramp = _ramp_hours(version_info)
+    published = _published_at(version_info)
+    if ramp <= 0 or published is None or bucket >= _percent_cap(version_info):
+        return None
+    eligible_at = ramp * 3600 * (bucket + 1) / 100
+    return max(0.0, eligible_at - (now - published).total_seconds())
+
+
+def offer_update(backend, version_info: dict, computer_name: str, agent_variant: str,
+                 updates_dir: Path) -> dict:
+    """하트비트 응답에 넣을 업데이트 안내 (최신 버전이 아닌 PC에 대해 호출)"""
+    version = version_info["version"]
+    if not is_downloadable(version_info, agent_variant, updates_dir):
+        metrics.UPDATE_OFFERS.inc(version, "unavailable")
+        return {}
+    now = datetime.now(database.KST).replace(tzinfo=None)
+    bucket = cohort_bucket(version, computer_name)
+    if bucket >= rollout_percent(version_info, now):
+        metrics.UPDATE_OFFERS.inc(version, "cohort_wait")
+        wait = _cohort_wait_seconds(version_info, bucket, now)
+        return {} if wait is None else {"update_retry_after": max(MIN_RETRY_AFTER, round(wait))}
+
+    granted, seconds, token = backend.acquire_download_slot(computer_name, version, MAX_SLOTS, SLOT_SECONDS)
+    if not granted:
+        metrics.UPDATE_OFFERS.inc(version, "slots_full")
+        return {"update_retry_after": max(MIN_RETRY_AFTER, round(seconds))}
+
+    metrics.UPDATE_OFFERS.inc(version, "granted")
+    return {
+        "update_available": True,
+        "latest_version": version,
+        "download_url": f"/api/agent/download/{agent_variant}?token={token}",
+        "download_slot_expires_in": round(seconds),
+    }
+
+
+def slot_holder(backend, token: Optional[str]) -> Optional[str]:
+    """다운로드 요청의 토큰이 유효한 슬롯이면 그 PC 이름 (Rate Limit 키 선택용)"""
+    if not token or not DOWNLOAD_TOKEN_PATTERN.match(token):
+        return None
+    slot = backend.get_download_slot(token)
+    return slot["computer_name"] if slot else None
+
+
+def status(backend, version_info: Optional[dict]) -> dict:
+    """배포 진행 상황 (관리자 API)"""
+    progress = backend.get_rollout_progress()
+    versions = progress["agent_versions"]
+    total = sum(versions.values())
+    result = {
+        "max_slots": MAX_SLOTS,
+        "slot_seconds": SLOT_SECONDS,
+        "agents": total,
+        "agent_versions": versions,
+        "active_slots": progress["slots"],
+    }
+    if version_info and version_info.get("version"):
+        version = version_info["version"]
+        updated = versions.get(version, 0)
+        result.update({
+            "version": version,
+            "rollout_percent": round(rollout_percent(version_info), 1),
+            "rollout_ramp_hours": _ramp_hours(version_info),
+            "updated": updated,
+            "pending": total - updated,
+            "progress_percent": round(100.0 * updated / total, 1) if total else 0.0,
+        })
+    return result
@@ -0,0 +1,174 @@
+"""주기 작업 스케줄러
+
+등록한 작업을 스케줄러 스레드 하나가 시각에 맞춰 작업별 스레드로 실행한다.
+
+- 간격 + 지터: 다음 실행 = 시작 시각 + interval × (1 ± jitter) → 워커/서버 여러 대의 실행 시점 분산
+- 리더 전용(leader_only): 다중 워커 중 lease를 가진 프로세스만 실행 (leader.LeaderElector)
+- 겹침 방지: 이전 실행이 끝나지 않았으면 이번 차례는 건너뜀 (skipped)
+- 타임아웃: 스레드는 강제 종료할 수 없으므로 초과 시 경고 + 오류 집계만 하고,
+  끝날 때까지 다음 실행을 막는다 (실행 기록 상태 timeout)
+- 실행 기록: 작업별 최근 HISTORY_SIZE건 (관리자 API), 메트릭: 실행 시간 / 결과별 실행 수 / 오류 수
+- 종료: stop()이 새 실행을 막고 실행 중인 작업을 timeout초까지 기다림
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import metrics
+
+HISTORY_SIZE = 20
+# 스케줄러 스레드 최대 대기 간격 (초) - 타임아웃 감시 주기
+TICK_SECONDS = 1.0
+
+
+class Job:
+    def __init__(self, name: str, func: Callable[[], Optional[str]], interval: float, jitter: float,
+                 timeout: float, leader_only: bool, initial_delay: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.leader_only = leader_only
+        self.next_run = time.monotonic() + initial_delay
+        self.history: deque = deque(maxlen=HISTORY_SIZE)
+        self.thread: Optional[threading.Thread] = None
+        self.started = 0.0  # 현재 실행 시작 (time.monotonic)
+        self.timed_out = False
+        # 마지막으로 정상 처리된 시각 (완료, 또는 리더가 아니어서 맡을 필요 없던 차례)
+        self.last_ok = time.monotonic()
+        # 이 시간 이상 정상 처리가 없으면 정체로 판단 (한 번 놓친 차례까지 허용)
+        self.stale_after = max(initial_delay, interval * (1 + jitter)) + timeout + interval
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def schedule_next(self, now: float):
+        self.next_run = now + self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "timeout_seconds": self.timeout,
+            "leader_only": self.leader_only,
+            "running": self.running,
+            "next_run_in": round(max(0.0, self.next_run - time.monotonic()), 1),
+            "history": list(reversed(self.history)),
+        }
+
+
+class Scheduler:
+    def __init__(self, elector=None):
+        self._elector = elector
+        self._jobs: dict[str, Job] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, func: Callable[[], Optional[str]], interval: float, *,
+                 jitter: float = 0.1, timeout: Optional[float] = None, leader_only: bool = True,
+                 initial_delay: Optional[float] = None):
+        """작업 등록 (start() 전에 호출)
+
+        func가 문자열을 반환하면 실행 기록의 detail에 남는다.
+        timeout 기본값은 interval, initial_delay 기본값은 interval (시작 직후 몰림 방지).
+        """
+        if name in self._jobs:
+            raise ValueError(f"이미 등록된 작업입니다: {name}")
+        if interval <= 0 or not 0 <= jitter < 1:
+            raise ValueError("interval은 0보다 크고 jitter는 0 이상 1 미만이어야 합니다")
+        self._jobs[name] = Job(
+            name, func, interval, jitter,
+            timeout if timeout is not None else interval,
+            leader_only,
+            initial_delay if initial_delay is not None else interval,
+        )
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="scheduler")
+        self._thread.start()
+        print(f"[Scheduler] 시작: {', '.join(f'{job.name}({job.interval:.0f}초)' for job in self._jobs.values())}")
+
+    def stop(self, timeout: float = 10.0):
+        """새 실행 중지 + 실행 중인 작업 완료 대기 (최대 timeout초)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=TICK_SECONDS * 2)
+            self._thread = None
+        deadline = time.monotonic() + timeout
+        for job in self._jobs.values():
+            if job.running:
+                job.thread.join(timeout=max(0.0, deadline - time.monotonic()))
+                if job.running:
+                    print(f"[Scheduler] 종료 대기 시간 초과 - 실행 중인 작업 남음: {job.name}")
+
+    def status(self) -> list[dict]:
+        return [job.status() for job in self._jobs.values()]
+
+    def staleness(self) -> dict[str, tuple[float, float]]:
+        """작업별 (마지막 정상 처리 후 경과 초, 정체 판단 기준 초)"""
+        now = time.monotonic()
+        return {job.name: (now - job.last_ok, job.stale_after) for job in self._jobs.values()}
+
+    # ==================== 실행 ====================
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self._jobs.values():
+                if job.running:
+                    if not job.timed_out and now - job.started > job.timeout:
+                        job.timed_out = True
+                        print(f"[Scheduler] 작업 시간 초과: {job.name} ({job.timeout:.0f}초 경과, 계속 실행 중)")
+                if job.next_run <= now:
+                    self._dispatch(job, now)
+            next_due = min((job.next_run for job in self._jobs.values()), default=now + TICK_SECONDS)
+            self._stop.wait(min(TICK_SECONDS, max(0.0, next_due - time.monotonic())))
+
+    def _dispatch(self, job: Job, now: float):
+        job.schedule_next(now)
+        if job.running:
+            self._record(job, time.time(), 0.0, "skipped", "이전 실행이 끝나지 않음")
+            return
+        if job.leader_only and self._elector is not None and not self._elector.is_leader:
+            job.last_ok = now
+            return
+        job.started = now
+        job.timed_out = False
+        job.thread = threading.Thread(target=self._execute, args=(job,), daemon=True, name=f"job-{job.name}")
+        job.thread.start()
+
+    def _execute(self, job: Job):
+        started_at = time.time()
+        started = time.perf_counter()
+        status, detail = "ok", None
+        try:
+            detail = job.func()
+        except Exception as e:
+            status, detail = "error", f"{type(e).__name__}: {e}"
+            print(f"[Scheduler Error] {job.name}: {detail}")
+        duration = time.perf_counter() - started
+        if status == "ok":
+            job.last_ok = time.monotonic()
+            if job.timed_out or duration > job.timeout:
+                status = "timeout"
+        metrics.JOB_DURATION.observe(duration, job.name)
+        if status != "ok":
+            metrics.JOB_ERRORS.inc(job.name)
+        self._record(job, started_at, duration, status, detail)
+
+    @staticmethod
+    def _record(job: Job, started_at: float, duration: float, status: str, detail: Optional[str]):
+        metrics.JOB_RUNS.inc(job.name, status)
+        job.history.append({
+            "started_at": started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "status": status,
+            "detail": detail,
+        })
@@ -0,0 +1,231 @@
+"""SQLite 쿼리 프로파일러 / 느린 쿼리 로그
+
+database.get_connection()이 만든 연결의 cursor()가 켜져 있을 때만 ProfiledCursor를 돌려준다.
+꺼져 있으면 cursor() 호출마다 플래그 하나만 확인하므로 비용이 거의 없다.
+
+- 문(statement)마다: execute + 이후 fetch 시간 합계, 반환 행 수(DML은 변경 행 수), 호출 함수
+- 집계 키: (공백 정리한 SQL, 호출 함수) → 호출 수 / 총 시간 / 최대 시간 / 행 수
+- 느린 쿼리(slow_ms 이상): EXPLAIN QUERY PLAN을 붙여 최근 SLOW_LOG_SIZE건 보관 + JSON 한 줄 출력
+- 실행 중 켜고 끄기: configure() (관리자 API), 시작 시 기본값은 환경 변수
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# 시작 시 프로파일러 활성화 여부 / 느린 쿼리 기준 (ms)
+enabled = os.environ.get("COMPUTEROFF_SQL_PROFILE", "") == "1"
+slow_ms = float(os.environ.get("COMPUTEROFF_SLOW_QUERY_MS", 100))
+
+# 느린 쿼리 로그 보관 건수 / 표시용 SQL 최대 길이
+SLOW_LOG_SIZE = 200
+SQL_DISPLAY_MAX = 2000
+
+# EXPLAIN QUERY PLAN 대상 문 (BEGIN/PRAGMA 등은 계획이 없음)
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# (sql, caller) → [calls, total_seconds, max_seconds, rows]
+_stats: dict[tuple[str, str], list] = {}
+_slow_log: deque = deque(maxlen=SLOW_LOG_SIZE)
+_lock = threading.Lock()
+_since = time.time()
+
+
+def configure(enable: Optional[bool] = None, slow_threshold_ms: Optional[float] = None,
+              reset_stats: bool = False) -> dict:
+    """실행 중 설정 변경 (None인 항목은 유지)"""
+    global enabled, slow_ms
+    if slow_threshold_ms is not None:
+        if slow_threshold_ms < 0:
+            raise ValueError("slow_ms는 0 이상이어야 합니다")
+        slow_ms = float(slow_threshold_ms)
+    if enable is not None:
+        enabled = enable
+    if reset_stats:
+        reset()
+    return status()
+
+
+def reset():
+    global _since
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
+        _since = time.time()
+
+
+def status() -> dict:
+    return {
+        "enabled": enabled,
+        "slow_ms": slow_ms,
+        "since": _since,
+        "statements": len(_stats),
+        "slow_logged": len(_slow_log),
+    }
+
+
+def top(limit: int = 20, order: str = "total") -> list[dict]:
+    """집계 상위 N개 (order: total/max/calls/avg)"""
+    with _lock:
+        items = [(sql, caller, list(values)) for (sql, caller), values in _stats.items()]
+
+    rows = []
+    for sql, caller, (calls, total, maximum, rows_count) in items:
+        rows.append({
+            "sql": sql[:SQL_DISPLAY_MAX],
+            "caller": caller,
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total * 1000 / calls, 3),
+            "max_ms": round(maximum * 1000, 3),
+            "rows": rows_count,
+        })
+    key = {"total": "total_ms", "max": "max_ms", "calls": "calls", "avg": "avg_ms"}[order]
+    rows.sort(key=lambda row: row[key], reverse=True)
+    return rows[:limit]
+
+
+def slow_queries(limit: int = SLOW_LOG_SIZE) -> list[dict]:
+    """최근 느린 쿼리 (최신순)"""
+    with _lock:
+        entries = list(_slow_log)
+    return entries[::-1][:limit]
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def _explain(connection, sql: str, params) -> list[str]:
+    if not sql.lstrip()[:7].upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # 기본 Cursor로 실행 (프로파일 대상에서 제외)
+        cursor = sqlite3.Cursor(connection)
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row[-1] for row in cursor.fetchall()]
+        cursor.close()
+        return plan
+    except sqlite3.Error as e:
+        return [f"(EXPLAIN 실패: {e})"]
+
+
+def _record(connection, sql: str, params, caller: str, seconds: float, rows: int):
+    normalized = _normalize(sql)
+    key = (normalized, caller)
+    with _lock:
+        values = _stats.get(key)
+        if values is None:
+            _stats[key] = [1, seconds, seconds, rows]
+        else:
+            values[0] += 1
+            values[1] += seconds
+            if seconds > values[2]:
+                values[2] = seconds
+            values[3] += rows
+
+    elapsed_ms = seconds * 1000
+    if elapsed_ms < slow_ms:
+        return
+    entry = {
+        "at": time.time(),
+        "caller": caller,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "rows": rows,
+        "sql": normalized[:SQL_DISPLAY_MAX],
+        "plan": _explain(connection, sql, params),
+    }
+    with _lock:
+        _slow_log.append(entry)
+    print(f"[SlowQuery] {json.dumps(entry, ensure_ascii=False)}")
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """문 하나의 실행 + fetch 시간을 합쳐 다음 execute/결과 소진/연결 종료 시 기록"""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        # 생성자로 만든 커서는 연결의 row_factory를 물려받지 않음 (connection.cursor()와 동일하게)
+        self.row_factory = connection.row_factory
+        # [sql, params, caller, seconds, rows]
+        self._pending: Optional[list] = None
+
+    def execute(self, sql, parameters=()):
+        self.finish()
+        caller = sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, caller, time.perf_counter() - started, 0]
+
+    def executemany(self, sql, seq_of_parameters):
+        self.finish()
+        caller = sys._getframe(1).f_code.co_name
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            first = seq_of_parameters[0] if seq_of_parameters else ()
+            self._pending = [sql, first, caller, time.perf_counter() - started, 0]
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        pending = self._pending
+        if pending is not None:
+            pending[3] += time.perf_counter() - started
+            if row is None:
+                self.finish()
+            else:
+                pending[4] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        pending = self._pending
+        if pending is not None:
+            pending[3] += time.perf_counter() - started
+            pending[4] += len(rows)
+            if not rows:
+                self.finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        pending = self._pending
+        if pending is not None:
+            pending[3] += time.perf_counter() - started
+            pending[4] += len(rows)
+            self.finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self.finish()
+        super().close()
+
+    def finish(self):
+        """진행 중인 문 기록 (결과를 끝까지 읽지 않은 문도 연결 종료 전에 호출됨)"""
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, params, caller, seconds, rows = pending
+        if not rows and self.rowcount > 0:
+            rows = self.rowcount
+        _record(self.connection, sql, params, caller, seconds, rows)
@@ -7,14 +7,42 @@ let displayNameMap = {};  // hostname -> display_name 매핑
 let historyViewMode = 'summary';  // 'summary' or 'detail'
 let csrfToken = null;  // CSRF 토큰 저장
 
+// 대시보드 데이터 캐시: 연결(재연결) 시 /api/dashboard/snapshot 한 번으로 전체 조회,
+// 이후 /api/stream 메시지로 증분 반영
+const TIMELINE_LIMIT = 100;
+let computersCache = null;     // snapshot.computers
+let dateSummaryCache = null;   // { date, rows } - snapshot.date_summary (선택 날짜)
+let summaryCache = null;       // snapshot.summary (최근 N일)
+let timelineCache = null;      // snapshot.timeline (+ 더 보기로 이어 받은 과거 페이지)
+let timelineNextCursor = null; // 다음 타임라인 페이지 커서 (null이면 끝)
+let timelineMoreRequest = null;
+let chartCache = null;         // snapshot.chart { days, dates, series }
+let snapshotRequest = null;
+let snapshotPending = false;
+let eventSource = null;
+
+// URL별 마지막 ETag와 응답 (If-None-Match 재검증 → 304면 저장된 응답 재사용)
+const etagCache = new Map();
+
 async function fetchJSON(url) {
-    const response = await fetch(url);
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers });
     if (response.status === 401) {
         // 인증 필요
+        etagCache.clear();
         showLoginUI();
         throw new Error('Authentication required');
     }
-    return response.json();
+    if (response.status === 304 && cached) {
+        return structuredClone(cached.data);
+    }
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag && response.ok) {
+        etagCache.set(url, { etag, data: structuredClone(data) });
+    }
+    return data;
 }
 
 // ==================== 인증 관련 ====================
@@ -143,7 +171,7 @@ async function handleAuth() {
                     csrfToken = data.csrf_token;
                 }
                 hideAuthOverlay();
-                refreshAll();
+                connectStream();
             } else {
                 const data = await response.json();
                 errorEl.textContent = data.detail || '설정에 실패했습니다.';
@@ -166,7 +194,7 @@ async function handleAuth() {
                     csrfToken = data.csrf_token;
                 }
                 hideAuthOverlay();
-                refreshAll();
+                connectStream();
             } else {
                 const data = await response.json();
                 errorEl.textContent = data.detail || '로그인에 실패했습니다.';
@@ -181,6 +209,10 @@ async function logout() {
     try {
         await fetch('/api/auth/logout', { method: 'POST' });
         csrfToken = null;
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+        }
         showLoginUI();
     } catch (error) {
         console.error('Logout failed:', error);
@@ -235,64 +267,109 @@ function formatTimeAgo(isoString) {
     return `${diffDays}일 전`;
 }
 
-async function loadComputers() {
-    const container = document.getElementById('computers-list');
+// 대시보드 스냅샷 조회 (선택 날짜 / 요약 기간 / 타임라인 기간 기준)
+function snapshotUrl() {
+    const params = new URLSearchParams({
+        date: document.getElementById('summary-date').value,
+        days: document.getElementById('summary-days').value,
+        timeline_days: document.getElementById('timeline-days').value,
+        timeline_limit: TIMELINE_LIMIT
+    });
+    return `/api/dashboard/snapshot?${params}`;
+}
 
-    try {
-        const data = await fetchJSON('/api/computers');
+// 전체 재조회 후 다시 그리기 (진행 중 요청이 있으면 끝난 뒤 한 번 더 조회)
+async function loadSnapshot() {
+    if (snapshotRequest) {
+        snapshotPending = true;
+        return snapshotRequest;
+    }
+    snapshotRequest = (async () => {
+        try {
+            do {
+                snapshotPending = false;
+                const data = await fetchJSON(snapshotUrl());
+                computersCache = data.computers;
+                dateSummaryCache = { date: data.date, rows: data.date_summary };
+                summaryCache = data.summary;
+                timelineCache = data.timeline;
+                timelineNextCursor = data.timeline_next_cursor;
+                chartCache = data.chart;
+                updateDisplayNameMap();
+            } while (snapshotPending);
+            renderAll();
+        } catch (error) {
+            if (error.message !== 'Authentication required') {
+                renderLoadError();
+            }
+        } finally {
+            snapshotRequest = null;
+        }
+    })();
+    return snapshotRequest;
+}
 
-        if (data.computers.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state">
-                    <p>등록된 컴퓨터가 없습니다</p>
-                    <p>Agent를 설치하면 자동으로 표시됩니다</p>
-                </div>
-            `;
-            return;
+function renderLoadError() {
+    const message = '데이터를 불러올 수 없습니다';
+    document.getElementById('computers-list').innerHTML = `<div class="empty-state"><p>${message}</p></div>`;
+    document.getElementById('today-summary-body').innerHTML = `<tr><td colspan="5" class="empty-state">${message}</td></tr>`;
+    document.getElementById('summary-body').innerHTML = `<tr><td colspan="100" class="empty-state">${message}</td></tr>`;
+    document.getElementById('all-timeline').innerHTML = `<div class="empty-state"><p>${message}</p></div>`;
+}
+
+// display_name 매핑 업데이트
+function updateDisplayNameMap() {
+    displayNameMap = {};
+    (computersCache || []).forEach(pc => {
+        if (pc.display_name) {
+            displayNameMap[pc.computer_name] = pc.display_name;
         }
+    });
+}
 
-        // display_name 매핑 업데이트
-        displayNameMap = {};
-        data.computers.forEach(pc => {
-            if (pc.display_name) {
-                displayNameMap[pc.computer_name] = pc.display_name;
-            }
-        });
+function renderComputers() {
+    const container = document.getElementById('computers-list');
+    const computers = computersCache;
+    if (!computers) return;
+
+    if (computers.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <p>등록된 컴퓨터가 없습니다</p>
+                <p>Agent를 설치하면 자동으로 표시됩니다</p>
+            </div>
+        `;
+        return;
+    }
 
-        container.innerHTML = data.computers.map(pc => {
-            const displayName = pc.display_name || pc.computer_name;
-            const showHostname = pc.display_name ? `<span class="hostname-badge">${pc.computer_name}</span>` : '';
-            const ipBadge = pc.ip_address ? `<span class="ip-badge">${pc.ip_address}</span>` : '';
-            return `
-            <div class="computer-item">
-                <div class="computer-main clickable" onclick="openHistory('${pc.computer_name}')">
-                    <div>
-                        <div class="computer-name">${displayName} ${showHostname} ${ipBadge}</div>
-                        <div class="computer-info">
-                            ${pc.status === 'online' ? '마지막 확인: 방금 전' : '마지막 활동: ' + formatTimeAgo(
-                                pc.last_boot && pc.last_shutdown
-                                    ? (pc.last_boot > pc.last_shutdown ? pc.last_boot : pc.last_shutdown)
-                                    : (pc.last_boot || pc.last_shutdown)
-                            )}
-                        </div>
+    container.innerHTML = computers.map(pc => {
+        const displayName = pc.display_name || pc.computer_name;
+        const showHostname = pc.display_name ? `<span class="hostname-badge">${pc.computer_name}</span>` : '';
+        const ipBadge = pc.ip_address ? `<span class="ip-badge">${pc.ip_address}</span>` : '';
+        return `
+        <div class="computer-item">
+            <div class="computer-main clickable" onclick="openHistory('${pc.computer_name}')">
+                <div>
+                    <div class="computer-name">${displayName} ${showHostname} ${ipBadge}</div>
+                    <div class="computer-info">
+                        ${pc.status === 'online' ? '마지막 확인: 방금 전' : '마지막 활동: ' + formatTimeAgo(
+                            pc.last_boot && pc.last_shutdown
+                                ? (pc.last_boot > pc.last_shutdown ? pc.last_boot : pc.last_shutdown)
+                                : (pc.last_boot || pc.last_shutdown)
+                        )}
                     </div>
-                    <span class="status ${pc.status}">
-                        <span class="status-dot ${pc.status}"></span>
-                        ${pc.status === 'online' ? '온라인' : '오프라인'}
-                    </span>
-                </div>
-                <div class="computer-actions">
-                    <button class="action-btn edit-btn" onclick="openRenameModal('${pc.computer_name}', '${pc.display_name || ''}')" title="이름 변경">&#9998;</button>
-                    <button class="action-btn delete-btn" onclick="openDeleteModal('${pc.computer_name}')" title="삭제">&#128465;</button>
                 </div>
+                <span class="status ${pc.status}">
+                    <span class="status-dot ${pc.status}"></span>
+                    ${pc.status === 'online' ? '온라인' : '오프라인'}
+                </span>
             </div>
-        `}).join('');
-
-    } catch (error) {
-        if (error.message !== 'Authentication required') {
-            container.innerHTML = `<div class="empty-state"><p>데이터를 불러올 수 없습니다</p></div>`;
-        }
-    }
+            <div class="computer-actions">
+                <button class="action-btn edit-btn" onclick="openRenameModal('${pc.computer_name}', '${pc.display_name || ''}')" title="이름 변경">&#9998;</button>
+                <button class="action-btn delete-btn" onclick="openDeleteModal('${pc.computer_name}')" title="삭제">&#128465;</button>
+            </div>
+        </div>
+    `}).join('');
 }
 
 // 히스토리 뷰 모드 설정
@@ -456,8 +533,9 @@ async function saveDisplayName() {
         });
 
         if (response.ok) {
+            const hostname = renameTarget;
             closeRenameModal();
-            loadComputers();
+            applyRename(hostname, newName);
         } else if (response.status === 403) {
             alert('CSRF 토큰이 만료되었습니다. 페이지를 새로고침하세요.');
             location.reload();
@@ -581,48 +659,52 @@ document.querySelectorAll('.modal').forEach(modal => {
     });
 });
 
-async function loadDailySummary() {
-    const days = document.getElementById('summary-days').value;
+// 최근 N일 요약만 추출 (서버 daily-summary?days=N 과 같은 기준: 오늘 - N일 이후)
+function filterSummaryDays(summary, days) {
+    const cutoff = new Date();
+    cutoff.setDate(cutoff.getDate() - Number(days));
+    const cutoffStr = getLocalDateString(cutoff);
+    return summary.filter(s => s.date >= cutoffStr);
+}
+
+function renderDailySummary() {
     const tbody = document.getElementById('summary-body');
-    try {
-        const data = await fetchJSON(`/api/daily-summary?days=${days}`);
-        if (data.summary.length === 0) {
-            tbody.innerHTML = '<tr><td colspan="100" class="empty-state">데이터가 없습니다</td></tr>';
-            return;
-        }
-        const dates = [...new Set(data.summary.map(s => s.date))].sort().reverse();
-        const computers = [...new Set(data.summary.map(s => s.computer_name))];
-        let headerHtml = '<th>날짜</th>';
+    if (!summaryCache) return;
+
+    const days = document.getElementById('summary-days').value;
+    const summary = filterSummaryDays(summaryCache, days);
+    if (summary.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="100" class="empty-state">데이터가 없습니다</td></tr>';
+        return;
+    }
+    const dates = [...new Set(summary.map(s => s.date))].sort().reverse();
+    const computers = [...new Set(summary.map(s => s.computer_name))];
+    let headerHtml = '<th>날짜</th>';
+    computers.forEach(hostname => {
+        headerHtml += `<th>${displayNameMap[hostname] || hostname}</th>`;
+    });
+    document.querySelector('#summary-table thead tr').innerHTML = headerHtml;
+    const dataMap = {};
+    summary.forEach(s => {
+        if (!dataMap[s.date]) dataMap[s.date] = {};
+        dataMap[s.date][s.computer_name] = s;
+    });
+    let bodyHtml = '';
+    dates.forEach(date => {
+        bodyHtml += `<tr><td class="date-cell">${formatDateShort(date)}</td>`;
         computers.forEach(hostname => {
-            headerHtml += `<th>${displayNameMap[hostname] || hostname}</th>`;
-        });
-        document.querySelector('#summary-table thead tr').innerHTML = headerHtml;
-        const dataMap = {};
-        data.summary.forEach(s => {
-            if (!dataMap[s.date]) dataMap[s.date] = {};
-            dataMap[s.date][s.computer_name] = s;
-        });
-        let bodyHtml = '';
-        dates.forEach(date => {
-            bodyHtml += `<tr><td class="date-cell">${formatDateShort(date)}</td>`;
-            computers.forEach(hostname => {
-                const info = dataMap[date]?.[hostname];
-                if (info) {
-                    const boot = info.first_boot ? info.first_boot.substring(0, 5) : '-';
-                    const shutdown = info.last_shutdown ? info.last_shutdown.substring(0, 5) : '-';
-                    bodyHtml += `<td class="time-cell">${boot} / ${shutdown}</td>`;
-                } else {
-                    bodyHtml += '<td class="time-cell empty">-</td>';
-                }
-            });
-            bodyHtml += '</tr>';
+            const info = dataMap[date]?.[hostname];
+            if (info) {
+                const boot = info.first_boot ? info.first_boot.substring(0, 5) : '-';
+                const shutdown = info.last_shutdown ? info.last_shutdown.substring(0, 5) : '-';
+                bodyHtml += `<td class="time-cell">${boot} / ${shutdown}</td>`;
+            } else {
+                bodyHtml += '<td class="time-cell empty">-</td>';
+            }
         });
-        tbody.innerHTML = bodyHtml;
-    } catch (error) {
-        if (error.message !== 'Authentication required') {
-            tbody.innerHTML = '<tr><td colspan="100" class="empty-state">데이터를 불러올 수 없습니다</td></tr>';
-        }
-    }
+        bodyHtml += '</tr>';
+    });
+    tbody.innerHTML = bodyHtml;
 }
 
 function formatDateShort(dateStr) {
@@ -647,63 +729,77 @@ function getEventDetailText(detail) {
     return map[detail] || '';
 }
 
-async function loadAllTimeline() {
-    const container = document.getElementById('all-timeline');
-    const days = document.getElementById('timeline-days').value;
-
+// 타임라인 다음(과거) 페이지 이어 받기
+async function loadMoreTimeline() {
+    if (!timelineNextCursor || timelineMoreRequest) return;
+    const params = new URLSearchParams({
+        days: document.getElementById('timeline-days').value,
+        limit: TIMELINE_LIMIT,
+        cursor: timelineNextCursor
+    });
+    timelineMoreRequest = fetchJSON(`/api/timeline/all?${params}`);
     try {
-        const data = await fetchJSON(`/api/timeline/all?days=${days}&limit=100`);
-
-        if (data.events.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state">
-                    <p>해당 기간에 기록된 이벤트가 없습니다</p>
-                </div>
-            `;
-            return;
-        }
+        const data = await timelineMoreRequest;
+        const ids = new Set(timelineCache.map(e => e.id));
+        timelineCache.push(...data.events.filter(e => !ids.has(e.id)));
+        timelineNextCursor = data.next_cursor;
+        renderAllTimeline();
+    } catch (error) {
+        console.error('Failed to load more timeline:', error);
+    } finally {
+        timelineMoreRequest = null;
+    }
+}
 
-        // 날짜별로 그룹화
-        const grouped = {};
-        data.events.forEach(event => {
-            const date = formatDate(event.timestamp);
-            if (!grouped[date]) {
-                grouped[date] = [];
-            }
-            grouped[date].push(event);
-        });
+function renderAllTimeline() {
+    const container = document.getElementById('all-timeline');
+    if (!timelineCache) return;
+    document.getElementById('timeline-more').hidden = !timelineNextCursor;
 
-        let html = '';
-        for (const [date, events] of Object.entries(grouped)) {
-            html += `<div class="timeline-date-group">`;
-            html += `<div class="timeline-date-header">${date}</div>`;
-            html += `<div class="timeline-events">`;
-
-            events.forEach(event => {
-                const displayName = event.display_name || event.computer_name;
-                const eventIcon = event.event_type === 'boot' ? '&#9650;' : '&#9660;';
-                const eventText = event.event_type === 'boot' ? '시작' : '종료';
-                const detailText = getEventDetailText(event.event_detail);
-                const detailBadge = detailText ? `<span class="event-detail-badge">(${detailText})</span>` : '';
-                html += `
-                    <div class="timeline-event ${event.event_type}">
-                        <span class="timeline-time">${formatTime(event.timestamp)}</span>
-                        <span class="timeline-computer">${displayName}</span>
-                        <span class="timeline-type ${event.event_type}">${eventIcon} ${eventText} ${detailBadge}</span>
-                    </div>
-                `;
-            });
+    if (timelineCache.length === 0) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <p>해당 기간에 기록된 이벤트가 없습니다</p>
+            </div>
+        `;
+        return;
+    }
 
-            html += `</div></div>`;
+    // 날짜별로 그룹화
+    const grouped = {};
+    timelineCache.forEach(event => {
+        const date = formatDate(event.timestamp);
+        if (!grouped[date]) {
+            grouped[date] = [];
         }
+        grouped[date].push(event);
+    });
 
-        container.innerHTML = html;
+    let html = '';
+    for (const [date, events] of Object.entries(grouped)) {
+        html += `<div class="timeline-date-group">`;
+        html += `<div class="timeline-date-header">${date}</div>`;
+        html += `<div class="timeline-events">`;
+
+        events.forEach(event => {
+            const displayName = event.display_name || event.computer_name;
+            const eventIcon = event.event_type === 'boot' ? '&#9650;' : '&#9660;';
+            const eventText = event.event_type === 'boot' ? '시작' : '종료';
+            const detailText = getEventDetailText(event.event_detail);
+            const detailBadge = detailText ? `<span class="event-detail-badge">(${detailText})</span>` : '';
+            html += `
+                <div class="timeline-event ${event.event_type}">
+                    <span class="timeline-time">${formatTime(event.timestamp)}</span>
+                    <span class="timeline-computer">${displayName}</span>
+                    <span class="timeline-type ${event.event_type}">${eventIcon} ${eventText} ${detailBadge}</span>
+                </div>
+            `;
+        });
 
-    } catch (error) {
-        if (error.message !== 'Authentication required') {
-            container.innerHTML = `<div class="empty-state"><p>데이터를 불러올 수 없습니다</p></div>`;
-        }
+        html += `</div></div>`;
     }
+
+    container.innerHTML = html;
 }
 
 // 로컬 시간대 기준 날짜 문자열 반환 (YYYY-MM-DD)
@@ -720,14 +816,14 @@ function changeDate(delta) {
     const currentDate = new Date(dateInput.value);
     currentDate.setDate(currentDate.getDate() + delta);
     dateInput.value = getLocalDateString(currentDate);
-    loadDateSummary();
+    loadSnapshot();
 }
 
 // 오늘로 이동
 function goToToday() {
     const dateInput = document.getElementById('summary-date');
     dateInput.value = getLocalDateString(new Date());
-    loadDateSummary();
+    loadSnapshot();
 }
 
 // 날짜 선택기 초기화
@@ -749,57 +845,42 @@ function getShutdownStatusBadge(detail) {
     return `<span class="shutdown-status ${status.class}">${status.text}</span>`;
 }
 
-async function loadDateSummary() {
+function renderDateSummary() {
     const tbody = document.getElementById('today-summary-body');
-    const dateInput = document.getElementById('summary-date');
-    const selectedDate = dateInput.value;
+    const allComputers = computersCache;
+    if (!allComputers || !dateSummaryCache) return;
 
-    try {
-        // 1. 모든 등록된 컴퓨터 목록 조회
-        const computersData = await fetchJSON('/api/computers');
-        const allComputers = computersData.computers;
-
-        if (allComputers.length === 0) {
-            tbody.innerHTML = '<tr><td colspan="5" class="empty-state">등록된 컴퓨터가 없습니다</td></tr>';
-            return;
-        }
-
-        // 2. 해당 날짜의 이벤트 조회 (30일치 가져와서 필터링)
-        const summaryData = await fetchJSON('/api/daily-summary?days=30');
-        const dateEvents = summaryData.summary.filter(s => s.date === selectedDate);
-
-        // 3. 이벤트를 컴퓨터별 맵으로 변환
-        const eventMap = {};
-        dateEvents.forEach(e => {
-            eventMap[e.computer_name] = e;
-        });
+    if (allComputers.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="5" class="empty-state">등록된 컴퓨터가 없습니다</td></tr>';
+        return;
+    }
 
-        // 4. 모든 컴퓨터 표시 (이벤트 없으면 "-")
-        let html = '';
-        allComputers.forEach(pc => {
-            const displayName = pc.display_name || pc.computer_name;
-            const event = eventMap[pc.computer_name];
-            const firstBoot = event?.first_boot ? event.first_boot.substring(0, 5) : '-';
-            const lastShutdown = event?.last_shutdown ? event.last_shutdown.substring(0, 5) : '-';
-            const shutdownStatus = event?.last_shutdown ? getShutdownStatusBadge(event.shutdown_detail) : '-';
-            const resyncBtn = `<button class="resync-btn" onclick="requestResync('${pc.computer_name.replace(/'/g, "\\'")}')">재집계</button>`;
-            html += `
-                <tr>
-                    <td class="computer-cell">${displayName}</td>
-                    <td class="time-cell boot">${firstBoot}</td>
-                    <td class="time-cell shutdown">${lastShutdown}</td>
-                    <td class="status-cell">${shutdownStatus}</td>
-                    <td class="resync-cell">${resyncBtn}</td>
-                </tr>
-            `;
-        });
-        tbody.innerHTML = html;
+    // 선택 날짜 요약을 컴퓨터별 맵으로 변환
+    const eventMap = {};
+    dateSummaryCache.rows.forEach(e => {
+        eventMap[e.computer_name] = e;
+    });
 
-    } catch (error) {
-        if (error.message !== 'Authentication required') {
-            tbody.innerHTML = '<tr><td colspan="5" class="empty-state">데이터를 불러올 수 없습니다</td></tr>';
-        }
-    }
+    // 모든 컴퓨터 표시 (이벤트 없으면 "-")
+    let html = '';
+    allComputers.forEach(pc => {
+        const displayName = pc.display_name || pc.computer_name;
+        const event = eventMap[pc.computer_name];
+        const firstBoot = event?.first_boot ? event.first_boot.substring(0, 5) : '-';
+        const lastShutdown = event?.last_shutdown ? event.last_shutdown.substring(0, 5) : '-';
+        const shutdownStatus = event?.last_shutdown ? getShutdownStatusBadge(event.shutdown_detail) : '-';
+        const resyncBtn = `<button class="resync-btn" onclick="requestResync('${pc.computer_name.replace(/'/g, "\\'")}')">재집계</button>`;
+        html += `
+            <tr>
+                <td class="computer-cell">${displayName}</td>
+                <td class="time-cell boot">${firstBoot}</td>
+                <td class="time-cell shutdown">${lastShutdown}</td>
+                <td class="status-cell">${shutdownStatus}</td>
+                <td class="resync-cell">${resyncBtn}</td>
+            </tr>
+        `;
+    });
+    tbody.innerHTML = html;
 }
 
 async function requestResync(hostname) {
@@ -843,16 +924,22 @@ async function requestResync(hostname) {
 // 사용 현황 그래프 로드
 let usageChart = null;
 
-async function loadUsageChart() {
+// 'HH:MM:SS' → 시간(소수)
+function timeToHours(time) {
+    if (!time) return null;
+    const [h, m] = time.split(':').map(Number);
+    return h + m / 60;
+}
+
+function renderUsageChart() {
     const ctx = document.getElementById('usage-chart');
-    if (!ctx) return;
+    if (!ctx || !chartCache) return;
 
     try {
-        // 최근 7일간 데이터 조회
-        const summaryData = await fetchJSON('/api/daily-summary?days=7');
-        const computersData = await fetchJSON('/api/computers');
+        const dates = chartCache.dates;
+        const series = chartCache.series;
 
-        if (summaryData.summary.length === 0 || computersData.computers.length === 0) {
+        if (dates.length === 0 || series.length === 0) {
             // 데이터가 없으면 기존 그래프 제거
             if (usageChart) {
                 usageChart.destroy();
@@ -861,10 +948,6 @@ async function loadUsageChart() {
             return;
         }
 
-        // 날짜 목록 (최근 7일, 오래된 순)
-        const dates = [...new Set(summaryData.summary.map(s => s.date))].sort();
-        const computers = computersData.computers;
-
         // 컴퓨터별 색상
         const colors = [
             { bg: 'rgba(52, 152, 219, 0.7)', border: 'rgb(52, 152, 219)' },
@@ -875,38 +958,11 @@ async function loadUsageChart() {
             { bg: 'rgba(231, 76, 60, 0.7)', border: 'rgb(231, 76, 60)' },
         ];
 
-        // 데이터 맵 생성
-        const dataMap = {};
-        summaryData.summary.forEach(s => {
-            if (!dataMap[s.date]) dataMap[s.date] = {};
-            dataMap[s.date][s.computer_name] = s;
-        });
-
         // 데이터셋 생성 (각 컴퓨터별로 시작~종료 시간 막대)
-        const datasets = [];
-        computers.forEach((pc, idx) => {
+        const datasets = series.map((item, idx) => {
             const color = colors[idx % colors.length];
-            const displayName = pc.display_name || pc.computer_name;
-
-            // 시작 시간 데이터
-            const bootData = dates.map(date => {
-                const info = dataMap[date]?.[pc.computer_name];
-                if (info?.first_boot) {
-                    const [h, m] = info.first_boot.split(':').map(Number);
-                    return h + m / 60;
-                }
-                return null;
-            });
-
-            // 종료 시간 데이터
-            const shutdownData = dates.map(date => {
-                const info = dataMap[date]?.[pc.computer_name];
-                if (info?.last_shutdown) {
-                    const [h, m] = info.last_shutdown.split(':').map(Number);
-                    return h + m / 60;
-                }
-                return null;
-            });
+            const bootData = item.first_boot.map(timeToHours);
+            const shutdownData = item.last_shutdown.map(timeToHours);
 
             // Floating bar chart (시작~종료)
             const barData = dates.map((date, i) => {
@@ -920,8 +976,8 @@ async function loadUsageChart() {
                 return null;
             });
 
-            datasets.push({
-                label: displayName,
+            return {
+                label: item.display_name || item.computer_name,
                 data: barData,
                 backgroundColor: color.bg,
                 borderColor: color.border,
@@ -929,7 +985,7 @@ async function loadUsageChart() {
                 borderRadius: 4,
                 barPercentage: 0.6,
                 categoryPercentage: 0.8,
-            });
+            };
         });
 
         // 날짜 라벨 포맷팅
@@ -1006,16 +1062,242 @@ async function loadUsageChart() {
         });
 
     } catch (error) {
-        console.error('Failed to load usage chart:', error);
+        console.error('Failed to render usage chart:', error);
     }
 }
 
+// 전체 재조회 (연결/재연결 시, 새로고침 버튼)
 function refreshAll() {
-    loadComputers();
-    loadDateSummary();
-    loadDailySummary();
-    loadAllTimeline();
-    loadUsageChart();
+    loadSnapshot();
+}
+
+// 캐시 기준 다시 그리기 (조회 없음)
+function renderAll() {
+    renderComputers();
+    renderDateSummary();
+    renderDailySummary();
+    renderAllTimeline();
+    renderUsageChart();
+}
+
+// ==================== 실시간 푸시 (/api/stream) ====================
+
+const STREAM_EVENT_TYPES = [
+    'event_insert', 'event_overwrite', 'recovery_insert',
+    'rename', 'delete', 'delete_all', 'status', 'reset'
+];
+
+function connectStream() {
+    if (eventSource) {
+        eventSource.close();
+    }
+    eventSource = new EventSource('/api/stream');
+
+    // 연결/재연결 직후 한 번 전체 조회 (끊겨 있던 동안의 변경 반영)
+    eventSource.addEventListener('hello', () => refreshAll());
+
+    STREAM_EVENT_TYPES.forEach(type => {
+        eventSource.addEventListener(type, (e) => {
+            try {
+                applyStreamEvent(type, JSON.parse(e.data));
+            } catch (error) {
+                console.error('Stream event failed:', type, error);
+            }
+        });
+    });
+
+    eventSource.onerror = async () => {
+        // CONNECTING이면 브라우저가 자동 재연결, CLOSED면 (인증 만료 등) 직접 확인 후 재연결
+        if (eventSource.readyState !== EventSource.CLOSED) return;
+        eventSource = null;
+        if (await checkAuth()) {
+            setTimeout(connectStream, 5000);
+        }
+    };
+}
+
+function applyStreamEvent(type, data) {
+    switch (type) {
+        case 'event_insert':
+        case 'event_overwrite':
+        case 'recovery_insert':
+            applyEvent(data, type === 'event_overwrite');
+            break;
+        case 'rename':
+            applyRename(data.computer_name, data.display_name);
+            break;
+        case 'delete':
+            applyDelete(data.computer_name);
+            break;
+        case 'delete_all':
+            computersCache = computersCache && [];
+            summaryCache = summaryCache && [];
+            timelineCache = timelineCache && [];
+            timelineNextCursor = null;
+            if (dateSummaryCache) dateSummaryCache.rows = [];
+            if (chartCache) chartCache = { ...chartCache, dates: [], series: [] };
+            updateDisplayNameMap();
+            renderAll();
+            break;
+        case 'status':
+            applyStatus(data);
+            break;
+        case 'reset':
+            refreshAll();
+            break;
+    }
+}
+
+// 타임스탬프 정규화 ('YYYY-MM-DD HH:MM:SS' → 'YYYY-MM-DDTHH:MM:SS') - 문자열 비교용
+function normalizeTimestamp(ts) {
+    return ts ? ts.replace(' ', 'T') : ts;
+}
+
+// 요약 행 갱신: 첫 부팅(최소) / 마지막 종료(최대)
+function updateSummaryRow(row, eventType, time, detail) {
+    if (eventType === 'boot') {
+        if (!row.first_boot || time < row.first_boot) row.first_boot = time;
+    } else if (!row.last_shutdown || time >= row.last_shutdown) {
+        row.last_shutdown = time;
+        row.shutdown_detail = detail;
+    }
+}
+
+// 요약 행 목록에서 (날짜, 컴퓨터) 행을 찾거나 추가 후 갱신
+function upsertSummaryRow(rows, date, data, time) {
+    let row = rows.find(s => s.date === date && s.computer_name === data.computer_name);
+    if (!row) {
+        row = {
+            date: date,
+            computer_name: data.computer_name,
+            first_boot: null,
+            last_shutdown: null,
+            shutdown_detail: null,
+            display_name: displayNameMap[data.computer_name] || null
+        };
+        rows.push(row);
+    }
+    updateSummaryRow(row, data.event_type, time, data.event_detail);
+}
+
+// 그래프 시리즈 갱신 (그래프 기간 안의 날짜만, 새 날짜는 정렬 위치에 추가)
+function applyChartPoint(date, data, time) {
+    const cutoff = new Date();
+    cutoff.setDate(cutoff.getDate() - chartCache.days);
+    if (date < getLocalDateString(cutoff)) return;
+
+    const item = chartCache.series.find(s => s.computer_name === data.computer_name);
+    if (!item) return;
+
+    let index = chartCache.dates.indexOf(date);
+    if (index < 0) {
+        index = chartCache.dates.filter(d => d < date).length;
+        chartCache.dates.splice(index, 0, date);
+        chartCache.series.forEach(s => {
+            s.first_boot.splice(index, 0, null);
+            s.last_shutdown.splice(index, 0, null);
+        });
+    }
+    const point = { first_boot: item.first_boot[index], last_shutdown: item.last_shutdown[index] };
+    updateSummaryRow(point, data.event_type, time, data.event_detail);
+    item.first_boot[index] = point.first_boot;
+    item.last_shutdown[index] = point.last_shutdown;
+}
+
+function applyEvent(data, isOverwrite) {
+    const pc = computersCache?.find(c => c.computer_name === data.computer_name);
+    if (computersCache && !pc) {
+        // 처음 보는 컴퓨터 (신규 설치) → 스냅샷 전체 재조회
+        loadSnapshot();
+        return;
+    }
+    if (data.event_type !== 'boot' && data.event_type !== 'shutdown') return;
+
+    const timestamp = normalizeTimestamp(data.timestamp);
+    const field = data.event_type === 'boot' ? 'last_boot' : 'last_shutdown';
+    const date = timestamp.substring(0, 10);
+    const time = timestamp.substring(11, 19);
+
+    // 컴퓨터 목록: 마지막 부팅/종료 갱신 후 맨 앞으로 (목록은 최근 이벤트 순)
+    if (pc) {
+        if (!pc[field] || normalizeTimestamp(pc[field]) < timestamp) {
+            pc[field] = timestamp;
+        }
+        if (!isOverwrite) {
+            pc.total_events = (pc.total_events || 0) + 1;
+        }
+        computersCache.splice(computersCache.indexOf(pc), 1);
+        computersCache.unshift(pc);
+    }
+
+    // 선택 날짜 요약 / 일별 요약 / 그래프
+    if (dateSummaryCache && dateSummaryCache.date === date) {
+        upsertSummaryRow(dateSummaryCache.rows, date, data, time);
+    }
+    if (summaryCache) {
+        upsertSummaryRow(summaryCache, date, data, time);
+    }
+    if (chartCache) {
+        applyChartPoint(date, data, time);
+    }
+
+    // 타임라인: 덮어쓰기는 같은 id 교체, 신규는 추가 후 시간 역순 정렬
+    if (timelineCache) {
+        const event = {
+            id: data.id,
+            computer_name: data.computer_name,
+            event_type: data.event_type,
+            timestamp: timestamp,
+            event_detail: data.event_detail,
+            event_source: data.event_source,
+            display_name: displayNameMap[data.computer_name] || null
+        };
+        const index = isOverwrite ? timelineCache.findIndex(e => e.id === data.id) : -1;
+        if (index >= 0) {
+            timelineCache[index] = event;
+        } else {
+            timelineCache.push(event);
+        }
+        // 자르지 않음: 이어 받은 페이지의 커서 위치가 유지되어야 함
+        timelineCache.sort((a, b) => normalizeTimestamp(b.timestamp).localeCompare(normalizeTimestamp(a.timestamp)));
+    }
+
+    renderAll();
+}
+
+function applyRename(hostname, displayName) {
+    const pc = computersCache?.find(c => c.computer_name === hostname);
+    if (pc) pc.display_name = displayName;
+    [...(summaryCache || []), ...(dateSummaryCache?.rows || []), ...(chartCache?.series || [])].forEach(s => {
+        if (s.computer_name === hostname) s.display_name = displayName;
+    });
+    (timelineCache || []).forEach(e => {
+        if (e.computer_name === hostname) e.display_name = displayName;
+    });
+    updateDisplayNameMap();
+    renderAll();
+}
+
+function applyDelete(hostname) {
+    if (computersCache) computersCache = computersCache.filter(c => c.computer_name !== hostname);
+    if (summaryCache) summaryCache = summaryCache.filter(s => s.computer_name !== hostname);
+    if (dateSummaryCache) dateSummaryCache.rows = dateSummaryCache.rows.filter(s => s.computer_name !== hostname);
+    if (chartCache) chartCache.series = chartCache.series.filter(s => s.computer_name !== hostname);
+    if (timelineCache) timelineCache = timelineCache.filter(e => e.computer_name !== hostname);
+    updateDisplayNameMap();
+    renderAll();
+}
+
+function applyStatus(data) {
+    const pc = computersCache?.find(c => c.computer_name === data.computer_name);
+    if (!pc) {
+        if (computersCache) loadSnapshot();
+        return;
+    }
+    pc.status = data.status;
+    pc.last_seen = data.last_seen;
+    if (data.ip_address) pc.ip_address = data.ip_address;
+    renderComputers();
 }
 
 // Enter 키로 이름 저장
@@ -1046,11 +1328,13 @@ document.addEventListener('DOMContentLoaded', async () => {
     // 날짜 선택기 초기화
     initDatePicker();
 
-    // 인증 확인 후 데이터 로드
+    // 인증 확인 후 실시간 푸시 연결 (연결 시 전체 조회)
     const authenticated = await checkAuth();
     if (authenticated) {
-        refreshAll();
+        connectStream();
     }
-    // 10초마다 자동 새로고침 (실시간 상태 확인)
-    setInterval(refreshAll, 10000);
+    // '마지막 활동: N분 전' 표시만 1분마다 캐시 기준으로 갱신 (조회 없음)
+    setInterval(() => {
+        if (computersCache) renderComputers();
+    }, 60000);
 });
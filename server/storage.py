@@ -0,0 +1,362 @@
+"""스토리지 백엔드 인터페이스 및 선택
+
+main.py가 사용하는 모든 영속화 함수를 StorageBackend로 정의한다.
+- sqlite (기본): database.py 모듈 함수 (단일 파일, WAL)
+- postgres: storage_postgres.PostgresBackend (커넥션 풀, 다중 writer)
+
+환경 변수:
+- COMPUTEROFF_DB_BACKEND: 'sqlite' (기본) 또는 'postgres'
+- COMPUTEROFF_DATABASE_URL: PostgreSQL DSN (postgres 백엔드 필수)
+- COMPUTEROFF_DB_POOL_MIN / COMPUTEROFF_DB_POOL_MAX: PostgreSQL 커넥션 풀 크기 (기본 1 / 10)
+"""
+
+import os
+import secrets
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator, Optional
+
+import database
+
+
+BACKEND_ENV = "COMPUTEROFF_DB_BACKEND"
+DATABASE_URL_ENV = "COMPUTEROFF_DATABASE_URL"
+SUPPORTED_BACKENDS = ("sqlite", "postgres")
+
+
+class StorageBackend(ABC):
+    """영속화 백엔드 공통 인터페이스
+
+    반환 형식은 SQLite 백엔드 기준: 타임스탬프는 ISO 문자열,
+    요약 시각은 'HH:MM:SS' 문자열, 날짜는 'YYYY-MM-DD' 문자열.
+    """
+
+    name = ""
+
+    # ---------- 스키마 ----------
+
+    @abstractmethod
+    def init_db(self): ...
+
+    # ---------- 이벤트 ----------
+
+    @abstractmethod
+    def insert_event(
+        self,
+        computer_name: str,
+        event_type: str,
+        timestamp: datetime,
+        event_detail: Optional[str] = None,
+        event_source: str = 'realtime',
+        event_record_id: Optional[int] = None
+    ) -> tuple[int, bool]: ...
+
+    @abstractmethod
+    def insert_events(self, events: list[dict]) -> list[tuple[int, bool]]: ...
+
+    @abstractmethod
+    def get_events(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> list[dict]: ...
+
+    @abstractmethod
+    def get_events_json(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> tuple[bytes, int, Optional[str]]: ...
+
+    @abstractmethod
+    def iter_events_export(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        event_source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = database.EXPORT_BATCH_SIZE
+    ) -> Iterator[list[tuple]]: ...
+
+    @abstractmethod
+    def get_last_event(self, computer_name: str, event_type: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def get_all_events_timeline(self, days: int = 7, limit: int = 100,
+                                cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]: ...
+
+    # ---------- 컴퓨터 / 하트비트 ----------
+
+    @abstractmethod
+    def get_computers(self) -> list[dict]: ...
+
+    @abstractmethod
+    def get_presence(self) -> list[dict]: ...
+
+    @abstractmethod
+    def update_heartbeat(self, computer_name: str, ip_address: Optional[str] = None,
+                         agent_version: Optional[str] = None): ...
+
+    @abstractmethod
+    def register_computer(self, computer_name: str, ip_address: Optional[str] = None): ...
+
+    @abstractmethod
+    def get_computer_history(self, computer_name: str, days: int = 30) -> list[dict]: ...
+
+    @abstractmethod
+    def get_computer_history_json(self, computer_name: str, days: int = 30) -> tuple[bytes, int]: ...
+
+    @abstractmethod
+    def set_computer_display_name(self, hostname: str, display_name: str): ...
+
+    @abstractmethod
+    def get_all_display_names(self) -> dict: ...
+
+    @abstractmethod
+    def delete_computer(self, hostname: str) -> int: ...
+
+    @abstractmethod
+    def delete_all_computers(self) -> dict: ...
+
+    # ---------- 집계 ----------
+
+    @abstractmethod
+    def get_daily_stats(self, computer_name: Optional[str] = None, days: int = 7) -> list[dict]: ...
+
+    @abstractmethod
+    def get_shutdown_timeline(self, days: int = 7) -> dict: ...
+
+    @abstractmethod
+    def get_daily_summary(self, days: int = 7) -> list[dict]: ...
+
+    @abstractmethod
+    def get_daily_summary_json(self, days: int = 7) -> tuple[bytes, int]: ...
+
+    @abstractmethod
+    def get_computer_daily_summary(self, computer_name: str, days: int = 30) -> list[dict]: ...
+
+    @abstractmethod
+    def get_dashboard_snapshot(self, date: str, days: int = 7, timeline_days: int = 7,
+                               timeline_limit: int = 100) -> dict: ...
+
+    @abstractmethod
+    def get_occupancy_at(self, day: str, minute: int) -> list[str]: ...
+
+    @abstractmethod
+    def get_occupancy_curve(self, day: str, step: int = 10) -> dict: ...
+
+    # ---------- 재집계 / 복구 ----------
+
+    @abstractmethod
+    def request_resync(self, computer_name: str, days: int) -> datetime: ...
+
+    @abstractmethod
+    def get_pending_resync(self, computer_name: str) -> Optional[datetime]: ...
+
+    @abstractmethod
+    def get_sync_state(self, computer_name: str) -> dict: ...
+
+    @abstractmethod
+    def ack_resync(self, computer_name: str) -> bool: ...
+
+    @abstractmethod
+    def check_and_recover_offline_shutdowns(self) -> list[dict]: ...
+
+    # ---------- 리더 선출 (lease) ----------
+
+    @abstractmethod
+    def try_acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> bool: ...
+
+    @abstractmethod
+    def release_lease(self, name: str, holder: str) -> bool: ...
+
+    @abstractmethod
+    def get_lease(self, name: str) -> Optional[dict]: ...
+
+    # ---------- Agent 업데이트 다운로드 슬롯 ----------
+
+    @abstractmethod
+    def acquire_download_slot(self, computer_name: str, version: str, max_slots: int,
+                              ttl_seconds: float) -> tuple[bool, float, Optional[str]]: ...
+
+    @abstractmethod
+    def get_download_slot(self, token: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    def get_rollout_progress(self) -> dict: ...
+
+    # ---------- 변경 로그 ----------
+
+    @abstractmethod
+    def get_data_version(self, scope: str = 'data') -> int:
+        """데이터 버전 (ETag / 조회 캐시 무효화용, 쓰기와 같은 트랜잭션에서 증가하는 DB 값)"""
+
+    @abstractmethod
+    def get_changes(self, after: int = 0, limit: int = 500) -> dict: ...
+
+    @abstractmethod
+    def prune_changes(self, retention_days: int = database.CHANGE_RETENTION_DAYS) -> int: ...
+
+    # ---------- 설정 / 세션 ----------
+
+    @abstractmethod
+    def get_setting(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def set_setting(self, key: str, value: str): ...
+
+    @abstractmethod
+    def create_session(self) -> tuple[str, str]: ...
+
+    @abstractmethod
+    def validate_session(self, session_id: str) -> bool: ...
+
+    @abstractmethod
+    def get_session_csrf_token(self, session_id: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def delete_session(self, session_id: str): ...
+
+    @abstractmethod
+    def cleanup_expired_sessions(self) -> int: ...
+
+    # ---------- 유지보수 ----------
+
+    @abstractmethod
+    def optimize_storage(self) -> dict: ...
+
+    @abstractmethod
+    def probe_storage(self, busy_timeout_ms: int = 2000) -> dict: ...
+
+    # ---------- 백엔드 공통 로직 (기본 연산 조합) ----------
+
+    def hash_password(self, password: str) -> str:
+        return database.hash_password(password)
+
+    def is_password_set(self) -> bool:
+        return self.get_setting('admin_password') is not None
+
+    def verify_password(self, password: str) -> bool:
+        """비밀번호 검증 (bcrypt 우선, 레거시 SHA-256 자동 마이그레이션)"""
+        stored_hash = self.get_setting('admin_password')
+        if not stored_hash:
+            return False
+
+        if database.HAS_BCRYPT and database._is_bcrypt_hash(stored_hash):
+            return database.bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+        if database._is_sha256_hash(stored_hash):
+            if database._hash_sha256(password) == stored_hash:
+                if database.HAS_BCRYPT:
+                    self.set_setting('admin_password', self.hash_password(password))
+                    print("[INFO] 비밀번호가 bcrypt로 자동 마이그레이션됨")
+                return True
+            return False
+
+        if not database.HAS_BCRYPT and database._is_bcrypt_hash(stored_hash):
+            print("[ERROR] bcrypt 해시가 저장되어 있지만 bcrypt 미설치")
+        return False
+
+    def validate_csrf_token(self, session_id: str, csrf_token: str) -> bool:
+        stored_token = self.get_session_csrf_token(session_id)
+        if not stored_token or not csrf_token:
+            return False
+        return secrets.compare_digest(stored_token, csrf_token)
+
+
+class SQLiteBackend(StorageBackend):
+    """database.py 모듈 함수 기반 SQLite 백엔드"""
+
+    name = "sqlite"
+
+    init_db = staticmethod(database.init_db)
+
+    insert_event = staticmethod(database.insert_event)
+    insert_events = staticmethod(database.insert_events)
+    get_events = staticmethod(database.get_events)
+    get_events_json = staticmethod(database.get_events_json)
+    iter_events_export = staticmethod(database.iter_events_export)
+    get_last_event = staticmethod(database.get_last_event)
+    get_all_events_timeline = staticmethod(database.get_all_events_timeline)
+
+    get_computers = staticmethod(database.get_computers)
+    get_presence = staticmethod(database.get_presence)
+    update_heartbeat = staticmethod(database.update_heartbeat)
+    register_computer = staticmethod(database.register_computer)
+    get_computer_history = staticmethod(database.get_computer_history)
+    get_computer_history_json = staticmethod(database.get_computer_history_json)
+    set_computer_display_name = staticmethod(database.set_computer_display_name)
+    get_all_display_names = staticmethod(database.get_all_display_names)
+    delete_computer = staticmethod(database.delete_computer)
+    delete_all_computers = staticmethod(database.delete_all_computers)
+
+    get_daily_stats = staticmethod(database.get_daily_stats)
+    get_shutdown_timeline = staticmethod(database.get_shutdown_timeline)
+    get_daily_summary = staticmethod(database.get_daily_summary)
+    get_daily_summary_json = staticmethod(database.get_daily_summary_json)
+    get_computer_daily_summary = staticmethod(database.get_computer_daily_summary)
+    get_dashboard_snapshot = staticmethod(database.get_dashboard_snapshot)
+    get_occupancy_at = staticmethod(database.get_occupancy_at)
+    get_occupancy_curve = staticmethod(database.get_occupancy_curve)
+
+    request_resync = staticmethod(database.request_resync)
+    get_pending_resync = staticmethod(database.get_pending_resync)
+    get_sync_state = staticmethod(database.get_sync_state)
+    ack_resync = staticmethod(database.ack_resync)
+    check_and_recover_offline_shutdowns = staticmethod(database.check_and_recover_offline_shutdowns)
+
+    try_acquire_lease = staticmethod(database.try_acquire_lease)
+    release_lease = staticmethod(database.release_lease)
+    get_lease = staticmethod(database.get_lease)
+
+    acquire_download_slot = staticmethod(database.acquire_download_slot)
+    get_download_slot = staticmethod(database.get_download_slot)
+    get_rollout_progress = staticmethod(database.get_rollout_progress)
+
+    get_data_version = staticmethod(database.get_data_version)
+    get_changes = staticmethod(database.get_changes)
+    prune_changes = staticmethod(database.prune_changes)
+
+    get_setting = staticmethod(database.get_setting)
+    set_setting = staticmethod(database.set_setting)
+    create_session = staticmethod(database.create_session)
+    validate_session = staticmethod(database.validate_session)
+    get_session_csrf_token = staticmethod(database.get_session_csrf_token)
+    delete_session = staticmethod(database.delete_session)
+    cleanup_expired_sessions = staticmethod(database.cleanup_expired_sessions)
+
+    optimize_storage = staticmethod(database.optimize_storage)
+    probe_storage = staticmethod(database.probe_storage)
+
+    verify_password = staticmethod(database.verify_password)
+    is_password_set = staticmethod(database.is_password_set)
+    validate_csrf_token = staticmethod(database.validate_csrf_token)
+
+
+def get_backend(name: Optional[str] = None) -> StorageBackend:
+    """설정(환경 변수)에 따라 스토리지 백엔드 생성"""
+    name = (name or os.environ.get(BACKEND_ENV, "sqlite")).strip().lower()
+    if name not in SUPPORTED_BACKENDS:
+        raise ValueError(f"{BACKEND_ENV}는 {SUPPORTED_BACKENDS} 중 하나여야 합니다: {name}")
+
+    if name == "postgres":
+        from storage_postgres import PostgresBackend
+        dsn = os.environ.get(DATABASE_URL_ENV)
+        if not dsn:
+            raise RuntimeError(f"postgres 백엔드는 {DATABASE_URL_ENV} 설정이 필요합니다")
+        return PostgresBackend(
+            dsn,
+            min_connections=int(os.environ.get("COMPUTEROFF_DB_POOL_MIN", 1)),
+            max_connections=int(os.environ.get("COMPUTEROFF_DB_POOL_MAX", 10)),
+        )
+
+    return SQLiteBackend()
@@ -0,0 +1,1459 @@
+"""PostgreSQL 스토리지 백엔드
+
+SQLite 단일 writer 한계를 넘기 위한 백엔드. database.py와 같은 결과 형식을 반환한다.
+- psycopg2 ThreadedConnectionPool로 커넥션 재사용
+- 시간은 KST naive TIMESTAMP로 저장 (SQLite의 datetime('now', '+9 hours')와 동일 기준)
+- 다건 삽입(이벤트 배치, 자동 복구, 점유 비트맵 재구성)은 execute_values/execute_batch로 왕복 횟수를 줄여 일괄 처리
+
+사용: COMPUTEROFF_DB_BACKEND=postgres, COMPUTEROFF_DATABASE_URL=postgresql://...
+"""
+
+import json
+import secrets
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+from typing import Iterator, Optional
+
+# psycopg2 임포트 (없으면 postgres 백엔드 사용 불가)
+try:
+    import psycopg2
+    import psycopg2.extras
+    import psycopg2.pool
+    HAS_PSYCOPG2 = True
+except ImportError:
+    HAS_PSYCOPG2 = False
+
+import database
+import metrics
+import occupancy
+from storage import StorageBackend
+
+
+# KST 현재 시각 / UTC 현재 시각 (SQLite CURRENT_TIMESTAMP 대응) SQL 조각
+NOW_KST = "(now() AT TIME ZONE 'Asia/Seoul')"
+NOW_UTC = "(now() AT TIME ZONE 'UTC')"
+
+SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS events (
+        id BIGSERIAL PRIMARY KEY,
+        computer_name TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        timestamp TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT {NOW_UTC},
+        event_detail TEXT,
+        event_source TEXT DEFAULT 'realtime',
+        event_record_id BIGINT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_computer_timestamp ON events(computer_name, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp_id ON events(timestamp, id)",
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_event_record
+    ON events(computer_name, event_record_id) WHERE event_record_id IS NOT NULL
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS heartbeats (
+        computer_name TEXT PRIMARY KEY,
+        last_seen TIMESTAMP NOT NULL,
+        ip_address TEXT,
+        agent_version TEXT
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT {NOW_UTC}
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS computers (
+        hostname TEXT PRIMARY KEY,
+        display_name TEXT,
+        created_at TIMESTAMP DEFAULT {NOW_UTC},
+        updated_at TIMESTAMP DEFAULT {NOW_UTC}
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        token_hash TEXT,
+        csrf_token TEXT,
+        created_at TIMESTAMP DEFAULT {NOW_UTC},
+        expires_at TIMESTAMP NOT NULL,
+        last_activity TIMESTAMP DEFAULT {NOW_UTC}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sessions_token_hash ON sessions(token_hash)",
+    f"""
+    CREATE TABLE IF NOT EXISTS resync_requests (
+        computer_name TEXT PRIMARY KEY,
+        since TIMESTAMP NOT NULL,
+        requested_at TIMESTAMP DEFAULT {NOW_UTC},
+        consumed_at TIMESTAMP
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS occupancy (
+        computer_name TEXT NOT NULL,
+        day TEXT NOT NULL,
+        bits BYTEA NOT NULL,
+        updated_at TIMESTAMP DEFAULT {NOW_UTC},
+        PRIMARY KEY (computer_name, day)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_occupancy_day ON occupancy(day)",
+    f"""
+    CREATE TABLE IF NOT EXISTS changes (
+        seq BIGSERIAL PRIMARY KEY,
+        op TEXT NOT NULL,
+        computer_name TEXT,
+        data TEXT,
+        created_at TIMESTAMP DEFAULT {NOW_UTC}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_changes_created ON changes(created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        expires_at DOUBLE PRECISION NOT NULL,
+        acquired_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS download_slots (
+        computer_name TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        token TEXT NOT NULL,
+        granted_at DOUBLE PRECISION NOT NULL,
+        expires_at DOUBLE PRECISION NOT NULL
+    )
+    """,
+    "ALTER TABLE download_slots ADD COLUMN IF NOT EXISTS token TEXT",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_download_slots_token ON download_slots(token)",
+    """
+    CREATE TABLE IF NOT EXISTS data_version (
+        scope TEXT PRIMARY KEY,
+        version BIGINT NOT NULL
+    )
+    """,
+    "INSERT INTO data_version (scope, version) VALUES ('data', 0), ('events', 0) ON CONFLICT DO NOTHING",
+]
+
+# 변경 로그 seq 빈칸 유예 시간 (초)
+# BIGSERIAL은 커밋 순서와 무관하게 할당되므로 seq N+1이 아직 커밋 전인데 N+2가 먼저 보일 수 있다.
+# 쓰기를 전역 잠금으로 직렬화하지 않고, get_changes가 최근에 생긴 빈칸 앞에서 멈춰
+# 다음 조회에서 그 구간을 다시 읽게 한다. 유예 시간이 지난 빈칸은 롤백된 seq로 보고 건너뜀.
+CHANGE_GAP_GRACE_SECONDS = 10
+# 종료 이벤트 자동 복구 직렬화용 advisory lock 키 (대상 조회~삽입을 프로세스 간 한 번에 하나만)
+RECOVERY_LOCK_KEY = 0x436F5265
+# 다운로드 슬롯 직렬화용 advisory lock 키 (READ COMMITTED에서 동시 획득으로 한도를 넘지 않도록)
+DOWNLOAD_SLOTS_LOCK_KEY = 0x436F446C
+
+# 사용 중 다운로드 슬롯 (database._ACTIVE_SLOT_SQL과 동일, DB 서버 시계 기준)
+_ACTIVE_SLOT_SQL = """
+    s.expires_at >= EXTRACT(EPOCH FROM now()) AND NOT EXISTS (
+        SELECT 1 FROM heartbeats h WHERE h.computer_name = s.computer_name AND h.agent_version = s.version
+    )
+"""
+
+
+def _to_json_value(value):
+    """SQLite 백엔드와 같은 형식으로 변환 (datetime → ISO 문자열)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime('%H:%M:%S')
+    return value
+
+
+def _row(row) -> dict:
+    return {key: _to_json_value(value) for key, value in row.items()}
+
+
+def _json_object_sql(columns: tuple) -> str:
+    """json_build_object(...)::text (timestamp는 ISO 형식으로 직렬화됨)"""
+    return "json_build_object(" + ", ".join(f"'{column}', {column}" for column in columns) + ")::text"
+
+
+def _json_array(cursor) -> tuple[bytes, int]:
+    rows = [row['json'] for row in cursor.fetchall()]
+    return ('[' + ','.join(rows) + ']').encode('utf-8'), len(rows)
+
+
+class PostgresBackend(StorageBackend):
+    """psycopg2 커넥션 풀 기반 PostgreSQL 백엔드"""
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10):
+        if not HAS_PSYCOPG2:
+            raise RuntimeError("postgres 백엔드는 psycopg2가 필요합니다 (pip install psycopg2-binary)")
+        self._pool = psycopg2.pool.ThreadedConnectionPool(min_connections, max_connections, dsn)
+
+    @contextmanager
+    def _cursor(self):
+        """풀에서 커넥션을 빌려 트랜잭션 하나를 실행 (정상 종료 시 commit, 예외 시 rollback)"""
+        started = perf_counter()
+        conn = self._pool.getconn()
+        metrics.DB_CONNECT.observe(perf_counter() - started)
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                yield cursor
+            started = perf_counter()
+            conn.commit()
+            metrics.DB_COMMIT.observe(perf_counter() - started)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn)
+
+    def close(self):
+        self._pool.closeall()
+
+    # ==================== 스키마 ====================
+
+    def init_db(self):
+        with self._cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+
+            cursor.execute("SELECT COUNT(*) as cnt FROM occupancy")
+            if cursor.fetchone()['cnt'] == 0:
+                self._rebuild_occupancy(cursor, database.OCCUPANCY_BACKFILL_DAYS)
+
+    # ==================== 데이터 버전 ====================
+
+    def _bump_data_version(self, cursor, computer_names=(None,), events: bool = True):
+        """database.bump_data_version과 같음 (PC 해시별 행만 잠그므로 다른 PC의 쓰기와 직렬화되지 않음)"""
+        cursor.execute("""
+            INSERT INTO data_version (scope, version)
+            SELECT key, 1 FROM unnest(%s::text[]) AS key
+            ON CONFLICT (scope) DO UPDATE SET version = data_version.version + 1
+        """, (database.data_version_keys(computer_names, events),))
+
+    def get_data_version(self, scope: str = 'data') -> int:
+        with self._cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(version), 0) as version FROM data_version WHERE scope = %s OR scope LIKE %s",
+                (scope, f"{scope}:%")
+            )
+            return int(cursor.fetchone()['version'])
+
+    # ==================== 변경 로그 ====================
+
+    def _record_change(self, cursor, op: str, computer_name: Optional[str] = None, data: Optional[dict] = None):
+        self._record_changes(cursor, [(op, computer_name, data)])
+
+    def _record_changes(self, cursor, changes: list[tuple[str, Optional[str], Optional[dict]]]):
+        """변경 로그 여러 건을 한 번에 기록 ((op, computer_name, data) 목록, 순서대로 seq 할당)"""
+        if not changes:
+            return
+        psycopg2.extras.execute_values(
+            cursor,
+            "INSERT INTO changes (op, computer_name, data) VALUES %s",
+            [
+                (op, computer_name,
+                 json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_to_json_value) if data else None)
+                for op, computer_name, data in changes
+            ],
+            page_size=len(changes)
+        )
+
+    def get_changes(self, after: int = 0, limit: int = 500) -> dict:
+        """database.get_changes와 같은 형식
+
+        seq 빈칸 바로 뒤 변경이 CHANGE_GAP_GRACE_SECONDS보다 최근이면 빈칸 앞까지만 돌려준다
+        (빈칸의 seq를 가진 트랜잭션이 아직 커밋 전일 수 있음). 소비자는 last_seq부터 다시 요청하면
+        그 구간을 다시 읽게 되므로 늦게 커밋된 변경을 놓치지 않는다.
+        """
+        limit = max(1, min(limit, database.CHANGE_BATCH_MAX))
+        with self._cursor() as cursor:
+            cursor.execute("SELECT MIN(seq) as min_seq, MAX(seq) as max_seq FROM changes")
+            bounds = cursor.fetchone()
+            cursor.execute("SELECT last_value, is_called FROM changes_seq_seq")
+            sequence = cursor.fetchone()
+            head_seq = sequence['last_value'] if sequence['is_called'] else 0
+
+            cursor.execute(f"""
+                SELECT seq, op, computer_name, data, created_at,
+                       EXTRACT(EPOCH FROM ({NOW_UTC} - created_at)) AS age
+                FROM changes
+                WHERE seq > %s
+                ORDER BY seq
+                LIMIT %s
+            """, (after, limit))
+            rows = cursor.fetchall()
+
+        changes = []
+        held = False
+        expected = after + 1
+        for row in rows:
+            age = row.pop('age')
+            if row['seq'] != expected and age < CHANGE_GAP_GRACE_SECONDS:
+                held = True
+                break
+            change = _row(row)
+            change['data'] = json.loads(change['data']) if change['data'] else None
+            changes.append(change)
+            expected = row['seq'] + 1
+
+        min_seq = bounds['min_seq'] if bounds['min_seq'] is not None else head_seq + 1
+        last_seq = changes[-1]['seq'] if changes else max(after, 0)
+        return {
+            'changes': changes,
+            'last_seq': last_seq,
+            'head_seq': head_seq,
+            'has_more': not held and bounds['max_seq'] is not None and last_seq < bounds['max_seq'],
+            'reset_required': after < min_seq - 1
+        }
+
+    def prune_changes(self, retention_days: int = database.CHANGE_RETENTION_DAYS) -> int:
+        with self._cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM changes WHERE created_at < {NOW_UTC} - make_interval(days => %s)",
+                (retention_days,)
+            )
+            return cursor.rowcount
+
+    # ==================== 점유 비트맵 ====================
+
+    def _occupancy_mark(self, cursor, computer_name: str, start: datetime, end: Optional[datetime] = None):
+        self._occupancy_mark_spans(cursor, [(computer_name, start, end)])
+
+    def _occupancy_mark_spans(self, cursor, spans: list[tuple[str, datetime, Optional[datetime]]]):
+        """(computer_name, start, end) 구간들을 비트맵에 표시 (조회 1회 + 저장 1회)"""
+        ranges = {}
+        for computer_name, start, end in spans:
+            if end is None or end < start:
+                end = start
+            if end - start > timedelta(days=database.OCCUPANCY_MAX_SPAN_DAYS):
+                start = end - timedelta(days=database.OCCUPANCY_MAX_SPAN_DAYS)
+            for day, start_minute, end_minute in occupancy.split_by_day(start, end):
+                ranges.setdefault((computer_name, day), []).append((start_minute, end_minute))
+        if not ranges:
+            return
+
+        # 같은 순서로 행 잠금 (동시 배치끼리 교착 방지)
+        keys = sorted(ranges)
+        cursor.execute("""
+            SELECT computer_name, day, bits FROM occupancy
+            WHERE (computer_name, day) IN %s
+            ORDER BY computer_name, day
+            FOR UPDATE
+        """, (tuple(keys),))
+        bitmaps = {(row['computer_name'], row['day']): bytearray(row['bits']) for row in cursor.fetchall()}
+        for key in keys:
+            bits = bitmaps.setdefault(key, occupancy.empty_bitmap())
+            for start_minute, end_minute in ranges[key]:
+                occupancy.set_range(bits, start_minute, end_minute)
+
+        psycopg2.extras.execute_values(cursor, """
+            INSERT INTO occupancy (computer_name, day, bits, updated_at)
+            VALUES %s
+            ON CONFLICT (computer_name, day) DO UPDATE SET
+                bits = EXCLUDED.bits,
+                updated_at = EXCLUDED.updated_at
+        """, [(computer_name, day, psycopg2.Binary(bytes(bitmaps[(computer_name, day)])))
+              for computer_name, day in keys],
+            template=f"(%s, %s, %s, {NOW_UTC})", page_size=len(keys))
+
+    def _occupancy_mark_events(self, cursor, events: list[tuple[str, str, datetime]]):
+        """저장된 (computer_name, event_type, timestamp) 이벤트들의 점유 구간 표시
+
+        database._occupancy_mark_event와 같은 규칙: shutdown은 직전 이벤트가 boot면 그 구간,
+        boot는 직후 이벤트가 shutdown이면 그 구간, 아니면 그 분만. 이웃 조회는 배치 전체 1회.
+        """
+        events = [event for event in events if event[1] in ('boot', 'shutdown') and event[2] is not None]
+        if not events:
+            return
+        rows = psycopg2.extras.execute_values(cursor, """
+            SELECT v.idx, p.event_type AS prev_type, p.timestamp AS prev_ts,
+                   n.event_type AS next_type, n.timestamp AS next_ts
+            FROM (VALUES %s) AS v(idx, computer_name, event_type, ts)
+            LEFT JOIN LATERAL (
+                SELECT event_type, timestamp FROM events e
+                WHERE v.event_type = 'shutdown'
+                AND e.computer_name = v.computer_name AND e.event_type IN ('boot', 'shutdown')
+                AND e.timestamp < v.ts
+                ORDER BY e.timestamp DESC
+                LIMIT 1
+            ) p ON true
+            LEFT JOIN LATERAL (
+                SELECT event_type, timestamp FROM events e
+                WHERE v.event_type = 'boot'
+                AND e.computer_name = v.computer_name AND e.event_type IN ('boot', 'shutdown')
+                AND e.timestamp > v.ts
+                ORDER BY e.timestamp ASC
+                LIMIT 1
+            ) n ON true
+        """, [(idx, computer_name, event_type, timestamp)
+              for idx, (computer_name, event_type, timestamp) in enumerate(events)],
+            template="(%s, %s, %s, %s::timestamp)", page_size=len(events), fetch=True)
+
+        spans = []
+        for row in rows:
+            computer_name, event_type, timestamp = events[row['idx']]
+            if event_type == 'shutdown' and row['prev_type'] == 'boot':
+                spans.append((computer_name, row['prev_ts'], timestamp))
+            elif event_type == 'boot' and row['next_type'] == 'shutdown':
+                spans.append((computer_name, timestamp, row['next_ts']))
+            else:
+                spans.append((computer_name, timestamp, None))
+        self._occupancy_mark_spans(cursor, spans)
+
+    def _rebuild_occupancy(self, cursor, days: int):
+        cursor.execute(f"""
+            SELECT computer_name, event_type, timestamp FROM events
+            WHERE event_type IN ('boot', 'shutdown')
+            AND timestamp >= ({NOW_KST})::date - %s
+            ORDER BY computer_name, timestamp
+        """, (days,))
+        rows = cursor.fetchall()
+
+        # 메모리에서 비트맵을 완성한 뒤 executemany로 일괄 저장
+        bitmaps = {}
+        last_boot = {}
+
+        def mark(computer_name, start, end):
+            for day, start_minute, end_minute in occupancy.split_by_day(start, end):
+                bits = bitmaps.setdefault((computer_name, day), occupancy.empty_bitmap())
+                occupancy.set_range(bits, start_minute, end_minute)
+
+        for row in rows:
+            computer_name, ts = row['computer_name'], row['timestamp']
+            if row['event_type'] == 'boot':
+                mark(computer_name, ts, ts)
+                last_boot[computer_name] = ts
+            else:
+                boot = last_boot.pop(computer_name, None)
+                start = boot or ts
+                if ts - start > timedelta(days=database.OCCUPANCY_MAX_SPAN_DAYS):
+                    start = ts - timedelta(days=database.OCCUPANCY_MAX_SPAN_DAYS)
+                mark(computer_name, start, ts)
+
+        if bitmaps:
+            psycopg2.extras.execute_batch(cursor, """
+                INSERT INTO occupancy (computer_name, day, bits)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (computer_name, day) DO UPDATE SET bits = EXCLUDED.bits
+            """, [(name, day, psycopg2.Binary(bytes(bits))) for (name, day), bits in bitmaps.items()])
+
+    def _get_occupancy_bitmaps(self, day: str) -> list[tuple[str, bytes]]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT computer_name, bits FROM occupancy
+                WHERE day = %s
+                ORDER BY computer_name
+            """, (day,))
+            return [(row['computer_name'], bytes(row['bits'])) for row in cursor.fetchall()]
+
+    def get_occupancy_at(self, day: str, minute: int) -> list[str]:
+        return [
+            computer_name
+            for computer_name, bits in self._get_occupancy_bitmaps(day)
+            if occupancy.is_set(bits, minute)
+        ]
+
+    def get_occupancy_curve(self, day: str, step: int = 10) -> dict:
+        bitmaps = self._get_occupancy_bitmaps(day)
+        counts = occupancy.sum_bitmaps([bits for _, bits in bitmaps])
+        return {
+            'curve': occupancy.bucket_curve(counts, step),
+            'peak': max(counts) if counts else 0,
+            'computers': [
+                {'computer_name': computer_name, 'minutes': occupancy.popcount(bits)}
+                for computer_name, bits in bitmaps
+            ]
+        }
+
+    # ==================== 이벤트 ====================
+
+    def insert_event(
+        self,
+        computer_name: str,
+        event_type: str,
+        timestamp: datetime,
+        event_detail: Optional[str] = None,
+        event_source: str = 'realtime',
+        event_record_id: Optional[int] = None
+    ) -> tuple[int, bool]:
+        """이벤트 삽입 (중복/덮어쓰기 정책은 database.insert_event와 동일, 1건짜리 insert_events)"""
+        return self.insert_events([{
+            'computer_name': computer_name,
+            'event_type': event_type,
+            'timestamp': timestamp,
+            'event_detail': event_detail,
+            'event_source': event_source,
+            'event_record_id': event_record_id,
+        }])[0]
+
+    def insert_events(self, events: list[dict]) -> list[tuple[int, bool]]:
+        """이벤트 일괄 삽입 (단일 트랜잭션, 정책은 insert_event와 동일)
+
+        행마다 SELECT/INSERT를 반복하지 않고 배치 전체를 쿼리 몇 번으로 처리한다.
+        1. 기존 행 조회: event_record_id 일치 / 60초 이내 같은 종류 (VALUES 목록 조인 1회)
+        2. 중복/덮어쓰기 판정은 배치 순서대로 메모리에서 (배치 안 항목끼리도 비교)
+        3. 새 행은 execute_values + ON CONFLICT DO NOTHING으로 한 번에 삽입.
+           동시에 같은 event_record_id를 커밋한 트랜잭션이 있으면 그 행은 중복으로 처리
+        4. 덮어쓰기, 점유 비트맵, 변경 로그도 배치 단위로 반영
+        """
+        if not events:
+            return []
+        items = [
+            [
+                event['computer_name'],
+                event['event_type'],
+                database._parse_timestamp(event['timestamp']),
+                event.get('event_detail'),
+                event.get('event_source') or 'realtime',
+                event.get('event_record_id'),
+            ]
+            for event in events
+        ]
+        with self._cursor() as cursor:
+            results = self._insert_events(cursor, items)
+            inserted = {item[0] for item, (_, is_duplicate) in zip(items, results) if not is_duplicate}
+            if inserted:
+                self._bump_data_version(cursor, inserted)
+        return results
+
+    def _insert_events(self, cursor, items: list[list]) -> list[tuple[int, bool]]:
+        """insert_events 본체. items: [computer_name, event_type, timestamp, detail, source, record_id]"""
+        found = {row['idx']: row for row in psycopg2.extras.execute_values(cursor, """
+            SELECT v.idx, r.id AS record_match, t.id AS time_match, t.event_record_id AS time_record_id
+            FROM (VALUES %s) AS v(idx, computer_name, event_type, ts, event_record_id)
+            LEFT JOIN events r
+                ON r.computer_name = v.computer_name AND r.event_record_id = v.event_record_id
+            LEFT JOIN LATERAL (
+                SELECT id, event_record_id FROM events e
+                WHERE e.computer_name = v.computer_name AND e.event_type = v.event_type
+                AND e.timestamp BETWEEN v.ts - interval '60 seconds' AND v.ts + interval '60 seconds'
+                AND ABS(EXTRACT(EPOCH FROM (v.ts - e.timestamp))) < 60
+                LIMIT 1
+            ) t ON true
+        """, [(idx, item[0], item[1], item[2], item[5]) for idx, item in enumerate(items)],
+            template="(%s, %s, %s, %s::timestamp, %s::bigint)", page_size=len(items), fetch=True)}
+
+        # 판정 결과: ('db', 행 id, 중복 여부) 또는 ('new', 삽입할 항목 번호, 중복 여부)
+        outcomes = []
+        pending = []          # 삽입할 항목 번호 (배치 순서)
+        pending_by_kind = {}  # (computer_name, event_type) → 삽입할 항목 번호 목록 (60초 비교용)
+        record_owner = {}     # (computer_name, event_record_id) → ('db', id) / ('new', 항목 번호)
+        overwrites = {}       # 덮어쓸 기존 행 id → 항목 번호
+        for idx, (computer_name, event_type, timestamp, _, _, event_record_id) in enumerate(items):
+            row = found[idx]
+            if event_record_id is not None:
+                owner = record_owner.get((computer_name, event_record_id))
+                if owner is None and row['record_match'] is not None:
+                    owner = ('db', row['record_match'])
+                if owner:
+                    metrics.EVENTS_INGESTED.inc('duplicate')
+                    outcomes.append((*owner, True))
+                    continue
+
+            target = None
+            if row['time_match'] is not None:
+                target_record_id = items[overwrites[row['time_match']]][5] \
+                    if row['time_match'] in overwrites else row['time_record_id']
+                target = ('db', row['time_match'], target_record_id)
+            else:
+                for other in pending_by_kind.get((computer_name, event_type), ()):
+                    if abs((items[other][2] - timestamp).total_seconds()) < 60:
+                        target = ('new', other, items[other][5])
+                        break
+
+            if target is None:
+                pending.append(idx)
+                pending_by_kind.setdefault((computer_name, event_type), []).append(idx)
+                if event_record_id is not None:
+                    record_owner[(computer_name, event_record_id)] = ('new', idx)
+                outcomes.append(('new', idx, False))
+                continue
+
+            kind, ref, target_record_id = target
+            if event_record_id is None or target_record_id is not None:
+                metrics.EVENTS_INGESTED.inc('duplicate')
+                outcomes.append((kind, ref, True))
+                continue
+
+            # 권위 있는 이벤트 로그 기반 이벤트로 근사값 이벤트를 덮어씀
+            if kind == 'db':
+                overwrites[ref] = idx
+            else:
+                # 아직 삽입 전인 배치 항목이면 삽입할 값을 바꿈 (insert 1건으로 기록)
+                items[ref][2:] = items[idx][2:]
+            record_owner[(computer_name, event_record_id)] = (kind, ref)
+            metrics.EVENTS_INGESTED.inc('overwritten')
+            outcomes.append((kind, ref, False))
+
+        new_ids = {}
+        conflicts = []
+        if pending:
+            inserted = psycopg2.extras.execute_values(cursor, """
+                INSERT INTO events (computer_name, event_type, timestamp, event_detail, event_source, event_record_id)
+                VALUES %s
+                ON CONFLICT (computer_name, event_record_id) WHERE event_record_id IS NOT NULL DO NOTHING
+                RETURNING id, computer_name, event_type, timestamp
+            """, [tuple(items[idx]) for idx in pending], page_size=len(pending), fetch=True)
+            # 배치 안 같은 PC·종류는 60초 이상 떨어져 있으므로 (PC, 종류, 시각)으로 구분됨
+            inserted_ids = {(row['computer_name'], row['event_type'], row['timestamp']): row['id'] for row in inserted}
+            for idx in pending:
+                event_id = inserted_ids.get(tuple(items[idx][:3]))
+                if event_id is None:
+                    conflicts.append(idx)
+                else:
+                    new_ids[idx] = event_id
+            metrics.EVENTS_INGESTED.inc('inserted', amount=len(new_ids))
+
+        # 다른 트랜잭션이 먼저 커밋한 event_record_id → 그 행의 중복
+        conflict_ids = {}
+        if conflicts:
+            cursor.execute("""
+                SELECT id, computer_name, event_record_id FROM events
+                WHERE (computer_name, event_record_id) IN %s
+            """, (tuple((items[idx][0], items[idx][5]) for idx in conflicts),))
+            existing = {(row['computer_name'], row['event_record_id']): row['id'] for row in cursor.fetchall()}
+            for idx in conflicts:
+                conflict_ids[idx] = existing[(items[idx][0], items[idx][5])]
+            metrics.EVENTS_INGESTED.inc('duplicate', amount=len(conflicts))
+
+        if overwrites:
+            psycopg2.extras.execute_values(cursor, """
+                UPDATE events AS e
+                SET timestamp = v.ts, event_detail = v.event_detail,
+                    event_source = v.event_source, event_record_id = v.event_record_id
+                FROM (VALUES %s) AS v(id, ts, event_detail, event_source, event_record_id)
+                WHERE e.id = v.id
+            """, [(event_id, *items[idx][2:]) for event_id, idx in overwrites.items()],
+                template="(%s, %s::timestamp, %s, %s, %s::bigint)", page_size=len(overwrites))
+
+        # 변경 로그는 배치 순서대로
+        written = {idx: (database.CHANGE_EVENT_OVERWRITE, event_id) for event_id, idx in overwrites.items()}
+        written.update((idx, (database.CHANGE_EVENT_INSERT, event_id)) for idx, event_id in new_ids.items())
+        changes = []
+        marks = []
+        for idx in sorted(written):
+            op, event_id = written[idx]
+            computer_name, event_type, timestamp, event_detail, event_source, event_record_id = items[idx]
+            marks.append((computer_name, event_type, timestamp))
+            changes.append((op, computer_name, database._event_change_data(
+                event_id, event_type, timestamp, event_detail, event_source, event_record_id
+            )))
+        self._occupancy_mark_events(cursor, marks)
+        self._record_changes(cursor, changes)
+
+        results = []
+        for kind, ref, is_duplicate in outcomes:
+            if kind == 'db':
+                results.append((ref, is_duplicate))
+            elif ref in conflict_ids:
+                results.append((conflict_ids[ref], True))
+            else:
+                results.append((new_ids[ref], is_duplicate))
+        return results
+
+    def _events_query(self, select: str, computer_name: Optional[str], event_type: Optional[str],
+                      start_date: Optional[datetime], end_date: Optional[datetime],
+                      limit: int, after: Optional[tuple[str, int]] = None) -> tuple[str, list]:
+        query = f"SELECT {select} FROM events WHERE 1=1"
+        params = []
+
+        if computer_name:
+            query += " AND computer_name = %s"
+            params.append(computer_name)
+        if event_type:
+            query += " AND event_type = %s"
+            params.append(event_type)
+        if start_date:
+            query += " AND timestamp >= %s"
+            params.append(database._parse_timestamp(start_date))
+        if end_date:
+            query += " AND timestamp <= %s"
+            params.append(database._parse_timestamp(end_date))
+        if after:
+            query += " AND (timestamp, id) < (%s, %s)"
+            params.extend([database._parse_timestamp(after[0]), after[1]])
+
+        query += " ORDER BY timestamp DESC, id DESC LIMIT %s"
+        params.append(limit)
+        return query, params
+
+    def get_events(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> list[dict]:
+        after = database.decode_cursor(cursor) if cursor else None
+        with self._cursor() as db_cursor:
+            db_cursor.execute(*self._events_query(
+                "*", computer_name, event_type, start_date, end_date, database.page_limit(limit), after
+            ))
+            return [_row(row) for row in db_cursor.fetchall()]
+
+    def get_events_json(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> tuple[bytes, int, Optional[str]]:
+        after = database.decode_cursor(cursor) if cursor else None
+        limit = database.page_limit(limit)
+        select = _json_object_sql(database.EVENT_JSON_COLUMNS) + " as json, timestamp, id"
+        with self._cursor() as db_cursor:
+            db_cursor.execute(*self._events_query(
+                select, computer_name, event_type, start_date, end_date, limit + 1, after
+            ))
+            rows = db_cursor.fetchall()
+
+        next_cursor = database._next_cursor(rows, limit)
+        rows = rows[:limit]
+        return ('[' + ','.join(row['json'] for row in rows) + ']').encode('utf-8'), len(rows), next_cursor
+
+    def iter_events_export(
+        self,
+        computer_name: Optional[str] = None,
+        event_type: Optional[str] = None,
+        event_source: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        batch_size: int = database.EXPORT_BATCH_SIZE
+    ) -> Iterator[list[tuple]]:
+        """서버 측 커서(named cursor)로 batch_size건씩 전송받아 생성 (커넥션은 끝까지 점유)"""
+        where, params = database._export_filters(
+            computer_name, event_type, event_source, start_date, end_date, placeholder='%s'
+        )
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor(name=f"export_{secrets.token_hex(4)}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"""
+                    SELECT e.id, e.timestamp, e.computer_name, c.display_name, e.event_type,
+                           e.event_detail, e.event_source, e.event_record_id, e.created_at
+                    FROM events e
+                    LEFT JOIN computers c ON c.hostname = e.computer_name
+                    {where}
+                    ORDER BY e.timestamp, e.id
+                """, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [tuple(_to_json_value(value) for value in row) for row in rows]
+            conn.commit()
+        except BaseException:
+            # GeneratorExit(클라이언트 연결 종료) 포함 - 열린 트랜잭션 정리
+            conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn)
+
+    def get_last_event(self, computer_name: str, event_type: str) -> Optional[dict]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT id, computer_name, event_type, timestamp
+                FROM events
+                WHERE computer_name = %s AND event_type = %s
+                ORDER BY timestamp DESC
+                LIMIT 1
+            """, (computer_name, event_type))
+            row = cursor.fetchone()
+        return _row(row) if row else None
+
+    def get_all_events_timeline(self, days: int = 7, limit: int = 100,
+                                cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+        after = database.decode_cursor(cursor) if cursor else None
+        with self._cursor() as db_cursor:
+            return self._select_events_timeline(db_cursor, days, limit, after)
+
+    def _select_events_timeline(self, cursor, days: int, limit: int,
+                                after: Optional[tuple[str, int]] = None) -> tuple[list[dict], Optional[str]]:
+        limit = database.page_limit(limit)
+        keyset = "AND (e.timestamp, e.id) < (%s, %s)" if after else ""
+        keyset_params = (database._parse_timestamp(after[0]), after[1]) if after else ()
+        cursor.execute(f"""
+            SELECT
+                e.id, e.computer_name, e.event_type, e.timestamp,
+                e.event_detail, e.event_source, c.display_name
+            FROM events e
+            LEFT JOIN computers c ON e.computer_name = c.hostname
+            WHERE e.timestamp >= ({NOW_KST})::date - %s
+            AND e.event_type IN ('boot', 'shutdown')
+            {keyset}
+            ORDER BY e.timestamp DESC, e.id DESC
+            LIMIT %s
+        """, (days, *keyset_params, limit + 1))
+        rows = [_row(row) for row in cursor.fetchall()]
+        return rows[:limit], database._next_cursor(rows, limit)
+
+    # ==================== 컴퓨터 / 하트비트 ====================
+
+    def get_computers(self) -> list[dict]:
+        with self._cursor() as cursor:
+            return self._select_computers(cursor)
+
+    def _select_computers(self, cursor) -> list[dict]:
+        cursor.execute(f"""
+            SELECT
+                e.computer_name,
+                MAX(CASE WHEN e.event_type = 'boot' THEN e.timestamp END) as last_boot,
+                MAX(CASE WHEN e.event_type = 'shutdown' THEN e.timestamp END) as last_shutdown,
+                COUNT(*) as total_events,
+                h.last_seen,
+                h.ip_address,
+                c.display_name,
+                EXTRACT(EPOCH FROM ({NOW_KST} - h.last_seen)) as seconds_ago
+            FROM events e
+            LEFT JOIN heartbeats h ON e.computer_name = h.computer_name
+            LEFT JOIN computers c ON e.computer_name = c.hostname
+            GROUP BY e.computer_name, h.last_seen, h.ip_address, c.display_name
+            ORDER BY MAX(e.timestamp) DESC
+        """)
+        rows = cursor.fetchall()
+
+        result = []
+        for row in rows:
+            seconds_ago = row.pop('seconds_ago')
+            data = _row(row)
+            if data.get('last_seen'):
+                seconds_ago = float(seconds_ago) if seconds_ago is not None else 9999
+                data['status'] = 'online' if seconds_ago < database.ONLINE_THRESHOLD_SECONDS else 'offline'
+                data['seconds_ago'] = int(seconds_ago)
+            else:
+                last_boot = data.get('last_boot')
+                last_shutdown = data.get('last_shutdown')
+                if last_boot and last_shutdown:
+                    data['status'] = 'online' if last_boot > last_shutdown else 'offline'
+                elif last_boot:
+                    data['status'] = 'online'
+                else:
+                    data['status'] = 'offline'
+            result.append(data)
+        return result
+
+    def get_presence(self) -> list[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT computer_name, last_seen, ip_address,
+                       EXTRACT(EPOCH FROM ({NOW_KST} - last_seen)) as seconds_ago
+                FROM heartbeats
+            """)
+            rows = cursor.fetchall()
+
+        result = []
+        for row in rows:
+            seconds_ago = row.pop('seconds_ago')
+            seconds_ago = float(seconds_ago) if seconds_ago is not None else 9999
+            data = _row(row)
+            data['status'] = 'online' if seconds_ago < database.ONLINE_THRESHOLD_SECONDS else 'offline'
+            data['seconds_ago'] = int(seconds_ago)
+            result.append(data)
+        return result
+
+    def update_heartbeat(self, computer_name: str, ip_address: Optional[str] = None,
+                         agent_version: Optional[str] = None):
+        with self._cursor() as cursor:
+            cursor.execute(
+                "SELECT last_seen, ip_address, agent_version FROM heartbeats WHERE computer_name = %s FOR UPDATE",
+                (computer_name,)
+            )
+            row = cursor.fetchone()
+            previous = row['last_seen'] if row else None
+
+            cursor.execute(f"""
+                INSERT INTO heartbeats (computer_name, last_seen, ip_address, agent_version)
+                VALUES (%s, {NOW_KST}, %s, %s)
+                ON CONFLICT (computer_name) DO UPDATE SET
+                    last_seen = EXCLUDED.last_seen,
+                    ip_address = EXCLUDED.ip_address,
+                    agent_version = EXCLUDED.agent_version
+                RETURNING last_seen
+            """, (computer_name, ip_address, agent_version))
+            now = cursor.fetchone()['last_seen']
+
+            # 직전 하트비트와 같은 분이면 이미 표시되어 있음
+            if previous is None or not occupancy.same_minute(previous, now):
+                if previous and timedelta(0) <= now - previous < timedelta(seconds=database.ONLINE_THRESHOLD_SECONDS):
+                    self._occupancy_mark(cursor, computer_name, previous, now)
+                else:
+                    self._occupancy_mark(cursor, computer_name, now)
+            if database.heartbeat_changes_listing(row, previous, now, ip_address, agent_version):
+                self._bump_data_version(cursor, (computer_name,), events=False)
+
+    def register_computer(self, computer_name: str, ip_address: Optional[str] = None):
+        with self._cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) as cnt FROM events WHERE computer_name = %s",
+                (computer_name,)
+            )
+            existing_count = cursor.fetchone()['cnt']
+
+            cursor.execute(f"""
+                INSERT INTO computers (hostname, created_at, updated_at)
+                VALUES (%s, {NOW_KST}, {NOW_KST})
+                ON CONFLICT (hostname) DO NOTHING
+            """, (computer_name,))
+
+            cursor.execute(f"""
+                INSERT INTO heartbeats (computer_name, last_seen, ip_address)
+                VALUES (%s, {NOW_KST}, %s)
+                ON CONFLICT (computer_name) DO UPDATE SET
+                    last_seen = EXCLUDED.last_seen,
+                    ip_address = EXCLUDED.ip_address,
+                    agent_version = NULL
+            """, (computer_name, ip_address))
+
+            if existing_count == 0:
+                cursor.execute(f"""
+                    INSERT INTO events (computer_name, event_type, timestamp)
+                    VALUES (%s, 'install', {NOW_KST})
+                    RETURNING id, timestamp
+                """, (computer_name,))
+                install = cursor.fetchone()
+                self._record_change(cursor, database.CHANGE_EVENT_INSERT, computer_name, database._event_change_data(
+                    install['id'], 'install', install['timestamp'], event_source='realtime'
+                ))
+            self._bump_data_version(cursor, (computer_name,))
+
+    _HISTORY_SQL = f"""
+        SELECT {{select}} FROM events
+        WHERE computer_name = %s
+        AND event_type IN ('boot', 'shutdown')
+        AND timestamp >= {NOW_KST} - make_interval(days => %s)
+        ORDER BY timestamp DESC
+    """
+
+    def get_computer_history(self, computer_name: str, days: int = 30) -> list[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(self._HISTORY_SQL.format(select="*"), (computer_name, days))
+            return [_row(row) for row in cursor.fetchall()]
+
+    def get_computer_history_json(self, computer_name: str, days: int = 30) -> tuple[bytes, int]:
+        select = _json_object_sql(database.EVENT_JSON_COLUMNS) + " as json"
+        with self._cursor() as cursor:
+            cursor.execute(self._HISTORY_SQL.format(select=select), (computer_name, days))
+            return _json_array(cursor)
+
+    def set_computer_display_name(self, hostname: str, display_name: str):
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO computers (hostname, display_name, updated_at)
+                VALUES (%s, %s, {NOW_KST})
+                ON CONFLICT (hostname) DO UPDATE SET
+                    display_name = EXCLUDED.display_name,
+                    updated_at = EXCLUDED.updated_at
+            """, (hostname, display_name))
+            self._record_change(cursor, database.CHANGE_RENAME, hostname, {'display_name': display_name})
+            self._bump_data_version(cursor, (hostname,))
+
+    def get_all_display_names(self) -> dict:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT hostname, display_name FROM computers WHERE display_name IS NOT NULL")
+            return {row['hostname']: row['display_name'] for row in cursor.fetchall()}
+
+    def delete_computer(self, hostname: str) -> int:
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM events WHERE computer_name = %s", (hostname,))
+            deleted_events = cursor.rowcount
+            cursor.execute("DELETE FROM heartbeats WHERE computer_name = %s", (hostname,))
+            cursor.execute("DELETE FROM computers WHERE hostname = %s", (hostname,))
+            cursor.execute("DELETE FROM occupancy WHERE computer_name = %s", (hostname,))
+            self._record_change(cursor, database.CHANGE_DELETE, hostname, {'deleted_events': deleted_events})
+            self._bump_data_version(cursor, (hostname,))
+        return deleted_events
+
+    def delete_all_computers(self) -> dict:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) as cnt, COUNT(DISTINCT computer_name) as computers FROM events")
+            counts = cursor.fetchone()
+            cursor.execute("DELETE FROM events")
+            cursor.execute("DELETE FROM heartbeats")
+            cursor.execute("DELETE FROM computers")
+            cursor.execute("DELETE FROM occupancy")
+            self._record_change(cursor, database.CHANGE_DELETE_ALL, None, {
+                'deleted_computers': counts['computers'],
+                'deleted_events': counts['cnt']
+            })
+            self._bump_data_version(cursor)
+        return {
+            "deleted_computers": counts['computers'],
+            "deleted_events": counts['cnt']
+        }
+
+    # ==================== 집계 ====================
+
+    def get_daily_stats(self, computer_name: Optional[str] = None, days: int = 7) -> list[dict]:
+        query = f"""
+            SELECT
+                to_char(timestamp, 'YYYY-MM-DD') as date,
+                computer_name,
+                SUM(CASE WHEN event_type = 'boot' THEN 1 ELSE 0 END) as boot_count,
+                SUM(CASE WHEN event_type = 'shutdown' THEN 1 ELSE 0 END) as shutdown_count
+            FROM events
+            WHERE timestamp >= ({NOW_KST})::date - %s
+        """
+        params = [days]
+        if computer_name:
+            query += " AND computer_name = %s"
+            params.append(computer_name)
+        query += " GROUP BY to_char(timestamp, 'YYYY-MM-DD'), computer_name ORDER BY date DESC"
+
+        with self._cursor() as cursor:
+            cursor.execute(query, params)
+            return [_row(row) for row in cursor.fetchall()]
+
+    def get_shutdown_timeline(self, days: int = 7) -> dict:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT DISTINCT to_char(timestamp, 'YYYY-MM-DD') as date
+                FROM events
+                WHERE timestamp >= ({NOW_KST})::date - %s
+                ORDER BY date DESC
+            """, (days,))
+            dates = [row['date'] for row in cursor.fetchall()]
+
+            cursor.execute(f"""
+                SELECT DISTINCT computer_name
+                FROM events
+                WHERE timestamp >= ({NOW_KST})::date - %s
+                ORDER BY computer_name
+            """, (days,))
+            computers = [row['computer_name'] for row in cursor.fetchall()]
+
+            cursor.execute(f"""
+                SELECT
+                    to_char(timestamp, 'YYYY-MM-DD') as date,
+                    computer_name,
+                    to_char(MAX(timestamp), 'HH24:MI:SS') as shutdown_time,
+                    COUNT(*) as event_count
+                FROM events
+                WHERE event_type = 'shutdown'
+                AND timestamp >= ({NOW_KST})::date - %s
+                GROUP BY to_char(timestamp, 'YYYY-MM-DD'), computer_name
+            """, (days,))
+
+            timeline = {d: {} for d in dates}
+            for row in cursor.fetchall():
+                timeline[row['date']][row['computer_name']] = {
+                    'time': row['shutdown_time'],
+                    'event_count': row['event_count']
+                }
+
+        return {
+            'dates': dates,
+            'computers': computers,
+            'display_names': self.get_all_display_names(),
+            'timeline': timeline
+        }
+
+    _DAILY_SUMMARY_TEMPLATE = f"""
+        SELECT
+            to_char(e.timestamp::date, 'YYYY-MM-DD') as date,
+            e.computer_name,
+            MIN(CASE WHEN e.event_type = 'boot' THEN to_char(e.timestamp, 'HH24:MI:SS') END) as first_boot,
+            MAX(CASE WHEN e.event_type = 'shutdown' THEN to_char(e.timestamp, 'HH24:MI:SS') END) as last_shutdown,
+            (
+                SELECT e2.event_detail
+                FROM events e2
+                WHERE e2.computer_name = e.computer_name
+                AND e2.timestamp::date = e.timestamp::date
+                AND e2.event_type = 'shutdown'
+                ORDER BY e2.timestamp DESC
+                LIMIT 1
+            ) as shutdown_detail,
+            c.display_name
+        FROM events e
+        LEFT JOIN computers c ON c.hostname = e.computer_name
+        WHERE {{where}}
+        AND e.event_type IN ('boot', 'shutdown')
+        GROUP BY e.timestamp::date, e.computer_name, c.display_name
+        ORDER BY date DESC, e.computer_name
+    """
+    _DAILY_SUMMARY_SQL = _DAILY_SUMMARY_TEMPLATE.format(
+        where=f"e.timestamp >= ({NOW_KST} - make_interval(days => %s))::date"
+    )
+    _DATE_SUMMARY_SQL = _DAILY_SUMMARY_TEMPLATE.format(
+        where="e.timestamp >= %s::date AND e.timestamp < %s::date + 1"
+    )
+
+    def get_daily_summary(self, days: int = 7) -> list[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(self._DAILY_SUMMARY_SQL, (days,))
+            return [_row(row) for row in cursor.fetchall()]
+
+    def get_daily_summary_json(self, days: int = 7) -> tuple[bytes, int]:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {_json_object_sql(database.DAILY_SUMMARY_JSON_COLUMNS)} as json
+                FROM ({self._DAILY_SUMMARY_SQL}) s
+                ORDER BY date DESC, computer_name
+            """, (days,))
+            return _json_array(cursor)
+
+    def get_computer_daily_summary(self, computer_name: str, days: int = 30) -> list[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    to_char(timestamp, 'YYYY-MM-DD') as date,
+                    MIN(CASE WHEN event_type = 'boot' THEN to_char(timestamp, 'HH24:MI:SS') END) as first_boot,
+                    MAX(CASE WHEN event_type = 'shutdown' THEN to_char(timestamp, 'HH24:MI:SS') END) as last_shutdown,
+                    SUM(CASE WHEN event_type = 'boot' THEN 1 ELSE 0 END) as boot_count,
+                    SUM(CASE WHEN event_type = 'shutdown' THEN 1 ELSE 0 END) as shutdown_count
+                FROM events
+                WHERE computer_name = %s
+                AND timestamp >= ({NOW_KST} - make_interval(days => %s))::date
+                AND event_type IN ('boot', 'shutdown')
+                GROUP BY to_char(timestamp, 'YYYY-MM-DD')
+                ORDER BY date DESC
+            """, (computer_name, days))
+            return [_row(row) for row in cursor.fetchall()]
+
+    # ==================== 대시보드 스냅샷 ====================
+
+    def get_dashboard_snapshot(self, date: str, days: int = 7, timeline_days: int = 7,
+                               timeline_limit: int = 100) -> dict:
+        with self._cursor() as cursor:
+            # 모든 조회가 같은 스냅샷을 보도록 트랜잭션 격리 수준 상향
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            computers = self._select_computers(cursor)
+            cursor.execute(self._DAILY_SUMMARY_SQL, (max(days, database.DASHBOARD_CHART_DAYS),))
+            summary_rows = [_row(row) for row in cursor.fetchall()]
+            cursor.execute(self._DATE_SUMMARY_SQL, (date, date))
+            date_summary = [_row(row) for row in cursor.fetchall()]
+            timeline, timeline_next_cursor = self._select_events_timeline(cursor, timeline_days, timeline_limit)
+
+        cutoff = database.summary_cutoff(days)
+        return {
+            'date': date,
+            'days': days,
+            'computers': computers,
+            'date_summary': date_summary,
+            'summary': [row for row in summary_rows if row['date'] >= cutoff],
+            'timeline': timeline,
+            'timeline_next_cursor': timeline_next_cursor,
+            'chart': database.build_chart_series(summary_rows, computers),
+        }
+
+    # ==================== 재집계 / 복구 ====================
+
+    def request_resync(self, computer_name: str, days: int) -> datetime:
+        if not 1 <= days <= 30:
+            raise ValueError("days는 1~30 범위여야 합니다")
+
+        since = (database._now_kst() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO resync_requests (computer_name, since, requested_at, consumed_at)
+                VALUES (%s, %s, {NOW_UTC}, NULL)
+                ON CONFLICT (computer_name) DO UPDATE SET
+                    since = EXCLUDED.since,
+                    requested_at = EXCLUDED.requested_at,
+                    consumed_at = NULL
+            """, (computer_name, since))
+        return since
+
+    def get_pending_resync(self, computer_name: str) -> Optional[datetime]:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT since FROM resync_requests
+                WHERE computer_name = %s AND consumed_at IS NULL
+                LIMIT 1
+            """, (computer_name,))
+            row = cursor.fetchone()
+        return row['since'] if row else None
+
+    def get_sync_state(self, computer_name: str) -> dict:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT
+                    (SELECT MAX(timestamp) FROM events
+                     WHERE computer_name = %(name)s AND event_type = 'boot') as last_boot,
+                    (SELECT MAX(timestamp) FROM events
+                     WHERE computer_name = %(name)s AND event_type = 'shutdown') as last_shutdown,
+                    (SELECT MAX(event_record_id) FROM events
+                     WHERE computer_name = %(name)s AND event_record_id IS NOT NULL) as last_event_record_id,
+                    (SELECT since FROM resync_requests
+                     WHERE computer_name = %(name)s AND consumed_at IS NULL
+                     LIMIT 1) as resync_since
+            """, {'name': computer_name})
+            row = cursor.fetchone()
+        return _row(row)
+
+    def ack_resync(self, computer_name: str) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE resync_requests
+                SET consumed_at = {NOW_UTC}
+                WHERE computer_name = %s AND consumed_at IS NULL
+            """, (computer_name,))
+            return cursor.rowcount > 0
+
+    def get_computers_needing_shutdown_recovery(self) -> list[dict]:
+        with self._cursor() as cursor:
+            return self._select_recovery_targets(cursor)
+
+    def _select_recovery_targets(self, cursor) -> list[dict]:
+        cursor.execute(f"""
+            SELECT
+                h.computer_name,
+                h.last_seen,
+                MAX(CASE WHEN e.event_type = 'boot' THEN e.timestamp END) as last_boot,
+                MAX(CASE WHEN e.event_type = 'shutdown' THEN e.timestamp END) as last_shutdown
+            FROM heartbeats h
+            JOIN events e ON h.computer_name = e.computer_name
+            WHERE NOT EXISTS (
+                SELECT 1 FROM events e2
+                WHERE e2.computer_name = h.computer_name
+                AND e2.event_type = 'shutdown'
+                AND e2.timestamp = h.last_seen
+            )
+            GROUP BY h.computer_name, h.last_seen
+            HAVING
+                EXTRACT(EPOCH FROM ({NOW_KST} - h.last_seen)) >= %s
+                AND MAX(CASE WHEN e.event_type = 'boot' THEN e.timestamp END) IS NOT NULL
+                AND (
+                    MAX(CASE WHEN e.event_type = 'shutdown' THEN e.timestamp END) IS NULL
+                    OR MAX(CASE WHEN e.event_type = 'boot' THEN e.timestamp END)
+                       > MAX(CASE WHEN e.event_type = 'shutdown' THEN e.timestamp END)
+                )
+                AND h.last_seen >= MAX(CASE WHEN e.event_type = 'boot' THEN e.timestamp END)
+        """, (database.ONLINE_THRESHOLD_SECONDS,))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def check_and_recover_offline_shutdowns(self) -> list[dict]:
+        # 잠금 없이 먼저 확인 (대부분의 호출은 대상 없음)
+        if not self.get_computers_needing_shutdown_recovery():
+            return []
+
+        with self._cursor() as cursor:
+            # 다른 프로세스의 복구가 끝난 뒤 커밋된 상태로 대상을 다시 조회 (중복 삽입 방지)
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (RECOVERY_LOCK_KEY,))
+            computers = self._select_recovery_targets(cursor)
+            if not computers:
+                return []
+
+            inserted = psycopg2.extras.execute_values(cursor, """
+                INSERT INTO events (computer_name, event_type, timestamp, event_source)
+                VALUES %s
+                RETURNING id, computer_name, timestamp
+            """, [(comp['computer_name'], 'shutdown', comp['last_seen'], 'auto_recovery') for comp in computers],
+                fetch=True)
+            self._record_changes(cursor, [
+                (database.CHANGE_RECOVERY_INSERT, row['computer_name'], database._event_change_data(
+                    row['id'], 'shutdown', row['timestamp'], event_source='auto_recovery'
+                ))
+                for row in inserted
+            ])
+            self._occupancy_mark_spans(cursor, [
+                (comp['computer_name'], comp['last_boot'], comp['last_seen']) for comp in computers
+            ])
+            self._bump_data_version(cursor, [comp['computer_name'] for comp in computers])
+        metrics.RECOVERY_INSERTS.inc(amount=len(computers))
+
+        return [
+            {'computer_name': comp['computer_name'], 'shutdown_time': comp['last_seen'].isoformat()}
+            for comp in computers
+        ]
+
+    # ==================== 리더 선출 (lease) ====================
+
+    def try_acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        """DB 서버 시계 기준 lease 획득/갱신 (여러 호스트 간 시계 차이 영향 없음)"""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO leases (name, holder, expires_at, acquired_at)
+                VALUES (%s, %s, EXTRACT(EPOCH FROM now()) + %s, EXTRACT(EPOCH FROM now()))
+                ON CONFLICT (name) DO UPDATE SET
+                    holder = EXCLUDED.holder,
+                    expires_at = EXCLUDED.expires_at,
+                    acquired_at = CASE WHEN leases.holder = EXCLUDED.holder
+                                       THEN leases.acquired_at ELSE EXCLUDED.acquired_at END
+                WHERE leases.holder = EXCLUDED.holder OR leases.expires_at < EXTRACT(EPOCH FROM now())
+            """, (name, holder, ttl_seconds))
+            return cursor.rowcount == 1
+
+    def release_lease(self, name: str, holder: str) -> bool:
+        with self._cursor() as cursor:
+            cursor.execute("DELETE FROM leases WHERE name = %s AND holder = %s", (name, holder))
+            return cursor.rowcount > 0
+
+    def get_lease(self, name: str) -> Optional[dict]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT name, holder, expires_at, acquired_at FROM leases WHERE name = %s", (name,))
+            row = cursor.fetchone()
+        return dict(row) if row else None
+
+    # ==================== Agent 업데이트 다운로드 슬롯 ====================
+
+    def acquire_download_slot(self, computer_name: str, version: str, max_slots: int,
+                              ttl_seconds: float) -> tuple[bool, float, Optional[str]]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (DOWNLOAD_SLOTS_LOCK_KEY,))
+            cursor.execute(f"""
+                INSERT INTO download_slots (computer_name, version, token, granted_at, expires_at)
+                SELECT %s, %s, %s, EXTRACT(EPOCH FROM now()), EXTRACT(EPOCH FROM now()) + %s
+                WHERE (SELECT COUNT(*) FROM download_slots s
+                       WHERE {_ACTIVE_SLOT_SQL} AND s.computer_name <> %s) < %s
+                ON CONFLICT (computer_name) DO UPDATE SET
+                    version = EXCLUDED.version,
+                    token = EXCLUDED.token,
+                    granted_at = EXCLUDED.granted_at,
+                    expires_at = EXCLUDED.expires_at
+                WHERE download_slots.version <> EXCLUDED.version
+                   OR download_slots.expires_at < EXTRACT(EPOCH FROM now())
+            """, (computer_name, version, secrets.token_urlsafe(16), ttl_seconds, computer_name, max_slots))
+
+            cursor.execute("""
+                SELECT token, expires_at - EXTRACT(EPOCH FROM now()) as remaining FROM download_slots
+                WHERE computer_name = %s AND version = %s AND expires_at >= EXTRACT(EPOCH FROM now())
+            """, (computer_name, version))
+            row = cursor.fetchone()
+            if row:
+                return True, float(row['remaining']), row['token']
+            cursor.execute(f"""
+                SELECT MIN(s.expires_at) - EXTRACT(EPOCH FROM now()) as remaining
+                FROM download_slots s WHERE {_ACTIVE_SLOT_SQL}
+            """)
+            remaining = cursor.fetchone()['remaining']
+        return False, max(0.0, float(remaining or 0)), None
+
+    def get_download_slot(self, token: str) -> Optional[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT s.computer_name, s.version, s.expires_at FROM download_slots s
+                WHERE s.token = %s AND {_ACTIVE_SLOT_SQL}
+            """, (token,))
+            row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_rollout_progress(self) -> dict:
+        with self._cursor() as cursor:
+            cursor.execute("""
+                SELECT COALESCE(agent_version, '') as agent_version, COUNT(*) as cnt
+                FROM heartbeats GROUP BY COALESCE(agent_version, '')
+            """)
+            versions = {row['agent_version']: row['cnt'] for row in cursor.fetchall()}
+            cursor.execute(f"""
+                SELECT s.computer_name, s.version, s.granted_at, s.expires_at
+                FROM download_slots s WHERE {_ACTIVE_SLOT_SQL}
+                ORDER BY s.granted_at
+            """)
+            slots = [dict(row) for row in cursor.fetchall()]
+        return {"agent_versions": versions, "slots": slots}
+
+    # ==================== 설정 / 세션 ====================
+
+    def get_setting(self, key: str) -> Optional[str]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT value FROM settings WHERE key = %s", (key,))
+            row = cursor.fetchone()
+        return row['value'] if row else None
+
+    def set_setting(self, key: str, value: str):
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO settings (key, value, updated_at)
+                VALUES (%s, %s, {NOW_KST})
+                ON CONFLICT (key) DO UPDATE SET
+                    value = EXCLUDED.value,
+                    updated_at = EXCLUDED.updated_at
+            """, (key, value))
+
+    def create_session(self) -> tuple[str, str]:
+        session_id = secrets.token_hex(32)
+        token_hash = database._hash_session_token(session_id)
+        csrf_token = secrets.token_hex(32)
+
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO sessions (session_id, token_hash, csrf_token, expires_at, last_activity)
+                VALUES (%s, %s, %s, {NOW_KST} + interval '24 hours', {NOW_KST})
+            """, (session_id, token_hash, csrf_token))
+        return session_id, csrf_token
+
+    def validate_session(self, session_id: str) -> bool:
+        if not session_id:
+            return False
+        token_hash = database._hash_session_token(session_id)
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE sessions
+                SET last_activity = {NOW_KST},
+                    expires_at = {NOW_KST} + interval '24 hours'
+                WHERE (token_hash = %s OR session_id = %s)
+                AND expires_at > {NOW_KST}
+            """, (token_hash, session_id))
+            return cursor.rowcount > 0
+
+    def get_session_csrf_token(self, session_id: str) -> Optional[str]:
+        if not session_id:
+            return None
+        token_hash = database._hash_session_token(session_id)
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                SELECT csrf_token FROM sessions
+                WHERE (token_hash = %s OR session_id = %s)
+                AND expires_at > {NOW_KST}
+            """, (token_hash, session_id))
+            row = cursor.fetchone()
+        return row['csrf_token'] if row else None
+
+    def delete_session(self, session_id: str):
+        token_hash = database._hash_session_token(session_id)
+        with self._cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM sessions WHERE token_hash = %s OR session_id = %s",
+                (token_hash, session_id)
+            )
+
+    def cleanup_expired_sessions(self) -> int:
+        with self._cursor() as cursor:
+            cursor.execute(f"DELETE FROM sessions WHERE expires_at <= {NOW_KST}")
+            return cursor.rowcount
+
+    # ==================== 유지보수 ====================
+
+    def optimize_storage(self) -> dict:
+        """PostgreSQL은 autovacuum / autoanalyze가 담당하므로 할 일 없음"""
+        return {}
+
+    def probe_storage(self, busy_timeout_ms: int = 2000) -> dict:
+        """준비 상태 확인용 읽기/쓰기 왕복 (문장 시간 상한 busy_timeout_ms, WAL 항목은 해당 없음)"""
+        token = secrets.token_hex(8)
+        started = perf_counter()
+        with self._cursor() as cursor:
+            cursor.execute("SELECT set_config('statement_timeout', %s, true)", (str(int(busy_timeout_ms)),))
+            cursor.execute("SELECT id FROM events ORDER BY id DESC LIMIT 1")
+            cursor.fetchone()
+            read_done = perf_counter()
+            cursor.execute(f"""
+                INSERT INTO settings (key, value, updated_at)
+                VALUES (%s, %s, {NOW_KST})
+                ON CONFLICT (key) DO UPDATE SET
+                    value = EXCLUDED.value,
+                    updated_at = EXCLUDED.updated_at
+            """, (database.READINESS_PROBE_KEY, token))
+            cursor.execute("SELECT value FROM settings WHERE key = %s", (database.READINESS_PROBE_KEY,))
+            row = cursor.fetchone()
+        write_done = perf_counter()
+        if row is None or row['value'] != token:
+            raise RuntimeError("준비 상태 확인 값이 일치하지 않습니다")
+        return {
+            "read_ms": round((read_done - started) * 1000, 3),
+            "write_ms": round((write_done - read_done) * 1000, 3),
+            "wal_bytes": None,
+            "checkpoint_lag_frames": None,
+        }
@@ -0,0 +1,188 @@
+"""대시보드 실시간 푸시 (Server-Sent Events)
+
+프로세스당 폴러 스레드 하나가 DB를 읽어 연결된 모든 대시보드 구독자에게 팬아웃한다.
+구독자(열린 탭) 수와 무관하게 DB 조회량은 일정하다.
+- 변경 로그(changes): POLL_SECONDS 간격 → 이벤트 삽입/덮어쓰기, 자동 복구, 이름 변경, 삭제
+- 하트비트(heartbeats): PRESENCE_POLL_SECONDS 간격 → 온라인/오프라인 전환만 발행
+
+SSE 이벤트 이름:
+- 변경 로그 op 그대로 (event_insert, event_overwrite, recovery_insert, rename, delete, delete_all)
+  data = {seq, computer_name, ...변경 data}, id = seq
+- status: {computer_name, status, last_seen, ip_address}
+- reset: 변경 로그 일부가 정리되어 이어 받을 수 없음 → 클라이언트 전체 재조회
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+import metrics
+
+POLL_SECONDS = 1.0
+PRESENCE_POLL_SECONDS = 10.0
+KEEPALIVE_SECONDS = 15.0
+QUEUE_SIZE = 256
+
+# 브라우저 EventSource 재연결 대기 (ms)
+RETRY_MS = 5000
+
+
+def format_sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """SSE 메시지 직렬화"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return "\n".join(lines) + "\n\n"
+
+
+class StreamBroker:
+    """변경 로그/하트비트 폴링 결과를 asyncio 큐 구독자들에게 전달
+
+    폴러 스레드는 첫 구독 시 시작되며, 구독자가 없는 동안에는 DB를 읽지 않는다.
+    느린 구독자의 큐가 가득 차면 연결을 끊어(None) 클라이언트가 재연결 후 전체 조회하게 한다.
+    """
+
+    def __init__(self, backend, poll_seconds: float = POLL_SECONDS,
+                 presence_seconds: float = PRESENCE_POLL_SECONDS, queue_size: int = QUEUE_SIZE):
+        self._backend = backend
+        self._poll_seconds = poll_seconds
+        self._presence_seconds = presence_seconds
+        self._queue_size = queue_size
+        self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_seq: Optional[int] = None
+        self._presence: Optional[dict[str, str]] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """현재 이벤트 루프에 구독 큐 등록 (async 컨텍스트에서 호출)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[queue] = loop
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="stream-broker")
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, event: str, data: dict, event_id: Optional[int] = None):
+        """모든 구독자에게 메시지 전달 (어느 스레드에서든 호출 가능)"""
+        message = format_sse(event, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:
+                # 이벤트 루프 종료됨
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: str):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 밀린 메시지를 버리고 종료 신호만 남김 → 재연결 후 전체 재조회
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    # ==================== 폴러 ====================
+
+    def _run(self):
+        next_presence = 0.0
+        while True:
+            time.sleep(self._poll_seconds)
+            if not self.subscriber_count:
+                # 구독자 없음: 다음 구독 시 현재 시점부터 다시 시작
+                self._last_seq = None
+                self._presence = None
+                continue
+            try:
+                with metrics.JOB_DURATION.time("stream_poll"):
+                    self._poll_changes()
+                    if time.monotonic() >= next_presence:
+                        next_presence = time.monotonic() + self._presence_seconds
+                        self._poll_presence()
+            except Exception as e:
+                metrics.JOB_ERRORS.inc("stream_poll")
+                print(f"[Stream Error] {e}")
+
+    def _poll_changes(self):
+        if self._last_seq is None:
+            # 새 구독자는 연결 직후 전체 조회하므로 현재 head부터 이어 받음
+            self._last_seq = self._backend.get_changes(after=0, limit=1)['head_seq']
+            return
+
+        while True:
+            result = self._backend.get_changes(after=self._last_seq, limit=500)
+            if result['reset_required']:
+                self._last_seq = result['head_seq']
+                self.publish('reset', {'seq': result['head_seq']})
+                return
+            for change in result['changes']:
+                data = {'seq': change['seq'], 'computer_name': change['computer_name']}
+                data.update(change['data'] or {})
+                self.publish(change['op'], data, change['seq'])
+            self._last_seq = result['last_seq']
+            if not result['has_more']:
+                return
+
+    def _poll_presence(self):
+        rows = self._backend.get_presence()
+        current = {row['computer_name']: row['status'] for row in rows}
+        previous = self._presence
+        self._presence = current
+        if previous is None:
+            return
+
+        went_offline = False
+        for row in rows:
+            name = row['computer_name']
+            if previous.get(name) != row['status']:
+                went_offline = went_offline or row['status'] == 'offline'
+                self.publish('status', {
+                    'computer_name': name,
+                    'status': row['status'],
+                    'last_seen': row['last_seen'],
+                    'ip_address': row['ip_address']
+                })
+
+        # 오프라인 전환 시 종료 이벤트 자동 복구 (결과는 변경 로그로 다음 폴링에 발행)
+        if went_offline:
+            recovered = self._backend.check_and_recover_offline_shutdowns()
+            for r in recovered:
+                print(f"[Stream Recovery] {r['computer_name']} shutdown at {r['shutdown_time']}")
+
+    async def iter_messages(self, request):
+        """StreamingResponse용 SSE 메시지 생성기 (연결 종료 시 구독 해제)"""
+        queue = self.subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            yield format_sse('hello', {'subscribers': self.subscriber_count})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(queue)
@@ -0,0 +1,62 @@
+"""서버 테스트 공통 설정
+
+- server/ 모듈을 `import database`처럼 그대로 임포트하도록 경로 추가
+- SQLite: 테스트마다 임시 DB 파일 (database.DB_PATH 교체)
+- PostgreSQL: COMPUTEROFF_TEST_DATABASE_URL이 있을 때만 실행 (없으면 skip), 테스트마다 테이블을 비움
+
+실행: cd server && python -m pytest -q
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+if str(SERVER_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVER_DIR))
+
+import database
+import storage
+
+# 테스트용 PostgreSQL DSN (운영 DB를 비우지 않도록 COMPUTEROFF_DATABASE_URL과 분리)
+PG_DSN_ENV = "COMPUTEROFF_TEST_DATABASE_URL"
+PG_TABLES = (
+    "events", "heartbeats", "settings", "computers", "sessions", "resync_requests",
+    "occupancy", "changes", "leases", "download_slots",
+)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """임시 파일 SQLite DB로 초기화된 database 모듈"""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    database.init_db()
+    return database
+
+
+def _postgres_backend():
+    dsn = os.environ.get(PG_DSN_ENV)
+    if not dsn:
+        pytest.skip(f"{PG_DSN_ENV} 미설정 - PostgreSQL 테스트 생략")
+    pytest.importorskip("psycopg2")
+    from storage_postgres import PostgresBackend
+
+    backend = PostgresBackend(dsn)
+    backend.init_db()
+    with backend._cursor() as cursor:
+        cursor.execute(f"TRUNCATE {', '.join(PG_TABLES)} RESTART IDENTITY")
+    return backend
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def backend(request):
+    """모든 백엔드에 같은 테스트를 돌리기 위한 StorageBackend"""
+    if request.param == "sqlite":
+        request.getfixturevalue("sqlite_db")
+        yield storage.SQLiteBackend()
+        return
+    backend = _postgres_backend()
+    yield backend
+    backend.close()
@@ -0,0 +1,53 @@
+"""순수 ASGI 보안 헤더 / CORS 미들웨어 (스텁 앱으로 호출)"""
+
+import asyncio
+
+import middleware
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"x-frame-options", b"DENY")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _call(app, method="GET", headers=()):
+    scope = {"type": "http", "method": method, "path": "/api/health", "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    return start["status"], start["headers"]
+
+
+def test_security_headers_replace_endpoint_values():
+    status, headers = _call(middleware.SecurityHeadersMiddleware(_app))
+    assert status == 200
+    assert [value for name, value in headers if name == b"x-frame-options"] == [b"SAMEORIGIN"]
+    assert set(middleware.SECURITY_HEADERS) <= set(headers)
+
+
+def test_cors_echoes_allowed_origin_with_credentials():
+    app = middleware.CORSMiddleware(_app, allow_origins=["https://admin.example"], allow_credentials=True)
+    _, headers = _call(app, headers=[(b"origin", b"https://admin.example")])
+    assert (b"access-control-allow-origin", b"https://admin.example") in headers
+    assert (b"access-control-allow-credentials", b"true") in headers
+    assert (b"vary", b"Origin") in headers
+
+    _, headers = _call(app)
+    assert not any(name.startswith(b"access-control-") for name, _ in headers)
+
+
+def test_cors_preflight_rejects_unknown_origin():
+    app = middleware.CORSMiddleware(_app, allow_origins=["https://admin.example"], allow_methods=["GET", "POST"])
+    request = [(b"access-control-request-method", b"POST")]
+    status, _ = _call(app, "OPTIONS", [(b"origin", b"https://admin.example")] + request)
+    assert status == 200
+    status, _ = _call(app, "OPTIONS", [(b"origin", b"https://evil.example")] + request)
+    assert status == 400
@@ -0,0 +1,33 @@
+"""Agent Rate Limiter (토큰 버킷, 축출, IP 상한 → PC 버킷 순서)"""
+
+import ratelimit
+
+
+def test_bucket_refills_and_reports_retry_after():
+    table = ratelimit.TokenBucketTable(60)
+    assert all(table.acquire('PC1', 0.0) == 0.0 for _ in range(60))
+    assert table.acquire('PC1', 0.0) == 1.0
+    assert table.acquire('PC1', 1.0) == 0.0
+
+
+def test_eviction_drops_least_recently_used_bucket():
+    table = ratelimit.TokenBucketTable(60, max_entries=3)
+    for name in ('idle', 'busy1', 'busy2'):
+        table.acquire(name, 0.0)
+    table.acquire('idle', 1.0)
+    table.acquire('busy1', 2.0)
+    table.acquire('busy2', 2.0)
+
+    table.acquire('new', 3.0)
+    assert len(table) == 3
+    assert 'idle' not in table._buckets
+    assert {'busy1', 'busy2', 'new'} <= set(table._buckets)
+
+
+def test_denied_ip_does_not_spend_computer_tokens():
+    limiter = ratelimit.AgentRateLimiter(limits={'heartbeat': 2}, ip_per_minute=1, redis_url="")
+    assert limiter.check('203.0.113.7', 'heartbeat', 'PC1') == 0.0
+    assert limiter.check('203.0.113.7', 'heartbeat', 'PC1') > 0
+    # 다른 IP에서는 PC1 버킷에 토큰이 1개 남아 있음
+    assert limiter.check('198.51.100.1', 'heartbeat', 'PC1') == 0.0
+    assert limiter.check('198.51.100.2', 'heartbeat', 'PC1') > 0
@@ -0,0 +1,79 @@
+"""여러 워커 프로세스가 같은 SQLite 파일에서 동시에 리더 선출 + 자동 복구를 실행해도
+리더는 하나, 복구 이벤트는 세션당 하나인지 (uvicorn --workers N 상황)"""
+
+import multiprocessing
+from datetime import timedelta
+
+import database
+import leader
+import storage
+
+WORKERS = 6
+COMPUTERS = 12
+
+
+def _worker(db_path, barrier, results):
+    database.DB_PATH = db_path
+    backend = storage.SQLiteBackend()
+    elector = leader.LeaderElector(backend, ttl=30.0, renew_interval=10.0)
+    barrier.wait()
+    try:
+        is_leader = elector.renew()
+        # 요청 경로의 복구는 리더 여부와 무관하게 호출되므로 모든 워커가 동시에 실행
+        recovered = backend.check_and_recover_offline_shutdowns()
+    except Exception as e:
+        results.put(repr(e))
+        return
+    results.put((is_leader, [item['computer_name'] for item in recovered]))
+
+
+def _seed_offline_sessions():
+    now = database._now_kst()
+    conn = database.get_connection()
+    for index in range(COMPUTERS):
+        name = f'PC{index:02d}'
+        conn.execute(
+            "INSERT INTO events (computer_name, event_type, timestamp, event_source) VALUES (?, 'boot', ?, 'realtime')",
+            (name, (now - timedelta(hours=3)).isoformat())
+        )
+        conn.execute(
+            "INSERT INTO heartbeats (computer_name, last_seen) VALUES (?, ?)",
+            (name, (now - timedelta(hours=1)).isoformat())
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_concurrent_workers_elect_one_leader_and_recover_once(sqlite_db):
+    _seed_offline_sessions()
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(WORKERS)
+    results = context.Queue()
+    workers = [
+        context.Process(target=_worker, args=(sqlite_db.DB_PATH, barrier, results))
+        for _ in range(WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+    errors = [outcome for outcome in outcomes if isinstance(outcome, str)]
+    assert not errors
+
+    assert sum(is_leader for is_leader, _ in outcomes) == 1
+
+    recovered = [name for _, names in outcomes for name in names]
+    assert sorted(recovered) == [f'PC{index:02d}' for index in range(COMPUTERS)]
+
+    conn = sqlite_db.get_connection()
+    rows = conn.execute("""
+        SELECT computer_name, COUNT(*) AS cnt FROM events
+        WHERE event_type = 'shutdown' AND event_source = 'auto_recovery'
+        GROUP BY computer_name
+    """).fetchall()
+    conn.close()
+    assert {row['computer_name']: row['cnt'] for row in rows} == {
+        f'PC{index:02d}': 1 for index in range(COMPUTERS)
+    }
@@ -0,0 +1,97 @@
+"""파일 다운로드 Range / If-Range / If-None-Match 처리 (responses.ranged_file_response)"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from starlette.datastructures import Headers
+
+import responses
+from responses import RangeNotSatisfiable, parse_byte_range
+
+CONTENT = bytes(range(256)) * 4
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=0-1,5-6", None),      # 여러 구간 → 전체
+    ("items=0-1", None),
+    ("bytes=5-1", None),
+    ("bytes=abc", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, len(CONTENT)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=-0"])
+def test_parse_byte_range_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range(header, len(CONTENT))
+
+
+@pytest.fixture
+def agent_file(tmp_path):
+    path = tmp_path / "agent.exe"
+    path.write_bytes(CONTENT)
+    return path
+
+
+def _get(path, **headers):
+    response = responses.ranged_file_response(path, Headers(headers), ETAG, "agent.exe")
+    body = b""
+    if hasattr(response, "body_iterator"):
+        async def collect():
+            return b"".join([chunk async for chunk in response.body_iterator])
+        body = asyncio.run(collect())
+    return response, body
+
+
+def test_full_download(agent_file):
+    response, body = _get(agent_file)
+    assert response.status_code == 200
+    assert body == CONTENT
+    assert response.headers["content-length"] == str(len(CONTENT))
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_range_resumes_download(agent_file):
+    response, body = _get(agent_file, range="bytes=1000-")
+    assert response.status_code == 206
+    assert body == CONTENT[1000:]
+    assert response.headers["content-range"] == f"bytes 1000-1023/{len(CONTENT)}"
+    assert response.headers["content-length"] == "24"
+
+
+def test_range_outside_file_is_416(agent_file):
+    response, _ = _get(agent_file, range="bytes=2000-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_range_match_keeps_range(agent_file):
+    response, body = _get(agent_file, range="bytes=0-9", **{"if-range": ETAG})
+    assert response.status_code == 206
+    assert body == CONTENT[:10]
+
+
+def test_if_range_mismatch_sends_whole_file(agent_file):
+    # 파일이 바뀜 → 이어 붙이지 않고 처음부터
+    response, body = _get(agent_file, range="bytes=0-9", **{"if-range": '"old"'})
+    assert response.status_code == 200
+    assert body == CONTENT
+    assert "content-range" not in response.headers
+
+
+def test_if_none_match_is_304(agent_file):
+    response, body = _get(agent_file, **{"if-none-match": f'"other", {ETAG}'})
+    assert response.status_code == 304
+    assert body == b""
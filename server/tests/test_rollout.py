@@ -0,0 +1,85 @@
+"""Agent 업데이트 다운로드 슬롯 (동시 다운로드 수 제한, 토큰, 반납)"""
+
+import pytest
+
+import rollout
+
+VERSION_INFO = {"version": "2.0.0", "variants": {"x64": "agent_windows_x64.exe", "x86": "agent_windows_x86.exe"}}
+
+
+@pytest.fixture
+def updates_dir(tmp_path):
+    """x64 EXE만 올라간 agent_updates/ (x86은 version.json에만 있음)"""
+    directory = tmp_path / "agent_updates"
+    directory.mkdir()
+    (directory / "agent_windows_x64.exe").write_bytes(b"MZ")
+    return directory
+
+
+def test_slot_limit_and_reuse(backend):
+    granted, seconds, token = backend.acquire_download_slot('PC1', '2.0.0', 2, 600)
+    assert granted and 590 < seconds <= 600 and token
+    assert backend.acquire_download_slot('PC2', '2.0.0', 2, 600)[0]
+
+    # 슬롯이 모두 사용 중 → 가장 먼저 만료되는 슬롯까지 초
+    granted, seconds, token3 = backend.acquire_download_slot('PC3', '2.0.0', 2, 600)
+    assert not granted and token3 is None
+    assert 590 < seconds <= 600
+
+    # 이미 가진 슬롯은 그대로 (토큰 유지, 수 제한에 걸리지 않음)
+    again = backend.acquire_download_slot('PC1', '2.0.0', 2, 600)
+    assert again[0] and again[2] == token
+
+
+def test_slot_token_identifies_holder(backend):
+    _, _, token = backend.acquire_download_slot('PC1', '2.0.0', 5, 600)
+
+    assert rollout.slot_holder(backend, token) == 'PC1'
+    assert rollout.slot_holder(backend, None) is None
+    assert rollout.slot_holder(backend, 'not a token!') is None
+    assert rollout.slot_holder(backend, 'A' * 22) is None
+
+
+def test_expired_slot_is_not_counted(backend):
+    _, _, token = backend.acquire_download_slot('PC1', '2.0.0', 1, -1)
+
+    assert rollout.slot_holder(backend, token) is None
+    assert backend.acquire_download_slot('PC2', '2.0.0', 1, 600)[0]
+
+    # 만료된 자기 슬롯은 새 토큰으로 다시 받음 (이전 토큰은 더 이상 유효하지 않음)
+    granted, _, renewed = backend.acquire_download_slot('PC1', '2.0.0', 2, 600)
+    assert granted and renewed != token
+    assert rollout.slot_holder(backend, renewed) == 'PC1'
+
+
+def test_slot_released_when_heartbeat_reports_new_version(backend):
+    _, _, token = backend.acquire_download_slot('PC1', '2.0.0', 1, 600)
+    assert not backend.acquire_download_slot('PC2', '2.0.0', 1, 600)[0]
+
+    backend.update_heartbeat('PC1', agent_version='2.0.0')
+
+    assert rollout.slot_holder(backend, token) is None
+    assert backend.acquire_download_slot('PC2', '2.0.0', 1, 600)[0]
+
+
+def test_offer_update_puts_slot_token_in_download_url(backend, updates_dir, monkeypatch):
+    monkeypatch.setattr(rollout, "MAX_SLOTS", 1)
+
+    offer = rollout.offer_update(backend, VERSION_INFO, 'PC1', 'x64', updates_dir)
+    assert offer["update_available"] and offer["latest_version"] == "2.0.0"
+    path, _, token = offer["download_url"].partition("?token=")
+    assert path == "/api/agent/download/x64"
+    assert rollout.slot_holder(backend, token) == 'PC1'
+
+    waiting = rollout.offer_update(backend, VERSION_INFO, 'PC2', 'x64', updates_dir)
+    assert "update_available" not in waiting
+    assert waiting["update_retry_after"] >= rollout.MIN_RETRY_AFTER
+
+
+@pytest.mark.parametrize("variant", [None, "arm64", "win7_x64", "x86"])
+def test_offer_update_skips_undownloadable_variant(backend, updates_dir, monkeypatch, variant):
+    # 모르는 variant / version.json에 없는 variant / EXE가 없는 variant는 슬롯을 잡지 않음
+    monkeypatch.setattr(rollout, "MAX_SLOTS", 1)
+
+    assert rollout.offer_update(backend, VERSION_INFO, 'PC1', variant, updates_dir) == {}
+    assert rollout.offer_update(backend, VERSION_INFO, 'PC2', 'x64', updates_dir)["update_available"]
@@ -0,0 +1,215 @@
+"""StorageBackend 공통 동작 (SQLite / PostgreSQL 같은 결과)"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+BASE = datetime(2026, 3, 2, 9, 0, 0)
+
+
+def _event(computer_name, event_type, timestamp, event_record_id=None, event_source='event_log'):
+    return {
+        'computer_name': computer_name,
+        'event_type': event_type,
+        'timestamp': timestamp,
+        'event_source': event_source,
+        'event_record_id': event_record_id,
+    }
+
+
+def _rows(backend, computer_name=None):
+    return {row['id']: row for row in backend.get_events(computer_name=computer_name, limit=1000)}
+
+
+def test_insert_event_dedupes_by_record_id_and_window(backend):
+    first_id, is_duplicate = backend.insert_event('PC0', 'boot', BASE, event_record_id=1, event_source='event_log')
+    assert not is_duplicate
+
+    # 같은 record_id / 60초 이내 같은 유형 → 기존 행의 중복
+    assert backend.insert_event('PC0', 'boot', BASE + timedelta(minutes=5), event_record_id=1,
+                                event_source='event_log') == (first_id, True)
+    assert backend.insert_event('PC0', 'boot', BASE + timedelta(seconds=30)) == (first_id, True)
+
+    # 자동 복구 근사값은 이벤트 로그 기반 이벤트로 덮어씀
+    approx_id, _ = backend.insert_event('PC0', 'shutdown', BASE + timedelta(hours=1), event_source='auto_recovery')
+    assert backend.insert_event('PC0', 'shutdown', BASE + timedelta(hours=1, seconds=20), event_record_id=2,
+                                event_source='event_log') == (approx_id, False)
+
+    rows = _rows(backend, 'PC0')
+    assert len(rows) == 2
+    assert rows[approx_id]['event_record_id'] == 2
+    assert datetime.fromisoformat(str(rows[approx_id]['timestamp'])) == BASE + timedelta(hours=1, seconds=20)
+
+
+def test_insert_events_dedupes_against_db_and_batch(backend):
+    # 자동 복구가 last_seen 근사값으로 남긴 종료 이벤트
+    approx_id, is_duplicate = backend.insert_event('PC1', 'shutdown', BASE, event_source='auto_recovery')
+    assert not is_duplicate
+
+    batch = [
+        _event('PC1', 'boot', BASE + timedelta(hours=1), 10),
+        _event('PC1', 'boot', BASE + timedelta(hours=1, seconds=5), 10),   # 배치 안 record_id 중복
+        _event('PC1', 'shutdown', BASE + timedelta(seconds=20), 11),      # 근사값 덮어쓰기
+        _event('PC1', 'boot', BASE + timedelta(hours=1, seconds=30)),     # 배치 안 60초 중복
+        _event('PC2', 'boot', BASE + timedelta(hours=1), 10),             # 다른 PC는 별개
+    ]
+    results = backend.insert_events(batch)
+
+    boot_id = results[0][0]
+    assert results == [
+        (boot_id, False),
+        (boot_id, True),
+        (approx_id, False),
+        (boot_id, True),
+        (results[4][0], False),
+    ]
+    assert len({boot_id, approx_id, results[4][0]}) == 3
+
+    rows = _rows(backend)
+    assert len(rows) == 3
+    overwritten = rows[approx_id]
+    assert overwritten['event_record_id'] == 11
+    assert overwritten['event_source'] == 'event_log'
+    assert datetime.fromisoformat(str(overwritten['timestamp'])) == BASE + timedelta(seconds=20)
+
+    # 같은 배치 재전송 → 모두 중복, 같은 id
+    again = backend.insert_events(batch)
+    assert [event_id for event_id, _ in again] == [event_id for event_id, _ in results]
+    assert all(is_duplicate for _, is_duplicate in again)
+    assert len(_rows(backend)) == 3
+
+
+def test_insert_events_overwrites_pending_batch_item(backend):
+    results = backend.insert_events([
+        _event('PC3', 'shutdown', BASE, event_source='auto_recovery'),
+        _event('PC3', 'shutdown', BASE + timedelta(seconds=10), 5),
+    ])
+    assert results == [(results[0][0], False), (results[0][0], False)]
+
+    (row,) = _rows(backend, 'PC3').values()
+    assert row['event_record_id'] == 5
+    assert datetime.fromisoformat(str(row['timestamp'])) == BASE + timedelta(seconds=10)
+
+
+def test_insert_events_dedupes_against_earlier_single_inserts(backend):
+    # 실시간 send_event로 먼저 들어온 이벤트를 재집계 배치가 다시 보내는 경우
+    first_id, _ = backend.insert_event('PC5', 'boot', BASE, event_record_id=20, event_source='event_log')
+    near_id, _ = backend.insert_event('PC5', 'shutdown', BASE + timedelta(hours=2))
+
+    results = backend.insert_events([
+        _event('PC5', 'boot', BASE, 20),
+        _event('PC5', 'shutdown', BASE + timedelta(hours=2, seconds=40)),   # 60초 이내 같은 유형
+        _event('PC5', 'boot', BASE + timedelta(hours=3), 21),
+    ])
+
+    assert results[:2] == [(first_id, True), (near_id, True)]
+    assert not results[2][1]
+    assert len(_rows(backend, 'PC5')) == 3
+
+
+def test_insert_events_records_changes_in_batch_order(backend):
+    backend.insert_event('PC4', 'shutdown', BASE, event_source='auto_recovery')
+    head = backend.get_changes(0)['last_seq']
+
+    backend.insert_events([
+        _event('PC4', 'boot', BASE - timedelta(hours=1), 1),
+        _event('PC4', 'shutdown', BASE + timedelta(seconds=5), 2),
+    ])
+    feed = backend.get_changes(head)
+    assert [change['op'] for change in feed['changes']] == ['event_insert', 'event_overwrite']
+    assert [change['data']['event_record_id'] for change in feed['changes']] == [1, 2]
+
+
+def test_events_keyset_cursor_pages_without_gaps(backend):
+    # 같은 시각 이벤트가 페이지 경계에 걸쳐도 (timestamp, id)로 빠짐/중복 없이 이어짐
+    timestamps = [BASE, BASE, BASE, BASE + timedelta(minutes=5), BASE + timedelta(minutes=5),
+                  BASE + timedelta(minutes=10), BASE + timedelta(minutes=20)]
+    inserted = [
+        backend.insert_event(f'PC{index}', 'boot', timestamp)[0]
+        for index, timestamp in enumerate(timestamps)
+    ]
+
+    seen = []
+    cursor = None
+    while True:
+        body, count, cursor = backend.get_events_json(limit=3, cursor=cursor)
+        page = json.loads(body)
+        assert len(page) == count <= 3
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert sorted(event['id'] for event in seen) == sorted(inserted)
+    keys = [(event['timestamp'], event['id']) for event in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_sync_state_for_heartbeat(backend):
+    assert backend.get_sync_state('PC6') == {
+        'last_boot': None, 'last_shutdown': None, 'last_event_record_id': None, 'resync_since': None,
+    }
+
+    backend.insert_events([
+        _event('PC6', 'boot', BASE, 30),
+        _event('PC6', 'shutdown', BASE + timedelta(hours=8), 31),
+        _event('PC6', 'boot', BASE + timedelta(days=1), 32),
+        _event('PC7', 'boot', BASE + timedelta(days=2), 99),    # 다른 PC는 제외
+    ])
+    since = backend.request_resync('PC6', 3)
+
+    state = backend.get_sync_state('PC6')
+    assert datetime.fromisoformat(str(state['last_boot'])) == BASE + timedelta(days=1)
+    assert datetime.fromisoformat(str(state['last_shutdown'])) == BASE + timedelta(hours=8)
+    assert state['last_event_record_id'] == 32
+    assert datetime.fromisoformat(str(state['resync_since'])) == since
+
+    assert backend.ack_resync('PC6')
+    assert backend.get_sync_state('PC6')['resync_since'] is None
+
+
+def test_changes_feed_waits_for_uncommitted_seq(backend):
+    if backend.name != 'postgres':
+        pytest.skip("SQLite는 쓰기가 직렬화되어 seq 빈칸이 생기지 않음")
+
+    # seq를 먼저 할당받고 아직 커밋하지 않은 트랜잭션
+    slow = backend._pool.getconn()
+    try:
+        with slow.cursor() as cursor:
+            cursor.execute("INSERT INTO changes (op, computer_name) VALUES ('rename', 'SLOW')")
+        backend.insert_event('FAST', 'boot', BASE)
+
+        feed = backend.get_changes(0)
+        assert feed['changes'] == []
+        assert feed['last_seq'] == 0
+        assert not feed['has_more']
+
+        slow.commit()
+        feed = backend.get_changes(0)
+        assert [change['computer_name'] for change in feed['changes']] == ['SLOW', 'FAST']
+    finally:
+        slow.rollback()
+        backend._pool.putconn(slow)
+
+
+def test_data_version_is_bumped_with_writes(backend):
+    data, events = backend.get_data_version('data'), backend.get_data_version('events')
+
+    # 새 PC 하트비트는 목록을 바꿈, 같은 값의 주기적 하트비트는 버전을 바꾸지 않음
+    backend.update_heartbeat('PC5', '10.0.0.5')
+    assert backend.get_data_version('data') == data + 1
+    assert backend.get_data_version('events') == events
+    backend.update_heartbeat('PC5', '10.0.0.5')
+    assert backend.get_data_version('data') == data + 1
+    backend.update_heartbeat('PC5', '10.0.0.6')
+    assert backend.get_data_version('data') == data + 2
+
+    # 다른 PC(다른 카운터 행)의 쓰기도 합계에 반영
+    backend.insert_event('PC5', 'boot', BASE, event_record_id=1)
+    backend.insert_event('PC6', 'boot', BASE, event_record_id=1)
+    assert backend.get_data_version('data') == data + 4
+    assert backend.get_data_version('events') == events + 2
+
+    # 중복만 있는 배치는 버전을 바꾸지 않음
+    backend.insert_events([_event('PC5', 'boot', BASE, 1)])
+    assert backend.get_data_version('events') == events + 2
@@ -0,0 +1,402 @@
+"""요청 추적 (trace / span)
+
+요청마다 루트 span을 만들고 그 아래에 라우트 처리, 입력 검증, 엔드포인트, DB 호출(db.*),
+파일 읽기 span을 기록한다. 끝난 trace는 백그라운드 스레드가 내보낸다.
+
+- 헤드 샘플링: COMPUTEROFF_TRACE_SAMPLE_RATE (0~1) 비율의 요청을 보관
+- 테일 샘플링: COMPUTEROFF_TRACE_TAIL_MS 이상 걸린 요청은 샘플링과 무관하게 모두 보관
+  (판정을 위해 추적이 켜져 있으면 모든 요청의 span을 모으고, 끝난 뒤 버릴지 결정)
+- 둘 다 0이면 추적 꺼짐: 미들웨어/span 모두 컨텍스트 변수 확인만 하고 통과
+- 내보내기: 크기 기준으로 회전하는 JSON lines 파일 (기본) 또는 OTLP/HTTP JSON 수집기
+  (COMPUTEROFF_TRACE_OTLP_URL). 큐가 가득 차면 요청을 막지 않고 버린다
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional
+
+import metrics
+
+SAMPLE_RATE = float(os.environ.get("COMPUTEROFF_TRACE_SAMPLE_RATE", 0))
+TAIL_MS = float(os.environ.get("COMPUTEROFF_TRACE_TAIL_MS", 0))
+
+TRACE_FILE = Path(os.environ.get("COMPUTEROFF_TRACE_FILE", Path(__file__).parent / "traces" / "traces.jsonl"))
+TRACE_FILE_MAX_BYTES = int(os.environ.get("COMPUTEROFF_TRACE_FILE_MAX_BYTES", 10 * 1024 * 1024))
+TRACE_FILE_BACKUPS = int(os.environ.get("COMPUTEROFF_TRACE_FILE_BACKUPS", 5))
+OTLP_URL = os.environ.get("COMPUTEROFF_TRACE_OTLP_URL", "")
+
+SERVICE_NAME = "computeroff"
+# 내보내기 대기 trace 최대 수 (넘으면 버림)
+EXPORT_QUEUE_SIZE = 1000
+# trace 하나에 기록하는 최대 span 수 (긴 루프의 DB 호출 폭주 방지)
+MAX_SPANS_PER_TRACE = 500
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: dict,
+                 start_ns: Optional[int] = None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        trace = self.trace
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append(self)
+        else:
+            trace.dropped_spans += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        data = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "spans", "dropped_spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.sampled = sampled
+        self.spans: list[Span] = []
+        self.dropped_spans = 0
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = SAMPLE_RATE, tail_ms: float = TAIL_MS, exporter=None):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate는 0~1 범위여야 합니다")
+        self.sample_rate = sample_rate
+        self.tail_ms = tail_ms
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and (self.sample_rate > 0 or self.tail_ms > 0)
+
+    def start_trace(self, name: str, attributes: dict) -> Span:
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        return Span(Trace(sampled), name, None, attributes)
+
+    def finish_trace(self, root: Span):
+        """루트 span 종료 후 보관 여부 판정 (헤드 샘플링 또는 테일 기준 초과)"""
+        root.end()
+        trace = root.trace
+        slow = self.tail_ms > 0 and root.duration_ms >= self.tail_ms
+        if not (trace.sampled or slow):
+            return
+        root.attributes["sampling"] = "head" if trace.sampled else "tail"
+        if trace.dropped_spans:
+            root.attributes["dropped_spans"] = trace.dropped_spans
+        self.exporter.submit(trace)
+
+
+class _ChildSpan:
+    __slots__ = ("span", "token")
+
+    def __init__(self, parent: Span, name: str, attributes: dict):
+        self.span = Span(parent.trace, name, parent.span_id, attributes)
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        self.span.end()
+        return False
+
+
+# 추적 중이 아닐 때 돌려주는 재사용 컨텍스트 (생성 비용 없음)
+_NOOP = nullcontext()
+
+
+def span(name: str, **attributes):
+    """현재 trace 아래 자식 span 컨텍스트 (추적 중이 아니면 아무것도 하지 않음)"""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return _ChildSpan(parent, name, attributes)
+
+
+def traced(name: str):
+    """함수 호출을 span으로 감싸는 데코레이터 (동기 함수용)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracedBackend:
+    """StorageBackend 메서드 호출마다 db.<메서드> span을 기록하는 프록시
+
+    래핑한 메서드는 인스턴스에 캐시하므로 두 번째 호출부터는 일반 속성 조회와 같다.
+    """
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def __getattr__(self, name: str):
+        value = getattr(self._backend, name)
+        if callable(value) and not name.startswith("_"):
+            value = traced(f"db.{name}")(value)
+        self.__dict__[name] = value
+        return value
+
+
+# ==================== 내보내기 ====================
+
+class _QueueExporter:
+    """끝난 trace를 큐에 넣고 백그라운드 스레드에서 기록 (요청 경로에서 I/O 없음)"""
+
+    def __init__(self, queue_size: int = EXPORT_QUEUE_SIZE):
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name="trace-exporter")
+        self._thread.start()
+
+    def submit(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(batch)
+            except Exception as e:
+                metrics.JOB_ERRORS.inc("trace_export")
+                print(f"[Trace Error] 내보내기 실패: {e}")
+
+    def export(self, traces: list[Trace]):
+        raise NotImplementedError
+
+
+class JsonLinesExporter(_QueueExporter):
+    """span 하나당 JSON 한 줄, max_bytes 초과 시 .1 ~ .N으로 회전"""
+
+    def __init__(self, path: Path = TRACE_FILE, max_bytes: int = TRACE_FILE_MAX_BYTES,
+                 backups: int = TRACE_FILE_BACKUPS):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__()
+
+    def export(self, traces: list[Trace]):
+        data = "".join(
+            json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n"
+            for trace in traces for s in trace.spans
+        ).encode("utf-8")
+        if self.path.exists() and self.path.stat().st_size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{i}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+
+class OTLPExporter(_QueueExporter):
+    """OTLP/HTTP JSON (/v1/traces) 형식으로 수집기에 전송"""
+
+    def __init__(self, url: str = OTLP_URL, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        super().__init__()
+
+    @staticmethod
+    def _attributes(attributes: dict) -> list[dict]:
+        result = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                result.append({"key": key, "value": {"boolValue": value}})
+            elif isinstance(value, int):
+                result.append({"key": key, "value": {"intValue": str(value)}})
+            elif isinstance(value, float):
+                result.append({"key": key, "value": {"doubleValue": value}})
+            else:
+                result.append({"key": key, "value": {"stringValue": str(value)}})
+        return result
+
+    def _span(self, s: Span) -> dict:
+        data = {
+            "traceId": s.trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER / INTERNAL
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": self._attributes(s.attributes),
+        }
+        if s.parent_id:
+            data["parentSpanId"] = s.parent_id
+        if s.error:
+            data["status"] = {"code": 2, "message": s.error}
+        return data
+
+    def export(self, traces: list[Trace]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [self._span(s) for trace in traces for s in trace.spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body, default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def create_tracer() -> Tracer:
+    """환경 변수 설정으로 Tracer 생성 (샘플링 설정이 없으면 내보내기 스레드도 만들지 않음)"""
+    if SAMPLE_RATE <= 0 and TAIL_MS <= 0:
+        return Tracer(0, 0, None)
+    exporter = OTLPExporter() if OTLP_URL else JsonLinesExporter()
+    print(f"[Trace] 추적 사용: sample_rate={SAMPLE_RATE}, tail_ms={TAIL_MS}, "
+          f"export={'otlp ' + OTLP_URL if OTLP_URL else TRACE_FILE}")
+    return Tracer(SAMPLE_RATE, TAIL_MS, exporter)
+
+
+# ==================== ASGI 미들웨어 ====================
+
+class TracingMiddleware:
+    """요청 루트 span (가장 바깥 미들웨어). 응답에 X-Trace-Id 헤더 추가"""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        root = self.tracer.start_trace(f"{scope['method']} {scope['path']}", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        token = _current.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-trace-id", root.trace.trace_id.encode("ascii"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            route = metrics.route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.attributes["http.route"] = route
+            self.tracer.finish_trace(root)
+
+
+def trace_route_handler(handler):
+    """라우트 핸들러(FastAPI 입력 검증 + 엔드포인트 + 응답 직렬화)를 route span으로 감쌈"""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        parent = _current.get()
+        if parent is None:
+            return await handler(request)
+        with span("route"):
+            return await handler(request)
+    return wrapper
+
+
+def trace_endpoint(call):
+    """엔드포인트 함수 span + 그 직전까지(입력 검증, 의존성)를 validate span으로 기록"""
+    def _validate_span():
+        route_span = _current.get()
+        if route_span is None or route_span.name != "route":
+            return
+        child = Span(route_span.trace, "validate", route_span.span_id, {}, route_span.start_ns)
+        child.end()
+
+    # FastAPI가 코루틴 여부로 실행 방식(await / 스레드풀)을 정하므로 같은 종류로 감싼다
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return await call(*args, **kwargs)
+            _validate_span()
+            with span("endpoint"):
+                return await call(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return call(*args, **kwargs)
+        _validate_span()
+        with span("endpoint"):
+            return call(*args, **kwargs)
+    return wrapper